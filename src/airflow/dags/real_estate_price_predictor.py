@@ -1,20 +1,28 @@
+import json
 import os
 import sys
-import mlflow
 import pandas as pd
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 from datetime import timezone
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterator
 from airflow import DAG
 from airflow.decorators import task
 from airflow.models import Variable
-from ml.config.config import MLFlowConfig, ModelConfig
+from airflow.operators.python import get_current_context
+from ml.config.config import MLFlowConfig, ModelConfig, ValidationConfig
+from ml.evaluation.validation_gate import ModelValidationGate
 from ml.training.regression_trainer import RegressionTrainer
-from ml.pipelines.analysis_preprocess import prepare_analysis_dataset
+from ml.utils.experiments import sync_local_runs, tracking_server_available
+from ml.pipelines.analysis_preprocess import prepare_analysis_dataset, update_analysis_dataset
+from ml.prediction.comparables import COMPARABLES_FILE, build_comparables_index
 from ml.pipelines.training_preprocess import prepare_training_dataset
+from ml.pipelines.listing_store import LISTING_STORE_FILE, ListingStore
+from scrapers.html_cache import HtmlCache
 from scrapers.immovlan_listing_scraper import ImmovlanListingScraper
 from scrapers.immovlan_sitemap_scraper import ImmovlanSitemapScraper
+from scrapers.run_metrics import previous_reports, throughput_regression
 from utils.logging_utils import setup_logger
 
 
@@ -26,9 +34,64 @@ if str(REPO_ROOT) not in sys.path:
 DATA_DIR = REPO_ROOT / "data"
 RAW_DIR = DATA_DIR / "raw"
 SITEMAPS_DIR = RAW_DIR / "sitemaps"
+HTML_CACHE_DIR = RAW_DIR / "html_cache"
 ANALYSIS_DIR = DATA_DIR / "analysis"
 TRAINING_DIR = DATA_DIR / "training"
 MODELS_DIR = REPO_ROOT / "ml_models"
+MLFLOW_FALLBACK_DIR = REPO_ROOT / "mlruns_local"
+
+
+@contextmanager
+def listing_scraper() -> Iterator[ImmovlanListingScraper]:
+    """
+    Listing scraper, storing the fetched pages in the HTML cache when the
+    scraper_html_cache Variable is set, for offline reparses. The cache is
+    closed on exit, also when the scrape fails.
+    """
+    cache_html = str(Variable.get("scraper_html_cache", default_var="false")).lower() == "true"
+    if not cache_html:
+        yield ImmovlanListingScraper()
+        return
+    with HtmlCache(HTML_CACHE_DIR) as html_cache:
+        yield ImmovlanListingScraper(html_cache=html_cache)
+
+
+def mlflow_config() -> MLFlowConfig:
+    """
+    MLFlow configuration, with the lightweight logging options set by the
+    mlflow_async_logging, mlflow_log_input_example, mlflow_defer_registration
+    and mlflow_local_fallback Variables.
+    """
+    def flag(name: str, default: str) -> bool:
+        return str(Variable.get(name, default_var=default)).lower() == "true"
+
+    return MLFlowConfig(
+        async_logging=flag("mlflow_async_logging", "false"),
+        log_input_example=flag("mlflow_log_input_example", "true"),
+        defer_registration=flag("mlflow_defer_registration", "false"),
+        local_fallback_dir=MLFLOW_FALLBACK_DIR if flag("mlflow_local_fallback", "false") else None,
+    )
+
+
+def publish_scrape_metrics(report_path: Path, metric: str) -> dict:
+    """
+    Push a scraper run report to XCom ("scrape_metrics") and warn when its
+    throughput `metric` regressed against the previous runs, the check
+    result being pushed as "throughput_regression".
+    """
+    logger = setup_logger(__name__)
+    report = json.loads(report_path.read_text())
+    tolerance = float(Variable.get("scraper_throughput_tolerance", default_var=0.3))
+    regression = throughput_regression(
+        report, previous_reports(report_path), metric=metric, tolerance=tolerance
+    )
+    if regression:
+        logger.warning(f"Scraper throughput regression ({report_path.name}): {regression}")
+
+    ti = get_current_context()["ti"]
+    ti.xcom_push(key="scrape_metrics", value=report)
+    ti.xcom_push(key="throughput_regression", value=regression)
+    return report
 
 
 # DAG default arguments
@@ -67,7 +130,8 @@ with DAG(
         try:
             SITEMAPS_DIR.mkdir(parents=True, exist_ok=True)
             scraper = ImmovlanSitemapScraper(SITEMAPS_DIR)
-            scraper.scrape_sitemaps()
+            report_path = scraper.scrape_sitemaps()
+            publish_scrape_metrics(report_path, "requests_per_s")
             logger.info("Sitemap scraping completed successfully.")
 
         except Exception as e:
@@ -92,11 +156,12 @@ with DAG(
             output_file_path = RAW_DIR / "apartments" / f"apartments_{date_str}.parquet"
             output_file_path.parent.mkdir(parents=True, exist_ok=True)
 
-            scraper = ImmovlanListingScraper()
-            total_scraped = scraper.scrape_listings(
-                urls_txt_file, output_file_path, max_listings=10
-            )
+            with listing_scraper() as scraper:
+                total_scraped = scraper.scrape_listings(
+                    urls_txt_file, output_file_path, max_listings=10
+                )
 
+            publish_scrape_metrics(scraper.report_path, "listings_per_s")
             logger.info(
                 f"Scraped {total_scraped} apartments, saved to {output_file_path}"
             )
@@ -122,11 +187,12 @@ with DAG(
             output_file_path = RAW_DIR / "houses" / f"houses_{date_str}.parquet"
             output_file_path.parent.mkdir(parents=True, exist_ok=True)
 
-            scraper = ImmovlanListingScraper()
-            total_scraped = scraper.scrape_listings(
-                urls_txt_file, output_file_path, max_listings=10
-            )
+            with listing_scraper() as scraper:
+                total_scraped = scraper.scrape_listings(
+                    urls_txt_file, output_file_path, max_listings=10
+                )
 
+            publish_scrape_metrics(scraper.report_path, "listings_per_s")
             logger.info(f"Scraped {total_scraped} houses, saved to {output_file_path}")
             return str(output_file_path)
 
@@ -149,7 +215,17 @@ with DAG(
             if not Path(house_data_path).exists():
                 raise FileNotFoundError(f"House data not found: {house_data_path}")
 
-            out_file = prepare_analysis_dataset(apartment_data_path, house_data_path, ANALYSIS_DIR)
+            # Incremental mode only processes the new snapshots, into a partitioned dataset
+            incremental = (
+                str(Variable.get("analysis_incremental", default_var="false")).lower()
+                == "true"
+            )
+            if incremental:
+                out_file = update_analysis_dataset(RAW_DIR, ANALYSIS_DIR)
+            else:
+                out_file = prepare_analysis_dataset(
+                    apartment_data_path, house_data_path, ANALYSIS_DIR
+                )
 
             if not out_file.exists():
                 raise RuntimeError("Analysis dataset creation failed")
@@ -167,7 +243,42 @@ with DAG(
             raise
 
     @task
-    def prep_training_dataset(apartment_path: Any, house_path: Any) -> str:
+    def build_comparables(analysis_dataset_path: Any) -> str:
+        """Build the comparable listings index served by the API's /comparables."""
+        logger = setup_logger(__name__)
+        logger.info("Building comparables index...")
+
+        try:
+            # Replaced atomically, the API reloads it on the next request
+            out_file = build_comparables_index(
+                Path(analysis_dataset_path), MODELS_DIR / COMPARABLES_FILE
+            )
+            logger.info(f"Comparables index saved to {out_file}")
+            return str(out_file)
+
+        except Exception as e:
+            logger.error(f"Comparables index build failed: {str(e)}")
+            raise
+
+    @task
+    def update_listing_store(apartment_path: Any, house_path: Any) -> str:
+        """Upsert the new scrape snapshots into the listing store."""
+        logger = setup_logger(__name__)
+        logger.info("Updating listing store...")
+
+        try:
+            store_path = DATA_DIR / LISTING_STORE_FILE
+            with ListingStore(store_path) as store:
+                ingested = store.ingest(RAW_DIR)
+            logger.info(f"Ingested {len(ingested)} snapshot files into {store_path}")
+            return str(store_path)
+
+        except Exception as e:
+            logger.error(f"Listing store update failed: {str(e)}")
+            raise
+
+    @task
+    def prep_training_dataset(apartment_path: Any, house_path: Any, listing_store_path: Any) -> str:
         """Prepare training and test datasets from raw scraped data."""
         logger = setup_logger(__name__)
         logger.info("Preparing training datasets...")
@@ -179,8 +290,16 @@ with DAG(
             if not Path(house_path).exists():
                 raise FileNotFoundError(f"House data not found: {house_path}")
 
+            # The store has the current listings deduplicated by URL
+            from_store = (
+                str(Variable.get("training_from_listing_store", default_var="false")).lower()
+                == "true"
+            )
+
             TRAINING_DIR.mkdir(parents=True, exist_ok=True)
-            training_dataset_path = prepare_training_dataset(RAW_DIR, TRAINING_DIR)
+            training_dataset_path = prepare_training_dataset(
+                RAW_DIR, TRAINING_DIR, Path(listing_store_path) if from_store else None
+            )
 
             if not training_dataset_path.exists():
                 raise RuntimeError("Training dataset creation failed")
@@ -212,60 +331,112 @@ with DAG(
                 alpha = float(Variable.get("model_alpha", default_var=0.1))
                 l1_ratio = float(Variable.get("model_l1_ratio", default_var=0.5))
                 test_size = float(Variable.get("model_test_size", default_var=0.2))
+                cv_folds = int(Variable.get("model_cv_folds", default_var=5))
+                n_jobs = int(Variable.get("model_n_jobs", default_var=-1))
+                cv_reuse = Variable.get("model_cv_reuse", default_var="refit")
+                search_strategy = (
+                    Variable.get("model_search_strategy", default_var="") or None
+                )
+                backend = Variable.get("model_backend", default_var="elasticnet")
+                n_threads = Variable.get("model_n_threads", default_var=None)
+                n_threads = int(n_threads) if n_threads else None
+                warm_start = (
+                    str(Variable.get("model_warm_start", default_var="false")).lower()
+                    == "true"
+                )
+                prediction_interval = (
+                    Variable.get("model_prediction_interval", default_var="") or None
+                )
+                interval_coverage = float(
+                    Variable.get("model_interval_coverage", default_var=0.9)
+                )
             except Exception as e:
                 logger.warning(f"Could not load Airflow variables, using defaults: {e}")
                 alpha, l1_ratio, test_size = 0.1, 0.5, 0.2
+                cv_folds, n_jobs, search_strategy = 5, -1, None
+                cv_reuse = "refit"
+                backend, n_threads, warm_start = "elasticnet", None, False
+                prediction_interval, interval_coverage = None, 0.9
 
             # Create configuration
             model_config = ModelConfig(
-                alpha=alpha, l1_ratio=l1_ratio, test_size=test_size
+                alpha=alpha,
+                l1_ratio=l1_ratio,
+                test_size=test_size,
+                cv_folds=cv_folds,
+                n_jobs=n_jobs,
+                cv_reuse=cv_reuse,
+                search_strategy=search_strategy,
+                backend=backend,
+                n_threads=n_threads,
+                warm_start=warm_start,
+                prediction_interval=prediction_interval,
+                interval_coverage=interval_coverage,
             )
-            mlflow_config = MLFlowConfig()
-
-            trainer = RegressionTrainer(model_config, mlflow_config)
-            model_path = trainer.train_and_evaluate_model(
+            trainer = RegressionTrainer(model_config, mlflow_config())
+            run_id = trainer.train_and_evaluate_model(
                 Path(training_dataset_path), MODELS_DIR
             )
 
-            logger.info(f"Model trained successfully, saved to {model_path}")
-            return str(model_path)
+            logger.info(f"Model trained successfully, MLFlow run {run_id}")
+            return str(run_id)
 
         except Exception as e:
             logger.error(f"Model training failed: {str(e)}")
             raise
 
     @task
-    def model_validation_gate(model_uri: Any) -> bool:
+    def model_validation_gate(run_id: Any, training_dataset_path: Any) -> bool:
         """Validation gate to check if model performance is acceptable."""
         logger = setup_logger(__name__)
 
         try:
-            #metrics = mlflow.get_metrics(model_uri)
-
             # Define performance thresholds (can be moved to Airflow Variables)
-            min_r2 = float(Variable.get("model_min_r2", default_var=0.7))
-            max_mae = float(Variable.get("model_max_mae", default_var=50000))
-
-            r2_score = 0.8  # Placeholder value
-            mae_score = 40000  # Placeholder value
-
-            # Check performance criteria
-            r2_pass = r2_score >= min_r2
-            mae_pass = mae_score <= max_mae
+            validation_config = ValidationConfig(
+                min_r2=float(Variable.get("model_min_r2", default_var=0.7)),
+                max_mae=float(Variable.get("model_max_mae", default_var=50000)),
+                r2_tolerance=float(Variable.get("model_r2_tolerance", default_var=0.0)),
+                mae_tolerance=float(Variable.get("model_mae_tolerance", default_var=0.0)),
+                latency_tolerance=float(
+                    Variable.get("model_latency_tolerance", default_var=0.1)
+                ),
+                latency_floor_ms=float(
+                    Variable.get("model_latency_floor_ms", default_var=0.5)
+                ),
+            )
 
-            if r2_pass and mae_pass:
-                logger.info(f"✅ Model validation PASSED!")
-                logger.info(f"R² = {r2_score:.3f} (>= {min_r2})")
-                logger.info(f"MAE = {mae_score:.2f} (<= {max_mae})")
+            config = mlflow_config()
+            run_id = str(run_id)
+
+            # Runs logged to the fallback store (this one or earlier ones) are
+            # copied to the server once it is back, the gate then works on the copy
+            if config.local_fallback_dir is not None and tracking_server_available(
+                config.tracking_uri, config.health_check_timeout_s
+            ):
+                synced = sync_local_runs(config.local_fallback_dir, config.tracking_uri, MODELS_DIR)
+                if synced:
+                    logger.info(f"Synced {len(synced)} runs from {config.local_fallback_dir}")
+                run_id = synced.get(run_id, run_id)
+
+            gate = ModelValidationGate(MODELS_DIR, validation_config, config)
+            result = gate.validate(run_id, Path(training_dataset_path))
+
+            logged, candidate = result.logged, result.candidate
+            if result.comparison_skipped:
+                logger.warning(f"Not compared with production: {result.comparison_skipped}")
+            if result.passed and result.promotion_skipped:
+                logger.warning(f"Model validation passed, promotion skipped: {result.promotion_skipped}")
+                return True
+            if result.passed:
+                logger.info(f"✅ Model validation PASSED, model promoted!")
+                logger.info(f"R² = {logged['r2']:.3f} (>= {validation_config.min_r2})")
+                logger.info(f"MAE = {logged['mae']:.2f} (<= {validation_config.max_mae})")
+                logger.info(f"p95 latency = {candidate['predict_single_p95_ms']:.3f}ms")
                 return True
             else:
-                logger.warning(f"❌ Model validation FAILED!")
-                logger.warning(
-                    f"R² = {r2_score:.3f} (required >= {min_r2}) - {'PASS' if r2_pass else 'FAIL'}"
-                )
-                logger.warning(
-                    f"MAE = {mae_score:.2f} (required <= {max_mae}) - {'PASS' if mae_pass else 'FAIL'}"
-                )
+                logger.warning(f"❌ Model validation FAILED, promotion blocked!")
+                for failure in result.failures:
+                    logger.warning(failure)
 
                 # Just warn for now, we could also fail the task with:
                 # raise ValueError("Model performance below acceptable thresholds")
@@ -291,7 +462,9 @@ with DAG(
                 files_to_delete = model_files[keep_last_n:]
 
                 for file_path in files_to_delete:
-                    file_path.unlink()
+                    # Also drop the warm start sidecars (<stem>.json, <stem>_rows.npy, ...)
+                    for sidecar in MODELS_DIR.glob(f"{file_path.stem}*"):
+                        sidecar.unlink()
                     logger.info(f"Deleted old model: {file_path}")
 
                 logger.info(f"Cleaned up {len(files_to_delete)} old model files")
@@ -310,9 +483,13 @@ with DAG(
     t_scrape_apartments = scrape_apartments()
     t_scrape_houses = scrape_houses()
     t_prep_analysis_dataset = prep_analysis_dataset(t_scrape_apartments, t_scrape_houses)
-    t_prep_training_dataset = prep_training_dataset(t_scrape_apartments, t_scrape_houses)
+    t_build_comparables = build_comparables(t_prep_analysis_dataset)
+    t_update_listing_store = update_listing_store(t_scrape_apartments, t_scrape_houses)
+    t_prep_training_dataset = prep_training_dataset(
+        t_scrape_apartments, t_scrape_houses, t_update_listing_store
+    )
     t_train_model = train_model(t_prep_training_dataset)
-    t_model_validation = model_validation_gate(t_train_model)
+    t_model_validation = model_validation_gate(t_train_model, t_prep_training_dataset)
     t_cleanup = cleanup_old_models()
 
     # Define task dependencies
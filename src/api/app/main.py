@@ -1,28 +1,97 @@
+"""
+FastAPI app serving the price predictor.
+
+Only FastAPI, pydantic and the schemas are imported here. pandas,
+scikit-learn and the model are loaded by the model store warm-up, which runs
+in the background once the app starts (or in the gunicorn master before
+forking): /health answers as soon as the process is up, /ready only once a
+dummy prediction went through the whole predict path.
+"""
+
+from __future__ import annotations
+
 import os
-import pandas as pd
-import uvicorn
-from fastapi import FastAPI, Request, status
-from fastapi.responses import JSONResponse
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING, Optional
+from fastapi import FastAPI, Query, Request, status
+from fastapi.responses import JSONResponse, Response
 from fastapi.exceptions import RequestValidationError
 from starlette.exceptions import HTTPException as StarletteHTTPException
 from app.settings import settings
+from app.observability import (
+    PrometheusMiddleware,
+    StageTimer,
+    observe_stage_since,
+    record_validation_error,
+    render_metrics,
+)
+from app.model_store import ModelStore
+from app.schemas.enums import PropertyType
+from app.schemas.property_input import PropertyInput
 from app.schemas.models import (
     RootResponse,
     HealthResponse,
+    Comparable,
+    ComparablesResponse,
+    Explanation,
+    FeatureContribution,
     PredictRequest,
+    PredictionInterval,
     PredictionResult,
     PredictResponse,
     ErrorResponse,
 )
-from ml.pipelines.preprocessing.pipeline_definitions import preprocessing_pipeline
-from ml.prediction.price_predictor import predict_price
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+MODEL_PATH = settings.MODEL_PATH or os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", "ml_models", "model.joblib")
+)
+LOOKUP_DIR = settings.LOOKUP_DIR or os.path.join(os.path.dirname(MODEL_PATH), "lookups")
+# Built by the pipeline with the analysis dataset, see ml/prediction/comparables.py
+COMPARABLES_PATH = settings.COMPARABLES_PATH or os.path.join(
+    os.path.dirname(MODEL_PATH), "comparables.joblib"
+)
+
+model_store = ModelStore(MODEL_PATH, LOOKUP_DIR, COMPARABLES_PATH)
+
+# Dummy input of the warm-up prediction, complete so no feature ends up missing
+WARM_UP_PROPERTY = PropertyInput(
+    type=PropertyType.HOUSE,
+    subtype="HOUSE",
+    province="Brussels",
+    postal_code=1000,
+    habitable_surface=120,
+    bedroom_count=3,
+    bathroom_count=1,
+    toilet_count=2,
+    epc_score="C",
+)
+
+
+def warm_up() -> bool:
+    """Load the model and lookup tables and run a dummy prediction, returns whether ready."""
+    return model_store.warm_up(predict_property, WARM_UP_PROPERTY)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Already warm when forked from a preloaded gunicorn master
+    model_store.warm_up_in_background(
+        predict_property, WARM_UP_PROPERTY, settings.WARM_UP_RETRY_S
+    )
+    yield
 
 
 app = FastAPI(
     title=settings.API_TITLE,
     version=settings.API_VERSION,
     description=settings.API_DESCRIPTION,
+    lifespan=lifespan,
 )
+app.add_middleware(PrometheusMiddleware)
 
 
 # =====================
@@ -43,6 +112,9 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
         ]
     }
 
+    for error in details["errors"]:
+        record_validation_error(error["loc"])
+
     content = ErrorResponse(
         success=False, error="Validation error", details=details
     ).model_dump()
@@ -83,30 +155,186 @@ def health_check():
     return HealthResponse(status="healthy")
 
 
+@app.get(
+    "/ready",
+    response_model=HealthResponse,
+    responses={503: {"model": HealthResponse, "description": "Still warming up"}},
+    summary="Readiness check",
+)
+def readiness_check():
+    if model_store.ready.is_set():
+        return HealthResponse(status="ready")
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content=HealthResponse(success=False, status="warming_up").model_dump(),
+    )
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    payload, content_type = render_metrics()
+    return Response(content=payload, media_type=content_type)
+
+
+def run_preprocessing(df: pd.DataFrame) -> pd.DataFrame:
+    """Apply the fitted preprocessing pipeline step by step, timing each step."""
+    for name, step in model_store.get_preprocessor().steps:
+        with StageTimer(f"preprocess_{name}"):
+            df = step.transform(df)
+    return df
+
+
+def prepare_features(property: PropertyInput) -> pd.DataFrame:
+    """Convert the validated input to the model's input frame."""
+    import pandas as pd
+
+    with StageTimer("to_ml_format"):
+        ml_ready = property.to_ml_format()
+        df = pd.DataFrame([ml_ready])
+
+    return run_preprocessing(df)
+
+
+def predict_with_interval(model, df: pd.DataFrame) -> tuple[int, Optional[PredictionInterval]]:
+    """Predicted price and, for models trained with one, its prediction interval."""
+    from ml.prediction.price_predictor import predict_price, predict_price_interval
+
+    if not hasattr(model, "predict_interval"):
+        return predict_price(df, model=model), None
+
+    price, lower, upper = predict_price_interval(df, model=model)
+    return price, PredictionInterval(lower=lower, upper=upper, coverage=model.coverage)
+
+
+def predict_property(property: PropertyInput) -> tuple[int, Optional[PredictionInterval]]:
+    """Run the predict path, from the validated input to the predicted price and interval."""
+    df = prepare_features(property)
+    with StageTimer("predict"):
+        return predict_with_interval(model_store.get_model(), df)
+
+
+def explain_property(
+    property: PropertyInput, top_k: int
+) -> tuple[int, Optional[PredictionInterval], Explanation]:
+    """Predict the price, its interval and its top-k feature contributions."""
+    from ml.prediction.explain import explain_prediction
+
+    df = prepare_features(property)
+    model = model_store.get_model()
+    with StageTimer("predict_explain"):
+        explanation = explain_prediction(model, df)
+
+    interval = None
+    if hasattr(model, "predict_interval"):
+        with StageTimer("predict"):
+            _, interval = predict_with_interval(model, df)
+
+    return round(explanation.prediction), interval, Explanation(
+        baseline=explanation.baseline,
+        contributions=[FeatureContribution(**item) for item in explanation.top(top_k)],
+    )
+
+
 @app.post(
     "/predict",
     response_model=PredictResponse,
-    responses={422: {"model": ErrorResponse, "description": "Validation Error"}},
+    responses={
+        422: {"model": ErrorResponse, "description": "Validation Error"},
+        501: {"model": ErrorResponse, "description": "Explanation not supported by the model"},
+    },
     summary="Predict property price",
-    description="Predicts property price based on input features.",
+    description="Predicts property price based on input features, with its prediction "
+    "interval when the model was trained with one. With explain=true, also returns the "
+    "features contributing the most to the predicted price.",
+)
+async def predict(
+    request: PredictRequest,
+    raw_request: Request,
+    explain: bool = Query(False, description="Return the top feature contributions."),
+    top_k: int = Query(5, ge=1, le=50, description="Number of contributions returned with explain=true."),
+):
+    # Body parsing and validation happen before the handler is called
+    observe_stage_since("parse_validate", raw_request.scope.get("state", {}).get("request_start"))
+
+    explanation = None
+    if explain:
+        from ml.prediction.explain import ExplanationNotSupportedError
+
+        try:
+            predicted_price, interval, explanation = explain_property(request.property, top_k)
+        except ExplanationNotSupportedError as e:
+            content = ErrorResponse(
+                success=False, error="Explanation not supported", details={"message": str(e)}
+            ).model_dump()
+            return JSONResponse(status_code=status.HTTP_501_NOT_IMPLEMENTED, content=content)
+    else:
+        predicted_price, interval = predict_property(request.property)
+
+    # Serialize here so the cost is measured, FastAPI skips it for a Response
+    with StageTimer("serialize"):
+        response = PredictResponse(
+            result=PredictionResult(
+                predicted_price=predicted_price,
+                currency=settings.CURRENCY,
+                prediction_interval=interval,
+                explanation=explanation,
+            )
+        )
+        # Optional fields are left out rather than sent as null
+        return Response(
+            content=response.model_dump_json(exclude_none=True), media_type="application/json"
+        )
+
+
+@app.post(
+    "/comparables",
+    response_model=ComparablesResponse,
+    responses={
+        422: {"model": ErrorResponse, "description": "Validation Error or unknown postal code"},
+        503: {"model": ErrorResponse, "description": "Comparables index not built yet"},
+    },
+    summary="Find comparable listings",
+    description="Returns the k scraped listings of the same property type most similar "
+    "to the property, by location, living area and number of bedrooms.",
 )
-async def predict(request: PredictRequest):
+def comparables(
+    request: PredictRequest,
+    k: int = Query(10, ge=1, le=100, description="Number of listings returned."),
+):
     property = request.property
-    ml_ready = property.to_ml_format()
-    df = pd.DataFrame([ml_ready])
-    df = preprocessing_pipeline.fit_transform(df)
-
-    base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "ml_models"))
-    model_path = os.path.join(base_dir, "model.joblib")
-    predicted_price = predict_price(df, model_path)
-
-    return PredictResponse(
-        result=PredictionResult(
-            predicted_price=predicted_price,
-            currency=settings.CURRENCY,
+    try:
+        index = model_store.get_comparables()
+    except FileNotFoundError as e:
+        content = ErrorResponse(
+            success=False, error="Comparables not available", details={"message": str(e)}
+        ).model_dump()
+        return JSONResponse(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, content=content)
+
+    lat = lon = float("nan")
+    if property.postal_code is not None:
+        with StageTimer("comparables_geo"):
+            lat, lon = model_store.get_geo_enricher().coordinates([str(property.postal_code)])[0]
+    if lat != lat:  # NaN, no postal code or missing from the georef lookup
+        content = ErrorResponse(
+            success=False,
+            error="Unknown postal code",
+            details={"postal_code": property.postal_code},
+        ).model_dump()
+        return JSONResponse(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, content=content)
+
+    with StageTimer("comparables_query"):
+        listings = index.query(
+            property.type.value,
+            lat,
+            lon,
+            property.habitable_surface,
+            property.bedroom_count,
+            k,
         )
-    )
+    return ComparablesResponse(comparables=[Comparable(**listing) for listing in listings])
 
 
 if __name__ == "__main__":
+    import uvicorn
+
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,172 @@
+"""
+Model, preprocessing pipeline and lookup tables shared by the request handlers.
+
+Everything is loaded once per process instead of once per request. When the
+app is preloaded by a pre-fork server (see gunicorn.conf.py) the loading
+happens in the parent and the workers share those pages copy-on-write. The
+model's arrays (MODEL_MMAP) and the georef lookup arrays are additionally
+memory-mapped, so even independently started workers share them through the
+page cache, and loading or hot-swapping a model takes milliseconds.
+
+scikit-learn, pandas and the ml package are only imported when the store is
+loaded, so importing the app (and answering liveness probes) stays fast.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import TYPE_CHECKING
+from app.observability import set_model_version
+from app.settings import settings
+
+if TYPE_CHECKING:
+    from sklearn.pipeline import Pipeline
+    from ml.pipelines.preprocessing.enrichers import PostalCodeEnricher
+    from ml.prediction.comparables import ComparablesIndex
+
+
+logger = logging.getLogger(__name__)
+
+
+class ModelStore:
+    """
+    Lazily loaded, process-wide serving state.
+
+    `load()` eagerly loads everything it can and logs what it cannot, so a
+    missing model or georef file still surfaces as a per-request error rather
+    than preventing the API from starting. The model file is re-stat'ed on
+    every access and reloaded when it changes, so a retrained model is picked
+    up without restarting the workers. Replace the file atomically (see
+    `ml.prediction.price_predictor.save_model`) rather than overwriting it in
+    place: a memory-mapped file truncated under a worker crashes it.
+    """
+
+    def __init__(self, model_path: str, lookup_dir: str, comparables_path: str | None = None):
+        self.model_path = model_path
+        self.lookup_dir = Path(lookup_dir)
+        self.comparables_path = comparables_path
+        self._model = None
+        self._model_mtime = None
+        self._preprocessor = None
+        self._comparables = None
+        self._comparables_mtime = None
+        self.ready = threading.Event()
+
+    def load(self) -> "ModelStore":
+        getters = [("preprocessor", self.get_preprocessor), ("model", self.get_model)]
+        if self.comparables_path:
+            getters.append(("comparables index", self.get_comparables))
+        for name, getter in getters:
+            try:
+                getter()
+            except Exception as e:
+                logger.warning(f"Could not preload {name}, will retry on first request: {e}")
+        if self._model is None:
+            set_model_version(self.model_path)
+        return self
+
+    def get_model(self):
+        try:
+            mtime = os.stat(self.model_path).st_mtime_ns
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Model file not found at '{self.model_path}'") from None
+
+        if mtime != self._model_mtime:
+            from ml.prediction.price_predictor import load_model
+
+            self._model = load_model(
+                self.model_path, mmap_mode="r" if settings.MODEL_MMAP else None
+            )
+            self._model_mtime = mtime
+            set_model_version(self.model_path)
+            logger.info(f"Loaded model from {self.model_path}")
+        return self._model
+
+    def get_comparables(self) -> ComparablesIndex:
+        """The comparable listings index, reloaded when the dataset refresh replaces it."""
+        try:
+            mtime = os.stat(self.comparables_path).st_mtime_ns
+        except (FileNotFoundError, TypeError):
+            raise FileNotFoundError(
+                f"Comparables index not found at '{self.comparables_path}'"
+            ) from None
+
+        if mtime != self._comparables_mtime:
+            from ml.prediction.comparables import ComparablesIndex
+
+            self._comparables = ComparablesIndex.load(self.comparables_path, mmap_mode="r")
+            self._comparables_mtime = mtime
+            logger.info(
+                f"Loaded {len(self._comparables)} comparable listings from {self.comparables_path}"
+            )
+        return self._comparables
+
+    def get_geo_enricher(self) -> PostalCodeEnricher:
+        """The fitted georef enricher of the preprocessing pipeline."""
+        return self.get_preprocessor().named_steps["geo"]
+
+    def get_preprocessor(self) -> Pipeline:
+        """The preprocessing pipeline with its georef enricher already fitted."""
+        if self._preprocessor is None:
+            from sklearn.base import clone
+            from ml.pipelines.preprocessing.pipeline_definitions import preprocessing_pipeline
+
+            pipeline = clone(preprocessing_pipeline)
+            pipeline.set_params(geo=self._load_geo_enricher())
+            self._preprocessor = pipeline
+        return self._preprocessor
+
+    def _load_geo_enricher(self) -> PostalCodeEnricher:
+        from ml.pipelines.preprocessing.enrichers import (
+            LAT_LON_FILE,
+            POSTAL_CODES_FILE,
+            PostalCodeEnricher,
+        )
+
+        lookup_files = (self.lookup_dir / POSTAL_CODES_FILE, self.lookup_dir / LAT_LON_FILE)
+        if not all(path.exists() for path in lookup_files):
+            # First start: build the lookup from the georef CSV and persist it
+            enricher = PostalCodeEnricher().fit(None)
+            try:
+                enricher.save(self.lookup_dir)
+            except OSError as e:
+                logger.warning(f"Could not save georef lookup to {self.lookup_dir}: {e}")
+                return enricher
+        return PostalCodeEnricher.load(self.lookup_dir, mmap_mode="r")
+
+    def warm_up(self, predict, sample) -> bool:
+        """
+        Load everything and run a dummy prediction, then mark the store ready.
+
+        Args:
+            predict: Function running the full predict path on `sample`.
+            sample: Input of the dummy prediction.
+
+        Returns:
+            bool: Whether the store is ready.
+        """
+        if self.ready.is_set():
+            return True
+        try:
+            self.load()
+            predict(sample)
+        except Exception as e:
+            logger.warning(f"Warm-up failed, not ready yet: {e}")
+            return False
+        self.ready.set()
+        logger.info("Warm-up complete, ready to serve")
+        return True
+
+    def warm_up_in_background(self, predict, sample, retry_s: float) -> None:
+        """Run `warm_up` in a daemon thread, retrying every `retry_s` seconds until it succeeds."""
+        if self.ready.is_set():
+            return
+
+        def run():
+            while not self.warm_up(predict, sample):
+                self.ready.wait(retry_s)
+
+        threading.Thread(target=run, name="model-store-warm-up", daemon=True).start()
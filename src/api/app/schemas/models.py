@@ -20,9 +20,42 @@ class PredictRequest(BaseModel):
     property: PropertyInput
 
 
+class FeatureContribution(BaseModel):
+    feature: str = Field(examples=["habitableSurface"])
+    value: float = Field(description="Feature value as seen by the model.", examples=[1.2])
+    contribution: float = Field(
+        description="Contribution of the feature to the predicted price.", examples=[42000.0]
+    )
+
+
+class Explanation(BaseModel):
+    baseline: float = Field(
+        description="Prediction before any feature contribution (intercept or bias).",
+        examples=[310000.0],
+    )
+    contributions: list[FeatureContribution] = Field(
+        description="Features with the largest absolute contributions, largest first."
+    )
+
+
+class PredictionInterval(BaseModel):
+    lower: float = Field(examples=[310000.0])
+    upper: float = Field(examples=[395000.0])
+    coverage: float = Field(
+        description="Nominal probability that the actual price falls within the interval.",
+        examples=[0.9],
+    )
+
+
 class PredictionResult(BaseModel):
     predicted_price: float = Field(..., examples=[350000.0])
     currency: str = Field("EUR", examples=["EUR"])
+    prediction_interval: Optional[PredictionInterval] = Field(
+        None, description="Only present when the served model was trained with one."
+    )
+    explanation: Optional[Explanation] = Field(
+        None, description="Only present when requested with explain=true."
+    )
 
 
 class PredictResponse(BaseModel):
@@ -30,6 +63,26 @@ class PredictResponse(BaseModel):
     result: PredictionResult
 
 
+class Comparable(BaseModel):
+    url: str = Field(examples=["https://immovlan.be/en/detail/apartment/for-sale/1000/brussels/rbd12345"])
+    locality: str = Field(examples=["Brussels"])
+    postal_code: int = Field(examples=[1000])
+    property_type: str = Field(examples=["APARTMENT"])
+    price: float = Field(examples=[345000.0])
+    living_area: float = Field(examples=[95.0])
+    bedroom_count: float = Field(examples=[2.0])
+    distance_km: float = Field(description="Distance between the postal codes.", examples=[1.4])
+    similarity_distance: float = Field(
+        description="Combined location and feature distance, lower is more similar.",
+        examples=[0.42],
+    )
+
+
+class ComparablesResponse(BaseModel):
+    success: bool = True
+    comparables: list[Comparable] = Field(description="Most similar listings first.")
+
+
 class ErrorResponse(BaseModel):
     success: bool = False
     error: str = Field(examples=["Validation error"])
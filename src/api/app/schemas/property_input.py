@@ -13,27 +13,67 @@ from app.schemas.enums import (
     EPCScore,
 )
 from app.schemas.validators import (
-    PROVINCE_POSTAL_CODE_RANGES,
-    is_postal_code_valid_in_any_province,
+    ALL_FORMATTED_RANGES,
+    PROVINCE_FORMATTED_RANGES,
     is_postal_code_valid_for_province,
+    province_for_postal_code,
 )
 
 
 # Mapping of property types to their allowed subtypes, including both specific and common subtypes.
-PROPERTY_TYPE_TO_SUBTYPES = {
-    PropertyType.APARTMENT: {
+PROPERTY_TYPE_TO_SUBTYPES: dict[PropertyType, frozenset[str]] = {
+    PropertyType.APARTMENT: frozenset({
         *(item.value for item in ApartmentSubtype),
         *(item.value for item in CommonSubtype),
-    },
-    PropertyType.HOUSE: {
+    }),
+    PropertyType.HOUSE: frozenset({
         *(item.value for item in HouseSubtype),
         *(item.value for item in CommonSubtype),
-    },
+    }),
+}
+
+# Allowed subtypes of each property type as shown in validation error messages
+PROPERTY_TYPE_ALLOWED_SUBTYPES: dict[PropertyType, str] = {
+    property_type: ", ".join(subtypes)
+    for property_type, subtypes in PROPERTY_TYPE_TO_SUBTYPES.items()
+}
+
+# Mapping of snake_case API field names to the camelCase names expected by the ML model.
+ML_FIELD_NAMES = {
+    "postal_code": "postCode",
+    "habitable_surface": "habitableSurface",
+    "terrace_surface": "terraceSurface",
+    "garden_surface": "gardenSurface",
+    "bedroom_count": "bedroomCount",
+    "bathroom_count": "bathroomCount",
+    "toilet_count": "toiletCount",
+    "epc_score": "epcScore",
+    "has_attic": "hasAttic",
+    "has_garden": "hasGarden",
+    "has_air_conditioning": "hasAirConditioning",
+    "has_armored_door": "hasArmoredDoor",
+    "has_visiophone": "hasVisiophone",
+    "has_terrace": "hasTerrace",
+    "has_office": "hasOffice",
+    "has_swimming_pool": "hasSwimmingPool",
+    "has_fireplace": "hasFireplace",
+    "has_basement": "hasBasement",
+    "has_dressing_room": "hasDressingRoom",
+    "has_dining_room": "hasDiningRoom",
+    "has_lift": "hasLift",
+    "has_heat_pump": "hasHeatPump",
+    "has_photovoltaic_panels": "hasPhotovoltaicPanels",
+    "has_living_room": "hasLivingRoom",
 }
 
 DEFAULT_APARTMENT_SUBTYPE = "APARTMENT"
 DEFAULT_HOUSE_SUBTYPE = "HOUSE"
 
+DEFAULT_SUBTYPES = {
+    PropertyType.APARTMENT: DEFAULT_APARTMENT_SUBTYPE,
+    PropertyType.HOUSE: DEFAULT_HOUSE_SUBTYPE,
+}
+
 
 class PropertyInput(BaseModel):
     """
@@ -134,11 +174,10 @@ class PropertyInput(BaseModel):
             and data.get("subtype") is None
             and data.get("type") is not None
         ):
-            property_type = data.get("type")
-            if property_type == PropertyType.APARTMENT:
-                data["subtype"] = DEFAULT_APARTMENT_SUBTYPE
-            elif property_type == PropertyType.HOUSE:
-                data["subtype"] = DEFAULT_HOUSE_SUBTYPE
+            property_type = data["type"]
+            # PropertyType is a str enum, raw strings and members hash alike
+            if isinstance(property_type, str) and property_type in DEFAULT_SUBTYPES:
+                data["subtype"] = DEFAULT_SUBTYPES[property_type]
         return data
 
     @field_validator("subtype")
@@ -150,17 +189,14 @@ class PropertyInput(BaseModel):
 
         property_type = info.data.get("type")
 
-        if property_type and v not in PROPERTY_TYPE_TO_SUBTYPES.get(property_type, []):
-            allowed_subtypes = ", ".join(
-                PROPERTY_TYPE_TO_SUBTYPES.get(property_type, [])
-            )
+        if property_type and v not in PROPERTY_TYPE_TO_SUBTYPES.get(property_type, ()):
             raise PydanticCustomError(
                 "invalid_subtype",
                 "Subtype '{subtype}' is not allowed for property type '{type}'. Allowed: {allowed}",
                 {
                     "subtype": v.value,
                     "type": property_type.value,
-                    "allowed": allowed_subtypes,
+                    "allowed": PROPERTY_TYPE_ALLOWED_SUBTYPES.get(property_type, ""),
                 },
             )
 
@@ -173,30 +209,25 @@ class PropertyInput(BaseModel):
         if v is None:
             return v
 
-        if info.data.get("province") is not None:
-            if not is_postal_code_valid_for_province(v, info.data["province"]):
-                ranges = PROVINCE_POSTAL_CODE_RANGES.get(info.data["province"]) or []
-                formatted_ranges = ", ".join(f"{r.start}-{r.stop - 1}" for r in ranges)
+        province = info.data.get("province")
+        if province is not None:
+            if not is_postal_code_valid_for_province(v, province):
                 raise PydanticCustomError(
                     "invalid_postal_code",
                     "Postal code {postal_code} is not valid for province {province}. Allowed ranges: {ranges}",
                     {
                         "postal_code": v,
-                        "province": info.data["province"].value,
-                        "ranges": formatted_ranges,
+                        "province": province.value,
+                        "ranges": PROVINCE_FORMATTED_RANGES.get(province, ""),
                     },
                 )
-        elif not is_postal_code_valid_in_any_province(v):
-            formatted_ranges = ", ".join(
-                ", ".join(f"{r.start}-{r.stop - 1}" for r in ranges) + f" ({prov})"
-                for prov, ranges in PROVINCE_POSTAL_CODE_RANGES.items()
-            )
+        elif province_for_postal_code(v) is None:
             raise PydanticCustomError(
                 "invalid_postal_code",
                 "Postal code {postal_code} is not valid. Allowed ranges: {ranges}",
                 {
                     "postal_code": v,
-                    "ranges": formatted_ranges,
+                    "ranges": ALL_FORMATTED_RANGES,
                 },
             )
 
@@ -206,42 +237,14 @@ class PropertyInput(BaseModel):
     def infer_default_province(self) -> Self:
         """Infer province from postal code."""
         if self.province is None and self.postal_code is not None:
-            for prov, ranges in PROVINCE_POSTAL_CODE_RANGES.items():
-                if any(self.postal_code in r for r in ranges):
-                    self.province = Province(prov)
-                    break
+            province = province_for_postal_code(self.postal_code)
+            if province is not None:
+                self.province = Province(province)
         return self
 
     def to_ml_format(self) -> dict:
         """
         Convert snake_case API fields to camelCase expected by the ML model.
         """
-        mapping = {
-            "postal_code": "postCode",
-            "habitable_surface": "habitableSurface",
-            "terrace_surface": "terraceSurface",
-            "garden_surface": "gardenSurface",
-            "bedroom_count": "bedroomCount",
-            "bathroom_count": "bathroomCount",
-            "toilet_count": "toiletCount",
-            "epc_score": "epcScore",
-            "has_attic": "hasAttic",
-            "has_garden": "hasGarden",
-            "has_air_conditioning": "hasAirConditioning",
-            "has_armored_door": "hasArmoredDoor",
-            "has_visiophone": "hasVisiophone",
-            "has_terrace": "hasTerrace",
-            "has_office": "hasOffice",
-            "has_swimming_pool": "hasSwimmingPool",
-            "has_fireplace": "hasFireplace",
-            "has_basement": "hasBasement",
-            "has_dressing_room": "hasDressingRoom",
-            "has_dining_room": "hasDiningRoom",
-            "has_lift": "hasLift",
-            "has_heat_pump": "hasHeatPump",
-            "has_photovoltaic_panels": "hasPhotovoltaicPanels",
-            "has_living_room": "hasLivingRoom",
-        }
-
         data = self.model_dump()
-        return {mapping.get(k, k): v for k, v in data.items()}
\ No newline at end of file
+        return {ML_FIELD_NAMES.get(k, k): v for k, v in data.items()}
@@ -18,6 +18,66 @@ PROVINCE_POSTAL_CODE_RANGES: dict[str, list[range]] = {
     "Hainaut": [range(6000, 6599), range(7000, 7999)]
 }
 
+# Belgian postal codes are four digits
+POSTAL_CODE_MIN = 1000
+POSTAL_CODE_MAX = 9999
+
+
+def _build_postal_code_table() -> tuple[str | None, ...]:
+    """
+    Build the postal code -> province lookup table.
+
+    Index `i` holds the province of postal code `POSTAL_CODE_MIN + i`, or None
+    if the code belongs to no province. When ranges overlap, the first province
+    in `PROVINCE_POSTAL_CODE_RANGES` order wins.
+    """
+    table: list[str | None] = [None] * (POSTAL_CODE_MAX - POSTAL_CODE_MIN + 1)
+    for province, ranges in PROVINCE_POSTAL_CODE_RANGES.items():
+        for r in ranges:
+            if r.start < POSTAL_CODE_MIN or r.stop - 1 > POSTAL_CODE_MAX:
+                raise ValueError(
+                    f"Postal code range {r.start}-{r.stop - 1} of {province} is outside "
+                    f"{POSTAL_CODE_MIN}-{POSTAL_CODE_MAX}"
+                )
+            for code in r:
+                if table[code - POSTAL_CODE_MIN] is None:
+                    table[code - POSTAL_CODE_MIN] = province
+    return tuple(table)
+
+
+# Lookup tables precomputed at import so validation is O(1) per request
+POSTAL_CODE_TO_PROVINCE: tuple[str | None, ...] = _build_postal_code_table()
+
+PROVINCE_POSTAL_CODES: dict[str, frozenset[int]] = {
+    province: frozenset(code for r in ranges for code in r)
+    for province, ranges in PROVINCE_POSTAL_CODE_RANGES.items()
+}
+
+# Allowed ranges as shown in validation error messages
+PROVINCE_FORMATTED_RANGES: dict[str, str] = {
+    province: ", ".join(f"{r.start}-{r.stop - 1}" for r in ranges)
+    for province, ranges in PROVINCE_POSTAL_CODE_RANGES.items()
+}
+
+ALL_FORMATTED_RANGES: str = ", ".join(
+    f"{formatted} ({province})" for province, formatted in PROVINCE_FORMATTED_RANGES.items()
+)
+
+
+def province_for_postal_code(postal_code: int) -> str | None:
+    """
+    Find the province a postal code belongs to.
+
+    Args:
+        postal_code (int): The postal code to look up.
+
+    Returns:
+        str | None: The province name, or None if the postal code is not in any province.
+    """
+    if POSTAL_CODE_MIN <= postal_code <= POSTAL_CODE_MAX:
+        return POSTAL_CODE_TO_PROVINCE[postal_code - POSTAL_CODE_MIN]
+    return None
+
 def is_postal_code_valid_in_any_province(postal_code: int) -> bool:
     """
     Check if the given postal code is valid in any Belgian province.
@@ -28,11 +88,7 @@ def is_postal_code_valid_in_any_province(postal_code: int) -> bool:
     Returns:
         bool: True if the postal code falls within any defined province range, False otherwise.
     """
-    return any(
-        postal_code in r
-        for ranges in PROVINCE_POSTAL_CODE_RANGES.values()
-        for r in ranges
-    )
+    return province_for_postal_code(postal_code) is not None
 
 def is_postal_code_valid_for_province(postal_code: int, province: str) -> bool:
     """
@@ -45,5 +101,4 @@ def is_postal_code_valid_for_province(postal_code: int, province: str) -> bool:
     Returns:
         bool: True if the postal code is valid within the specified province, False otherwise.
     """
-    ranges = PROVINCE_POSTAL_CODE_RANGES.get(province, [])
-    return any(postal_code in r for r in ranges)
\ No newline at end of file
+    return postal_code in PROVINCE_POSTAL_CODES.get(province, ())
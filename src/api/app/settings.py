@@ -5,6 +5,12 @@ class Settings(BaseSettings):
     API_VERSION: str = "1.0.0"
     API_DESCRIPTION: str = "API to predict real estate prices based on property features."
     CURRENCY: str = "EUR"
+    METRICS_ENABLED: bool = True
+    MODEL_PATH: str | None = None
+    LOOKUP_DIR: str | None = None
+    COMPARABLES_PATH: str | None = None
+    MODEL_MMAP: bool = True
+    WARM_UP_RETRY_S: float = 10.0
 
     class Config:
         env_file = ".env"
@@ -0,0 +1,133 @@
+"""
+Comparables index benchmark: build, memory-mapped load and k-NN query latency.
+
+Builds an index over synthetic listings spread over Belgian postal code
+centroids (so, like the real data, many listings share a location), saves
+it, loads it memory-mapped in this process and times single-property
+queries against the 5 ms budget. With `--index`, times the given index
+instead, e.g. the one built by the pipeline.
+
+Usage (from src/api, with src on PYTHONPATH for the ml package):
+    python -m benchmarks.comparables_benchmark --listings 1000000
+    python -m benchmarks.comparables_benchmark --index ../../ml_models/comparables.joblib
+"""
+
+import argparse
+import json
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+from datetime import datetime, timezone
+from pathlib import Path
+
+from benchmarks.predict_benchmark import RESULTS_DIR, git_commit, summarize
+
+BUDGET_MS = 5.0
+
+# Bounding box of Belgium
+LAT_RANGE = (49.5, 51.5)
+LON_RANGE = (2.55, 6.4)
+
+
+def synthetic_listings(n: int, n_locations: int = 1150, seed: int = 42) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    centroids = np.column_stack(
+        [rng.uniform(*LAT_RANGE, n_locations), rng.uniform(*LON_RANGE, n_locations)]
+    )
+    location = rng.integers(0, n_locations, n)
+    bedrooms = rng.integers(0, 6, n).astype(float)
+    bedrooms[rng.random(n) < 0.1] = np.nan
+    return pd.DataFrame(
+        {
+            "URL": [f"https://immovlan.be/en/detail/{i}" for i in range(n)],
+            "Type of property": rng.choice(["Apartment", "House", "Villa", "Duplex"], n),
+            "Locality": rng.choice(["Brussels", "Gent", "Liège", "Namur"], n),
+            "Postal Code": 1000 + location,
+            "Price": rng.lognormal(12.8, 0.5, n),
+            "Living area": rng.lognormal(4.7, 0.4, n),
+            "Number of bedrooms": bedrooms,
+            "lat": centroids[location, 0],
+            "lon": centroids[location, 1],
+        }
+    )
+
+
+def time_queries(index, n_queries: int, k: int, seed: int = 0) -> dict:
+    rng = np.random.default_rng(seed)
+    times = []
+    for _ in range(n_queries):
+        query = {
+            "property_type": rng.choice(["APARTMENT", "HOUSE"]),
+            "lat": rng.uniform(*LAT_RANGE),
+            "lon": rng.uniform(*LON_RANGE),
+            "living_area": rng.lognormal(4.7, 0.4),
+            "bedrooms": int(rng.integers(0, 6)),
+            "k": k,
+        }
+        start = time.perf_counter()
+        index.query(**query)
+        times.append(time.perf_counter() - start)
+    return {k: v for k, v in summarize(times, sum(times), 0).items() if k.endswith("_ms")}
+
+
+def rss_mb() -> float:
+    with open("/proc/self/status") as f:
+        return int(next(line for line in f if line.startswith("VmRSS")).split()[1]) / 1024
+
+
+def main() -> None:
+    from ml.prediction.comparables import ComparablesIndex
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--listings", type=int, default=1_000_000)
+    parser.add_argument("--index", type=Path, default=None, help="existing index to time")
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--output", type=Path, default=None)
+    args = parser.parse_args()
+
+    results = {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "config": {k: str(v) for k, v in vars(args).items()},
+    }
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.index
+        if path is None:
+            listings = synthetic_listings(args.listings)
+            start = time.perf_counter()
+            index = ComparablesIndex.build(listings)
+            results["build_s"] = time.perf_counter() - start
+            path = Path(tmp) / "comparables.joblib"
+            index.save(path)
+            del index, listings
+
+        rss_before = rss_mb()
+        start = time.perf_counter()
+        index = ComparablesIndex.load(path, mmap_mode="r")
+        results["load_ms"] = (time.perf_counter() - start) * 1000
+        results["load_rss_mb"] = rss_mb() - rss_before
+        results["listings"] = len(index)
+        results["index_size_mb"] = path.stat().st_size / 1e6
+        results["query"] = time_queries(index, args.queries, args.k)
+
+    output = args.output or RESULTS_DIR / f"comparables_{results['commit']}_{int(time.time())}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2))
+
+    query = results["query"]
+    print(f"{results['listings']} listings, index {results['index_size_mb']:.0f} MB")
+    if "build_s" in results:
+        print(f"build: {results['build_s']:.1f} s")
+    print(f"mmap load: {results['load_ms']:.1f} ms, +{results['load_rss_mb']:.1f} MB RSS")
+    print(
+        f"query k={args.k}: p50 {query['p50_ms']:.3f} ms, p99 {query['p99_ms']:.3f} ms "
+        f"(budget {BUDGET_MS} ms: {'ok' if query['p99_ms'] < BUDGET_MS else 'EXCEEDED'})"
+    )
+    print(f"Results saved to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,323 @@
+"""
+End-to-end pipeline benchmark, runnable offline.
+
+Serves a synthetic immovlan.be from a local HTTP server (a sitemap index,
+property sitemaps and seeded listing pages with the markup the parsers
+expect, a few of them projects, incomplete or gone), then runs the nightly
+pipeline against it in this process, stage by stage:
+
+    sitemaps    ImmovlanSitemapScraper.scrape_sitemaps
+    listings    ImmovlanListingScraper.scrape_listings, apartments then houses
+    analysis    prepare_analysis_dataset
+    training    prepare_training_dataset
+    train       RegressionTrainer.train_and_evaluate_model, on a file MLflow store
+
+and reports the wall time, peak Python memory (tracemalloc, numpy buffers
+included), peak process RSS and throughput of each stage. Everything is
+written to a temporary directory, no network or MLflow server is needed.
+
+Usage (from src/api, with src on PYTHONPATH for the ml and scrapers packages):
+    python -m benchmarks.pipeline_benchmark --listings 2000
+    python -m benchmarks.pipeline_benchmark --stages sitemaps listings analysis training
+"""
+
+import argparse
+import json
+import random
+import resource
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from multiprocessing import get_context
+from pathlib import Path
+
+from benchmarks.predict_benchmark import RESULTS_DIR, git_commit
+
+STAGES = ["sitemaps", "listings", "analysis", "training", "train"]
+
+SITEMAP_XMLNS = "http://www.sitemaps.org/schemas/sitemap/0.9"
+URLS_PER_SITEMAP = 500
+
+# Share of the listing pages that are skipped or fail, roughly as seen in production
+PROJECT_RATE = 0.03
+INCOMPLETE_RATE = 0.02
+GONE_RATE = 0.01
+
+LOCALITIES = [
+    (1000, "Brussels"), (1050, "Ixelles"), (2000, "Antwerpen"), (3000, "Leuven"),
+    (4000, "Liège"), (5000, "Namur"), (7000, "Mons"), (8000, "Brugge"), (9000, "Gent"),
+]
+STATES = ["New", "Excellent", "Good", "To renovate", "Normal"]
+HEATING = ["Gas", "Fuel oil", "Electric", "Heat pump", "Not specified"]
+YES_NO_FIELDS = [
+    "Furnished", "Terrace", "Garden", "Swimming pool", "Garage", "Bike storage", "Balcony",
+    "Cellar", "Attic", "Elevator", "Air conditioning", "Alarm", "Access for disabled",
+]
+# Rows a page has only some of the time, every parsed field still shows up in a scrape
+OPTIONAL_ROW_RATE = 0.7
+
+
+def listing_kind(listing_id: int) -> str:
+    return "appartement" if listing_id % 2 == 0 else "maison"
+
+
+def sitemap_index(base_url: str, n_listings: int) -> bytes:
+    n_sitemaps = -(-n_listings // URLS_PER_SITEMAP)
+    entries = "".join(
+        f"<sitemap><loc>{base_url}/sitemaps/fr_property-detail-{i}.xml</loc></sitemap>"
+        for i in range(n_sitemaps)
+    )
+    return f'<?xml version="1.0"?><sitemapindex xmlns="{SITEMAP_XMLNS}">{entries}</sitemapindex>'.encode()
+
+
+def property_sitemap(base_url: str, n_listings: int, sitemap: int) -> bytes:
+    ids = range(sitemap * URLS_PER_SITEMAP, min((sitemap + 1) * URLS_PER_SITEMAP, n_listings))
+    entries = "".join(
+        f"<url><loc>{base_url}/fr/detail/{listing_kind(i)}/a-vendre/{LOCALITIES[i % len(LOCALITIES)][0]}"
+        f"/locality/vbd{i:06d}</loc></url>"
+        for i in ids
+    )
+    return f'<?xml version="1.0"?><urlset xmlns="{SITEMAP_XMLNS}">{entries}</urlset>'.encode()
+
+
+def listing_page(listing_id: int, page_kb: int) -> bytes:
+    """A listing page, the same for a same id, padded with navigation markup to `page_kb`."""
+    rng = random.Random(listing_id)
+    apartment = listing_kind(listing_id) == "appartement"
+    title = "Project" if rng.random() < PROJECT_RATE else ("Apartment" if apartment else "House")
+    postal_code, locality = LOCALITIES[listing_id % len(LOCALITIES)]
+    area = int(rng.lognormvariate(4.5 if apartment else 5.0, 0.35))
+    price = int(area * rng.lognormvariate(8.0, 0.25) // 1000 * 1000)
+
+    rows = {
+        "State of the property": rng.choice(STATES),
+        "Livable surface": f"{area} m²",
+        "Number of bedrooms": str(rng.randint(0, 3) if apartment else rng.randint(2, 5)),
+        "Number of bathrooms": str(rng.randint(1, 3)),
+        "Build Year": str(rng.randint(1900, 2024)),
+        "Number of facades": str(2 if apartment else rng.randint(2, 4)),
+        "Specific primary energy consumption": f"{rng.randint(20, 450)} kWh/m²/year",
+        "Type of heating": rng.choice(HEATING),
+        "Kitchen equipment": "Fully equipped",
+        "Number of floors": str(1 if apartment else rng.randint(1, 3)),
+        "Surface terrace": f"{rng.randint(4, 40)} m²",
+        "Surface garden": f"{rng.randint(20, 1500)} m²",
+        **{field: rng.choice(["Yes", "No"]) for field in YES_NO_FIELDS},
+    }
+    if apartment:
+        rows["Floor of appartment"] = str(rng.randint(0, 8))
+    optional = [label for label in rows if label not in ("Livable surface", "Number of bedrooms")]
+    for label in optional:
+        if rng.random() > OPTIONAL_ROW_RATE:
+            del rows[label]
+    if rng.random() < INCOMPLETE_RATE:
+        del rows["Livable surface"]
+
+    data_rows = "".join(
+        f'<div class="data-row-wrapper"><div><h4>{label}</h4><p>{value}</p></div></div>'
+        for label, value in rows.items()
+    )
+    body = (
+        f'<html><head><title>{title} for sale</title></head><body>'
+        f'<h1 class="detail__header_title_main">{title} for sale</h1>'
+        f'<span class="detail__header_price_data">€ {price:,}</span>'
+        f'<p class="city-line">{postal_code} {locality}</p>'
+        f"{data_rows}"
+    )
+    item = '<li class="nav-item"><a href="/en/real-estate?page={}">Real estate {}</a></li>'
+    padding = []
+    size = len(body)
+    while size < page_kb * 1024:
+        padding.append(item.format(len(padding), len(padding)))
+        size += len(padding[-1])
+    return f"{body}<ul>{''.join(padding)}</ul></body></html>".encode()
+
+
+def serve(n_listings: int, page_kb: int, ports) -> None:
+    """Run the fake site until killed, sending the port it listens on to `ports`."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            base_url = f"http://{self.headers['Host']}"
+            path = self.path.split("?")[0]
+            content, content_type = None, "text/html"
+            if path == "/sitemap.xml":
+                content, content_type = sitemap_index(base_url, n_listings), "application/xml"
+            elif path.startswith("/sitemaps/fr_property-detail-"):
+                sitemap = int(path.rsplit("-", 1)[1].removesuffix(".xml"))
+                content, content_type = property_sitemap(base_url, n_listings, sitemap), "application/xml"
+            elif path.startswith("/en/detail/"):
+                listing_id = int(path.rsplit("/vbd", 1)[1])
+                if random.Random(-listing_id).random() >= GONE_RATE:
+                    content = listing_page(listing_id, page_kb)
+
+            if content is None:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(content)))
+            self.end_headers()
+            self.wfile.write(content)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    ports.put(server.server_address[1])
+    server.serve_forever()
+
+
+def peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class StageTimer:
+    """Wall time, peak memory and throughput of each stage."""
+
+    def __init__(self, trace_memory: bool):
+        self.trace_memory = trace_memory
+        self.stages: dict[str, dict] = {}
+        if trace_memory:
+            tracemalloc.start()
+
+    def run(self, name: str, stage, items_of=len):
+        """Run `stage()`, its result counted with `items_of` for the throughput."""
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+        start = time.perf_counter()
+        result = stage()
+        wall_s = time.perf_counter() - start
+        items = items_of(result)
+        self.stages[name] = {
+            "wall_s": wall_s,
+            "items": items,
+            "items_per_s": items / wall_s if wall_s > 0 else 0.0,
+            "peak_rss_mb": peak_rss_mb(),
+        }
+        if self.trace_memory:
+            self.stages[name]["peak_traced_mb"] = tracemalloc.get_traced_memory()[1] / 1e6
+        print(f"{name}: {wall_s:.2f} s, {items} items, {self.stages[name]['items_per_s']:.1f}/s")
+        return result
+
+
+def main() -> None:
+    import pandas as pd
+    from scrapers.immovlan_sitemap_scraper import ImmovlanSitemapScraper
+    from scrapers.immovlan_listing_scraper import ImmovlanListingScraper
+    from ml.pipelines.analysis_preprocess import prepare_analysis_dataset
+    from ml.pipelines.training_preprocess import prepare_training_dataset
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--listings", type=int, default=2000, help="listings in the sitemaps")
+    parser.add_argument("--page-kb", type=int, default=80, help="size of a listing page")
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=STAGES)
+    parser.add_argument("--no-tracemalloc", action="store_true", help="skip peak Python memory, it slows allocations down")
+    parser.add_argument("--output", type=Path, default=None)
+    args = parser.parse_args()
+
+    results = {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "config": {k: str(v) for k, v in vars(args).items()},
+    }
+
+    # Spawned, so the server's threads and allocations stay out of the measured process
+    context = get_context("spawn")
+    ports = context.Queue()
+    server = context.Process(target=serve, args=(args.listings, args.page_kb, ports), daemon=True)
+    server.start()
+    base_url = f"http://127.0.0.1:{ports.get(timeout=30)}"
+
+    timer = StageTimer(trace_memory=not args.no_tracemalloc)
+    date_str = datetime.now(timezone.utc).date()
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            data_dir = Path(tmp)
+            sitemaps_dir = data_dir / "raw" / "sitemaps"
+            sitemaps_dir.mkdir(parents=True)
+            raw_paths = {
+                kind: data_dir / "raw" / kind / f"{kind}_{date_str}.parquet"
+                for kind in ("apartments", "houses")
+            }
+            analysis_dir = data_dir / "analysis"
+            training_dir = data_dir / "training"
+
+            if "sitemaps" in args.stages:
+                sitemap_scraper = ImmovlanSitemapScraper(sitemaps_dir, base_url=base_url)
+                timer.run(
+                    "sitemaps",
+                    sitemap_scraper.scrape_sitemaps,
+                    lambda _: len(sitemap_scraper.apartments) + len(sitemap_scraper.houses),
+                )
+
+            if "listings" in args.stages:
+                listing_scraper = ImmovlanListingScraper(request_delay_s=(0, 0))
+
+                def scrape_listings():
+                    scraped = 0
+                    for kind, path in raw_paths.items():
+                        path.parent.mkdir(parents=True, exist_ok=True)
+                        scraped += listing_scraper.scrape_listings(
+                            sitemaps_dir / f"{kind}_links.txt", path, max_listings=0
+                        )
+                    return scraped
+
+                timer.run("listings", scrape_listings, lambda scraped: scraped)
+
+            if "analysis" in args.stages:
+                timer.run(
+                    "analysis",
+                    lambda: prepare_analysis_dataset(
+                        raw_paths["apartments"], raw_paths["houses"], analysis_dir
+                    ),
+                    lambda path: len(pd.read_parquet(path, columns=["URL"])),
+                )
+
+            if "training" in args.stages:
+                timer.run(
+                    "training",
+                    lambda: prepare_training_dataset(data_dir / "raw", training_dir),
+                    lambda path: len(pd.read_parquet(path, columns=["target_price"])),
+                )
+
+            if "train" in args.stages:
+                from ml.config.config import MLFlowConfig, ModelConfig
+                from ml.training.regression_trainer import RegressionTrainer
+
+                trainer = RegressionTrainer(
+                    ModelConfig(), MLFlowConfig(tracking_uri=f"file:{data_dir / 'mlruns'}")
+                )
+                training_path = training_dir / "training_dataset.parquet"
+                n_rows = len(pd.read_parquet(training_path, columns=["target_price"]))
+                timer.run(
+                    "train",
+                    lambda: trainer.train_and_evaluate_model(training_path, data_dir / "models"),
+                    lambda _: n_rows,
+                )
+    finally:
+        server.terminate()
+        server.join()
+
+    results["stages"] = timer.stages
+    results["total_wall_s"] = sum(stage["wall_s"] for stage in timer.stages.values())
+
+    output = args.output or RESULTS_DIR / f"pipeline_{results['commit']}_{int(time.time())}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2))
+
+    print(f"{'stage':<10} {'wall s':>8} {'items/s':>10} {'traced MB':>10} {'RSS MB':>8}")
+    for name, stage in timer.stages.items():
+        traced = f"{stage['peak_traced_mb']:.1f}" if "peak_traced_mb" in stage else "-"
+        print(
+            f"{name:<10} {stage['wall_s']:>8.2f} {stage['items_per_s']:>10.1f} "
+            f"{traced:>10} {stage['peak_rss_mb']:>8.0f}"
+        )
+    print(f"total: {results['total_wall_s']:.2f} s")
+    print(f"Results saved to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,307 @@
+"""
+Latency and throughput benchmark of the /predict endpoint.
+
+Drives the FastAPI app in-process through the ASGI transport and/or over a
+real uvicorn server, with the PredictRequest examples plus synthetic
+properties, and times each stage of the predict path in isolation.
+Results are written as JSON so runs can be compared across commits.
+
+Usage (from src/api, with src on PYTHONPATH for the ml package):
+    python -m benchmarks.predict_benchmark --requests 2000 --concurrency 16
+    python -m benchmarks.predict_benchmark --mode uvicorn --workers 2
+    python -m benchmarks.predict_benchmark --compare benchmarks/results/<previous>.json
+    python -m benchmarks.predict_benchmark --explain
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+import httpx
+import numpy as np
+import pandas as pd
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable
+
+API_DIR = Path(__file__).resolve().parents[1]
+SRC_DIR = API_DIR.parent
+for path in (API_DIR, SRC_DIR):
+    if str(path) not in sys.path:
+        sys.path.append(str(path))
+
+from app.schemas.enums import ApartmentSubtype, EPCScore, HouseSubtype, PropertyType  # noqa: E402
+from app.schemas.predict_request import PredictRequest  # noqa: E402
+from app.schemas.property_input import ML_FIELD_NAMES  # noqa: E402
+from app.schemas.validators import PROVINCE_POSTAL_CODE_RANGES  # noqa: E402
+
+RESULTS_DIR = API_DIR / "benchmarks" / "results"
+
+# camelCase names used by the request examples -> PropertyInput field names
+API_FIELD_NAMES = {camel: snake for snake, camel in ML_FIELD_NAMES.items()}
+
+BOOL_FIELDS = [field for field in ML_FIELD_NAMES if field.startswith("has_")]
+
+
+def example_payloads() -> list[dict]:
+    """The PredictRequest examples, with their keys mapped to the PropertyInput fields."""
+    return [
+        {
+            "property": {
+                API_FIELD_NAMES.get(key, key): value
+                for key, value in example["property"].items()
+            }
+        }
+        for example in PredictRequest.model_config["json_schema_extra"]["examples"]
+    ]
+
+
+def synthetic_payloads(n: int, seed: int = 42) -> list[dict]:
+    """Random but valid properties covering every type, province and amenity."""
+    rng = random.Random(seed)
+    subtypes = {
+        PropertyType.APARTMENT: [s.value for s in ApartmentSubtype],
+        PropertyType.HOUSE: [s.value for s in HouseSubtype],
+    }
+    payloads = []
+    for _ in range(n):
+        property_type = rng.choice(list(PropertyType))
+        province, ranges = rng.choice(list(PROVINCE_POSTAL_CODE_RANGES.items()))
+        property = {
+            "type": property_type.value,
+            "subtype": rng.choice(subtypes[property_type]),
+            "province": province,
+            "postal_code": rng.choice(rng.choice(ranges)),
+            "habitable_surface": round(rng.uniform(25, 600), 1),
+            "terrace_surface": rng.choice([0, round(rng.uniform(5, 80), 1)]),
+            "garden_surface": rng.choice([0, round(rng.uniform(20, 2000), 1)]),
+            "bedroom_count": rng.randint(0, 6),
+            "bathroom_count": rng.randint(1, 3),
+            "toilet_count": rng.randint(1, 3),
+            "epc_score": rng.choice([e.value for e in EPCScore]),
+        }
+        property.update({field: rng.random() < 0.3 for field in BOOL_FIELDS})
+        payloads.append({"property": property})
+    return payloads
+
+
+def summarize(latencies_s: list[float], wall_s: float, errors: int) -> dict:
+    """Percentiles in milliseconds, requests per second and error count."""
+    latencies_ms = np.asarray(latencies_s) * 1000
+    return {
+        "requests": len(latencies_ms),
+        "errors": errors,
+        "wall_s": wall_s,
+        "rps": len(latencies_ms) / wall_s if wall_s > 0 else 0.0,
+        "mean_ms": float(latencies_ms.mean()),
+        "p50_ms": float(np.percentile(latencies_ms, 50)),
+        "p95_ms": float(np.percentile(latencies_ms, 95)),
+        "p99_ms": float(np.percentile(latencies_ms, 99)),
+        "max_ms": float(latencies_ms.max()),
+    }
+
+
+async def drive(
+    client: httpx.AsyncClient,
+    payloads: list[dict],
+    n_requests: int,
+    concurrency: int,
+    path: str = "/predict",
+) -> dict:
+    """Send `n_requests` POST /predict with at most `concurrency` in flight."""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+    errors = 0
+
+    async def one(i: int) -> None:
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.post(path, json=payloads[i % len(payloads)])
+            latencies.append(time.perf_counter() - start)
+            if response.status_code != 200:
+                errors += 1
+
+    # Warm-up outside the measurement
+    await client.post(path, json=payloads[0])
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(n_requests)))
+    return summarize(latencies, time.perf_counter() - start, errors)
+
+
+async def bench_inprocess(
+    payloads: list[dict], n_requests: int, concurrency: int, path: str = "/predict"
+) -> dict:
+    """Drive the app through the ASGI transport, no network or server involved."""
+    from app.main import app
+
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        return await drive(client, payloads, n_requests, concurrency, path)
+
+
+async def bench_uvicorn(
+    payloads: list[dict], n_requests: int, concurrency: int, port: int, workers: int
+) -> dict:
+    """Start a real uvicorn server in a subprocess and drive it over HTTP."""
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join([str(API_DIR), str(SRC_DIR)])}
+    server = subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "app.main:app",
+            "--host", "127.0.0.1", "--port", str(port),
+            "--workers", str(workers), "--log-level", "warning",
+        ],
+        cwd=API_DIR,
+        env=env,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    limits = httpx.Limits(max_connections=concurrency)
+    try:
+        async with httpx.AsyncClient(base_url=base_url, limits=limits) as client:
+            deadline = time.monotonic() + 30
+            while True:
+                try:
+                    if (await client.get("/health")).status_code == 200:
+                        break
+                except httpx.TransportError:
+                    pass
+                if time.monotonic() > deadline:
+                    raise RuntimeError("uvicorn did not become healthy within 30s")
+                await asyncio.sleep(0.1)
+
+            return await drive(client, payloads, n_requests, concurrency)
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+
+def time_stage(fn: Callable, inputs: list, repeat: int) -> tuple[dict, list]:
+    """Time `fn` over the inputs, return latency percentiles and the outputs of the last pass."""
+    latencies = []
+    outputs = []
+    for _ in range(repeat):
+        outputs = []
+        for item in inputs:
+            start = time.perf_counter()
+            outputs.append(fn(item))
+            latencies.append(time.perf_counter() - start)
+    summary = summarize(latencies, sum(latencies), 0)
+    return {k: v for k, v in summary.items() if k.endswith("_ms")}, outputs
+
+
+def bench_stages(payloads: list[dict], repeat: int) -> dict:
+    """Per-stage breakdown of the predict path, run outside the HTTP stack."""
+    from app.main import model_store, run_preprocessing, warm_up
+    from ml.prediction.explain import ExplanationNotSupportedError, explain_prediction
+    from ml.prediction.price_predictor import predict_price, predict_price_interval
+
+    warm_up()
+    model = model_store.get_model()
+
+    stages = {}
+    stages["validation"], requests = time_stage(PredictRequest.model_validate, payloads, repeat)
+    stages["to_ml_format"], records = time_stage(
+        lambda request: request.property.to_ml_format(), requests, repeat
+    )
+    stages["dataframe"], frames = time_stage(lambda record: pd.DataFrame([record]), records, repeat)
+    stages["preprocessing"], features = time_stage(run_preprocessing, frames, repeat)
+    stages["predict_price"], _ = time_stage(
+        lambda df: predict_price(df, model=model), features, repeat
+    )
+    if hasattr(model, "predict_interval"):
+        stages["predict_price_interval"], _ = time_stage(
+            lambda df: predict_price_interval(df, model=model), features, repeat
+        )
+    try:
+        stages["predict_explain"], _ = time_stage(
+            lambda df: explain_prediction(model, df).top(5), features, repeat
+        )
+    except ExplanationNotSupportedError:
+        pass
+    return stages
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=API_DIR, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(current: dict, baseline: dict) -> None:
+    """Print the relative change of every latency/throughput figure against a baseline run."""
+    print(f"Comparing {current['commit']} against {baseline['commit']}")
+    for section in ("inprocess", "inprocess_explain", "uvicorn", "stages"):
+        for name, figures in _flatten(current.get(section)).items():
+            base = _flatten(baseline.get(section)).get(name)
+            if base is None:
+                continue
+            for key in ("p50_ms", "p95_ms", "p99_ms", "rps"):
+                if key in figures and base.get(key):
+                    change = (figures[key] - base[key]) / base[key] * 100
+                    print(f"  {section}.{name}.{key}: {base[key]:.3f} -> {figures[key]:.3f} ({change:+.1f}%)")
+
+
+def _flatten(section) -> dict:
+    if not section:
+        return {}
+    if "p50_ms" in section:
+        return {"total": section}
+    return section
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=["inprocess", "uvicorn", "all"], default="all")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--synthetic", type=int, default=200, help="number of synthetic properties")
+    parser.add_argument("--stage-repeat", type=int, default=3)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--output", type=Path, default=None)
+    parser.add_argument("--compare", type=Path, default=None, help="previous result JSON")
+    parser.add_argument("--explain", action="store_true", help="also drive /predict?explain=true")
+    args = parser.parse_args()
+
+    payloads = example_payloads() + synthetic_payloads(args.synthetic)
+
+    results = {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "config": {k: str(v) for k, v in vars(args).items()},
+        "payloads": len(payloads),
+    }
+    if args.mode in ("inprocess", "all"):
+        results["inprocess"] = asyncio.run(
+            bench_inprocess(payloads, args.requests, args.concurrency)
+        )
+        if args.explain:
+            results["inprocess_explain"] = asyncio.run(
+                bench_inprocess(payloads, args.requests, args.concurrency, "/predict?explain=true")
+            )
+    if args.mode in ("uvicorn", "all"):
+        results["uvicorn"] = asyncio.run(
+            bench_uvicorn(payloads, args.requests, args.concurrency, args.port, args.workers)
+        )
+    results["stages"] = bench_stages(payloads, args.stage_repeat)
+
+    output = args.output or RESULTS_DIR / f"predict_{results['commit']}_{int(time.time())}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2))
+    print(json.dumps(results, indent=2))
+    print(f"Results saved to {output}")
+
+    if args.compare:
+        compare(results, json.loads(args.compare.read_text()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+"""
+Per-worker memory and cold-start time of the multi-worker serving modes.
+
+Modes:
+    uvicorn           uvicorn --workers N, every worker imports the app and loads the model
+    gunicorn          gunicorn.conf.py with PRELOAD_APP=0, same per-worker loading
+    gunicorn_preload  gunicorn.conf.py defaults, loaded once in the master then forked
+
+Cold start is the time from launching the server until every worker logged
+"Application startup complete" and /ready answered 200 to a burst of
+requests spread over the workers (workers warm up in the background unless
+forked warm from a preloaded master). Memory is read from /proc/<pid>/smaps_rollup
+(Linux only) after a warm-up load: RSS counts shared pages in every worker,
+PSS splits them between the processes sharing them, so the PSS sum over the
+master and workers is the actual footprint.
+
+Usage (from src/api, with src on PYTHONPATH for the ml package):
+    python -m benchmarks.serving_benchmark --workers 4
+    python -m benchmarks.serving_benchmark --modes gunicorn_preload --workers 8
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+import httpx
+from datetime import datetime, timezone
+from pathlib import Path
+
+from benchmarks.predict_benchmark import (
+    API_DIR,
+    RESULTS_DIR,
+    SRC_DIR,
+    drive,
+    example_payloads,
+    git_commit,
+    synthetic_payloads,
+)
+
+MODES = ("uvicorn", "gunicorn", "gunicorn_preload")
+
+STARTUP_MESSAGE = "Application startup complete"
+
+SMAPS_FIELDS = ("Rss", "Pss", "Shared_Clean", "Shared_Dirty", "Private_Clean", "Private_Dirty")
+
+
+def server_command(mode: str, port: int, workers: int) -> tuple[list[str], dict]:
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join([str(API_DIR), str(SRC_DIR)])}
+    if mode == "uvicorn":
+        command = [
+            sys.executable, "-m", "uvicorn", "app.main:app",
+            "--host", "127.0.0.1", "--port", str(port),
+            "--workers", str(workers), "--log-level", "info",
+        ]
+        return command, env
+
+    env.update(
+        BIND=f"127.0.0.1:{port}",
+        WEB_CONCURRENCY=str(workers),
+        PRELOAD_APP="1" if mode == "gunicorn_preload" else "0",
+    )
+    command = [
+        sys.executable, "-m", "gunicorn", "app.main:app",
+        "-c", "gunicorn.conf.py", "--log-level", "info",
+    ]
+    return command, env
+
+
+def child_pids(pid: int) -> list[int]:
+    """Direct children of a process, from /proc."""
+    children = []
+    for task in Path(f"/proc/{pid}/task").iterdir():
+        children += [int(child) for child in (task / "children").read_text().split()]
+    return children
+
+
+def is_worker(pid: int) -> bool:
+    # uvicorn's spawned workers share the parent with multiprocessing's resource tracker
+    cmdline = Path(f"/proc/{pid}/cmdline").read_bytes()
+    return b"resource_tracker" not in cmdline
+
+
+def memory_kb(pid: int) -> dict:
+    """Memory figures of a process in kB, from /proc/<pid>/smaps_rollup."""
+    figures = {}
+    for line in Path(f"/proc/{pid}/smaps_rollup").read_text().splitlines():
+        key, _, value = line.partition(":")
+        if key in SMAPS_FIELDS:
+            figures[key] = int(value.split()[0])
+    figures["Uss"] = figures.get("Private_Clean", 0) + figures.get("Private_Dirty", 0)
+    return figures
+
+
+async def wait_until_ready(port: int, workers: int, timeout: float) -> None:
+    """Poll /ready with bursts of concurrent requests until a whole burst answers 200."""
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}") as client:
+        while time.monotonic() < deadline:
+            responses = await asyncio.gather(*(client.get("/ready") for _ in range(4 * workers)))
+            if all(response.status_code == 200 for response in responses):
+                return
+            await asyncio.sleep(0.05)
+    raise RuntimeError(f"Workers not ready after {timeout}s")
+
+
+async def warm_up(port: int, payloads: list[dict], n_requests: int, concurrency: int) -> dict:
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}") as client:
+        start = time.perf_counter()
+        await client.post("/predict", json=payloads[0])
+        first_predict_ms = (time.perf_counter() - start) * 1000
+        load = await drive(client, payloads, n_requests, concurrency)
+    return {"first_predict_ms": first_predict_ms, "load": load}
+
+
+def bench_mode(mode: str, args, payloads: list[dict]) -> dict:
+    command, env = server_command(mode, args.port, args.workers)
+    started = []
+    all_ready = threading.Event()
+
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        command, cwd=API_DIR, env=env, stderr=subprocess.PIPE, stdout=subprocess.DEVNULL, text=True
+    )
+
+    def watch_logs():
+        for line in server.stderr:
+            if STARTUP_MESSAGE in line:
+                started.append(time.perf_counter() - start)
+                if len(started) == args.workers:
+                    all_ready.set()
+
+    threading.Thread(target=watch_logs, daemon=True).start()
+
+    try:
+        deadline = time.monotonic() + args.timeout
+        while not all_ready.wait(timeout=0.1):
+            if server.poll() is not None:
+                raise RuntimeError(f"{mode}: server exited with code {server.returncode}")
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"{mode}: {len(started)}/{args.workers} workers started in {args.timeout}s")
+        asyncio.run(wait_until_ready(args.port, args.workers, args.timeout))
+        ready_s = time.perf_counter() - start
+
+        warm = asyncio.run(warm_up(args.port, payloads, args.requests, args.concurrency))
+
+        workers = [pid for pid in child_pids(server.pid) if is_worker(pid)]
+        processes = {"master": memory_kb(server.pid)}
+        processes.update({f"worker_{pid}": memory_kb(pid) for pid in workers})
+        worker_figures = [processes[f"worker_{pid}"] for pid in workers]
+
+        return {
+            "cold_start_first_worker_s": started[0],
+            "cold_start_all_workers_s": started[-1],
+            "cold_start_ready_s": ready_s,
+            **warm,
+            "processes": processes,
+            "worker_rss_mean_kb": sum(f["Rss"] for f in worker_figures) / len(worker_figures),
+            "worker_pss_mean_kb": sum(f["Pss"] for f in worker_figures) / len(worker_figures),
+            "worker_uss_mean_kb": sum(f["Uss"] for f in worker_figures) / len(worker_figures),
+            "total_pss_kb": sum(f["Pss"] for f in processes.values()),
+        }
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--requests", type=int, default=500, help="warm-up requests before measuring memory")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--output", type=Path, default=None)
+    args = parser.parse_args()
+
+    payloads = example_payloads() + synthetic_payloads(100)
+    results = {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "config": {k: str(v) for k, v in vars(args).items()},
+        "modes": {mode: bench_mode(mode, args, payloads) for mode in args.modes},
+    }
+
+    output = args.output or RESULTS_DIR / f"serving_{results['commit']}_{int(time.time())}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2))
+
+    print(f"{'mode':<18}{'cold start s':>14}{'worker RSS MB':>15}{'worker PSS MB':>15}{'worker USS MB':>15}{'total PSS MB':>14}")
+    for mode, figures in results["modes"].items():
+        print(
+            f"{mode:<18}{figures['cold_start_ready_s']:>14.2f}"
+            f"{figures['worker_rss_mean_kb'] / 1024:>15.1f}{figures['worker_pss_mean_kb'] / 1024:>15.1f}"
+            f"{figures['worker_uss_mean_kb'] / 1024:>15.1f}{figures['total_pss_kb'] / 1024:>14.1f}"
+        )
+    print(f"Results saved to {output}")
+
+
+if __name__ == "__main__":
+    main()
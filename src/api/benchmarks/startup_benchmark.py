@@ -0,0 +1,168 @@
+"""
+Model load, API startup and model hot-swap time, memory-mapped or not.
+
+Compares loading the model from an open file handle (everything read into
+memory) with `joblib.load(path, mmap_mode="r")`, on its own and as part of
+the API startup (importing app.main) and a model hot-swap, with the file
+evicted from the page cache (cold) and cached (warm). Each measurement runs
+in a fresh interpreter on a copy of the model, so the served file is never
+touched.
+
+Usage (from src/api, with src on PYTHONPATH for the ml package):
+    python -m benchmarks.startup_benchmark
+    python -m benchmarks.startup_benchmark --model ../../ml_models/<model>.pkl --repeat 5
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+from datetime import datetime, timezone
+from pathlib import Path
+
+from benchmarks.predict_benchmark import API_DIR, RESULTS_DIR, SRC_DIR, git_commit
+
+MODES = ("file_handle", "mmap")
+
+# Each script prints one JSON line, run with argv: mode, model path, cache
+LOAD_SCRIPT = """
+import gc, json, os, sys, time
+import joblib
+
+def rss_kb():
+    return int(next(l for l in open("/proc/self/status") if l.startswith("VmRSS")).split()[1])
+
+def load(mode, path):
+    if mode == "mmap":
+        return joblib.load(path, mmap_mode="r")
+    with open(path, "rb") as f:
+        return joblib.load(f)
+
+mode, path, cache = sys.argv[1:4]
+# A first load imports the model's modules, which would otherwise dominate the timing
+load(mode, path)
+gc.collect()
+if cache == "cold":
+    fd = os.open(path, os.O_RDONLY)
+    os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+    os.close(fd)
+
+rss_before = rss_kb()
+start = time.perf_counter()
+model = load(mode, path)
+load_ms = (time.perf_counter() - start) * 1000
+print(json.dumps({"load_ms": load_ms, "load_rss_kb": rss_kb() - rss_before}))
+"""
+
+STARTUP_SCRIPT = """
+import json, os, sys, time
+start = time.perf_counter()
+import app.main
+startup_ms = (time.perf_counter() - start) * 1000
+
+# Hot-swap: a new model file appears, the next request reloads it
+path = app.main.model_store.model_path
+os.utime(path, ns=(time.time_ns(), time.time_ns() + 1_000_000_000))
+start = time.perf_counter()
+app.main.model_store.get_model()
+swap_ms = (time.perf_counter() - start) * 1000
+rss_kb = int(next(l for l in open("/proc/self/status") if l.startswith("VmRSS")).split()[1])
+print(json.dumps({"startup_ms": startup_ms, "hot_swap_ms": swap_ms, "rss_kb": rss_kb}))
+"""
+
+
+def evict_from_page_cache(path: Path) -> None:
+    """Drop the file's clean pages from the OS page cache, no root needed."""
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+    finally:
+        os.close(fd)
+
+
+def run_script(script: str, mode: str, cache: str, model_path: Path, lookup_dir: Path) -> dict:
+    env = {
+        **os.environ,
+        "PYTHONPATH": os.pathsep.join([str(API_DIR), str(SRC_DIR)]),
+        "MODEL_PATH": str(model_path),
+        "LOOKUP_DIR": str(lookup_dir),
+        "MODEL_MMAP": "1" if mode == "mmap" else "0",
+    }
+    output = subprocess.run(
+        [sys.executable, "-c", script, mode, str(model_path), cache],
+        cwd=API_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def measure(script: str, mode: str, cache: str, model_path: Path, lookup_dir: Path, repeat: int) -> dict:
+    """Median of each figure over `repeat` fresh interpreters."""
+    runs = []
+    for _ in range(repeat):
+        if cache == "cold":
+            evict_from_page_cache(model_path)
+        else:
+            run_script(script, mode, cache, model_path, lookup_dir)
+        runs.append(run_script(script, mode, cache, model_path, lookup_dir))
+    return {key: float(np.median([run[key] for run in runs])) for key in runs[0]}
+
+
+def main() -> None:
+    from app.main import LOOKUP_DIR, MODEL_PATH
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", type=Path, default=Path(MODEL_PATH))
+    parser.add_argument("--lookup-dir", type=Path, default=Path(LOOKUP_DIR))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", type=Path, default=None)
+    args = parser.parse_args()
+
+    results = {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "config": {k: str(v) for k, v in vars(args).items()},
+        "model_size_bytes": args.model.stat().st_size,
+        "load": {},
+        "startup": {},
+    }
+
+    with tempfile.TemporaryDirectory() as tmp:
+        model_copy = Path(tmp) / args.model.name
+        shutil.copy(args.model, model_copy)
+        for mode in MODES:
+            for cache in ("cold", "warm"):
+                name = f"{mode}_{cache}"
+                results["load"][name] = measure(
+                    LOAD_SCRIPT, mode, cache, model_copy, args.lookup_dir, args.repeat
+                )
+                results["startup"][name] = measure(
+                    STARTUP_SCRIPT, mode, cache, model_copy, args.lookup_dir, args.repeat
+                )
+
+    output = args.output or RESULTS_DIR / f"startup_{results['commit']}_{int(time.time())}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2))
+
+    print(f"Model size: {results['model_size_bytes'] / 1e6:.1f} MB")
+    print(f"{'':<18}{'load ms':>10}{'load +RSS MB':>14}{'API startup ms':>16}{'hot swap ms':>13}{'API RSS MB':>12}")
+    for name in results["load"]:
+        load, startup = results["load"][name], results["startup"][name]
+        print(
+            f"{name:<18}{load['load_ms']:>10.1f}{load['load_rss_kb'] / 1024:>14.1f}"
+            f"{startup['startup_ms']:>16.1f}{startup['hot_swap_ms']:>13.1f}{startup['rss_kb'] / 1024:>12.1f}"
+        )
+    print(f"Results saved to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+Startup profile of the API: import time report, liveness and readiness delays.
+
+Runs `python -X importtime -c "import app.main"` in a fresh interpreter, saves
+the raw report next to the other benchmark results and lists the slowest
+imports. Heavy libraries (pandas, scikit-learn, ...) are expected to be
+imported by the warm-up only, `--fail-on-heavy` exits non-zero when one is
+imported by `app.main` itself, so the report can gate CI and be kept as an
+artifact. With `--serve`, also starts uvicorn and times the first successful
+/health (liveness) and /ready (warm-up done) responses.
+
+Usage (from src/api, with src on PYTHONPATH for the ml package):
+    python -m benchmarks.startup_profile --fail-on-heavy
+    python -m benchmarks.startup_profile --serve --top 30
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import httpx
+from datetime import datetime, timezone
+
+from benchmarks.predict_benchmark import API_DIR, RESULTS_DIR, SRC_DIR, git_commit
+
+HEAVY_MODULES = ("pandas", "sklearn", "scipy", "joblib", "xgboost", "numpy")
+
+
+def server_env() -> dict:
+    return {**os.environ, "PYTHONPATH": os.pathsep.join([str(API_DIR), str(SRC_DIR)])}
+
+
+def import_time_report() -> str:
+    """Raw `-X importtime` output of importing app.main."""
+    return subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        cwd=API_DIR,
+        env=server_env(),
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stderr
+
+
+def parse_report(report: str) -> list[dict]:
+    """Rows of the report as dicts: module, depth, self_us, cumulative_us."""
+    rows = []
+    for line in report.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append(
+            {
+                "module": name.strip(),
+                "depth": (len(name) - len(name.lstrip()) - 1) // 2,
+                "self_us": int(self_us),
+                "cumulative_us": int(cumulative_us),
+            }
+        )
+    return rows
+
+
+def time_to_endpoints(port: int, timeout: float) -> dict:
+    """Start uvicorn and time the first 200 of /health and of /ready."""
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "app.main:app",
+            "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning",
+        ],
+        cwd=API_DIR,
+        env=server_env(),
+    )
+    timings = {}
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}") as client:
+            while len(timings) < 2:
+                if server.poll() is not None:
+                    raise RuntimeError(f"uvicorn exited with code {server.returncode}")
+                if time.perf_counter() - start > timeout:
+                    raise RuntimeError(f"Not ready after {timeout}s: {timings}")
+                for endpoint in ("health", "ready"):
+                    if endpoint in timings:
+                        continue
+                    try:
+                        if client.get(f"/{endpoint}").status_code == 200:
+                            timings[endpoint] = time.perf_counter() - start
+                    except httpx.TransportError:
+                        pass
+                time.sleep(0.02)
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+    return {"liveness_s": timings["health"], "readiness_s": timings["ready"]}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--top", type=int, default=20, help="number of slowest imports to list")
+    parser.add_argument("--fail-on-heavy", action="store_true")
+    parser.add_argument("--serve", action="store_true", help="also time /health and /ready")
+    parser.add_argument("--port", type=int, default=8767)
+    parser.add_argument("--timeout", type=float, default=120)
+    args = parser.parse_args()
+
+    commit = git_commit()
+    stamp = int(time.time())
+    RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+
+    report = import_time_report()
+    report_path = RESULTS_DIR / f"importtime_{commit}_{stamp}.txt"
+    report_path.write_text(report)
+
+    rows = parse_report(report)
+    total_us = next(row["cumulative_us"] for row in rows if row["module"] == "app.main")
+    heavy = sorted({row["module"] for row in rows if row["module"].split(".")[0] in HEAVY_MODULES})
+    heavy_roots = sorted({module.split(".")[0] for module in heavy})
+
+    results = {
+        "commit": commit,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "import_app_main_ms": total_us / 1000,
+        "heavy_modules_imported": heavy_roots,
+        "slowest_imports": sorted(rows, key=lambda row: row["cumulative_us"], reverse=True)[: args.top],
+    }
+    if args.serve:
+        results.update(time_to_endpoints(args.port, args.timeout))
+
+    output = RESULTS_DIR / f"startup_profile_{commit}_{stamp}.json"
+    output.write_text(json.dumps(results, indent=2))
+
+    print(f"import app.main: {results['import_app_main_ms']:.1f} ms")
+    for row in results["slowest_imports"]:
+        print(f"  {row['cumulative_us'] / 1000:>9.1f} ms  {'  ' * row['depth']}{row['module']}")
+    if args.serve:
+        print(f"liveness (/health): {results['liveness_s']:.2f} s")
+        print(f"readiness (/ready): {results['readiness_s']:.2f} s")
+    print(f"Heavy modules imported by app.main: {', '.join(heavy_roots) or 'none'}")
+    print(f"Import time report saved to {report_path}")
+    print(f"Results saved to {output}")
+
+    if args.fail_on_heavy and heavy_roots:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Micro-benchmark of PropertyInput validation throughput.
+
+Validates valid payloads (with and without province/subtype, so the
+inference validators run) and invalid ones (so the error paths that format
+allowed values run), and times the postal code helpers on their own.
+
+Usage (from src/api):
+    python -m benchmarks.validation_benchmark --payloads 2000 --repeat 5
+    python -m benchmarks.validation_benchmark --compare benchmarks/results/<previous>.json
+"""
+
+import argparse
+import copy
+import json
+import random
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable
+from pydantic import ValidationError
+
+from benchmarks.predict_benchmark import RESULTS_DIR, git_commit, synthetic_payloads
+from app.schemas.property_input import PropertyInput
+from app.schemas.validators import (
+    is_postal_code_valid_for_province,
+    is_postal_code_valid_in_any_province,
+    province_for_postal_code,
+)
+
+
+def payload_sets(n: int, seed: int = 42) -> dict[str, list[dict]]:
+    """Property dicts exercising the different validation paths."""
+    rng = random.Random(seed)
+    valid = [payload["property"] for payload in synthetic_payloads(n, seed)]
+
+    inferred = []
+    for prop in valid:
+        prop = dict(prop)
+        prop.pop("province")
+        prop.pop("subtype")
+        inferred.append(prop)
+
+    invalid_postal_code = []
+    for prop in valid:
+        prop = dict(prop)
+        prop["postal_code"] = rng.choice([999, 5999, 6999, 10000])
+        if rng.random() < 0.5:
+            prop.pop("province")
+        invalid_postal_code.append(prop)
+
+    invalid_subtype = []
+    for prop in valid:
+        prop = dict(prop)
+        prop["subtype"] = "KOT" if prop["type"] == "HOUSE" else "VILLA"
+        invalid_subtype.append(prop)
+
+    return {
+        "valid": valid,
+        "inferred_province_subtype": inferred,
+        "invalid_postal_code": invalid_postal_code,
+        "invalid_subtype": invalid_subtype,
+    }
+
+
+def validate(prop: dict) -> None:
+    try:
+        PropertyInput.model_validate(prop)
+    except ValidationError:
+        pass
+
+
+def throughput(fn: Callable, inputs: list, repeat: int, copy_inputs: bool = False) -> dict:
+    """Best-of-`repeat` calls per second and microseconds per call."""
+    best = float("inf")
+    for _ in range(repeat):
+        # The "before" validator fills in the subtype in place, validate fresh copies
+        batch = copy.deepcopy(inputs) if copy_inputs else inputs
+        start = time.perf_counter()
+        for item in batch:
+            fn(item)
+        best = min(best, time.perf_counter() - start)
+    return {
+        "calls": len(inputs),
+        "per_s": len(inputs) / best,
+        "us_per_call": best / len(inputs) * 1e6,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--payloads", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", type=Path, default=None)
+    parser.add_argument("--compare", type=Path, default=None, help="previous result JSON")
+    args = parser.parse_args()
+
+    results = {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "config": {k: str(v) for k, v in vars(args).items()},
+        "validation": {},
+        "helpers": {},
+    }
+
+    for name, props in payload_sets(args.payloads).items():
+        results["validation"][name] = throughput(validate, props, args.repeat, copy_inputs=True)
+
+    codes = list(range(900, 10100))
+    provinces = [province_for_postal_code(code) or "Brussels" for code in codes]
+    results["helpers"]["province_for_postal_code"] = throughput(
+        province_for_postal_code, codes, args.repeat
+    )
+    results["helpers"]["is_postal_code_valid_in_any_province"] = throughput(
+        is_postal_code_valid_in_any_province, codes, args.repeat
+    )
+    results["helpers"]["is_postal_code_valid_for_province"] = throughput(
+        lambda pair: is_postal_code_valid_for_province(*pair),
+        list(zip(codes, provinces)),
+        args.repeat,
+    )
+
+    output = args.output or RESULTS_DIR / f"validation_{results['commit']}_{int(time.time())}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2))
+    for section in ("validation", "helpers"):
+        for name, figures in results[section].items():
+            print(f"{section}.{name}: {figures['per_s']:,.0f}/s ({figures['us_per_call']:.2f} us/call)")
+    print(f"Results saved to {output}")
+
+    if args.compare:
+        baseline = json.loads(args.compare.read_text())
+        print(f"Comparing {results['commit']} against {baseline['commit']}")
+        for section in ("validation", "helpers"):
+            for name, figures in results[section].items():
+                base = baseline.get(section, {}).get(name)
+                if base:
+                    change = (figures["per_s"] - base["per_s"]) / base["per_s"] * 100
+                    print(f"  {section}.{name}.per_s: {base['per_s']:,.0f} -> {figures['per_s']:,.0f} ({change:+.1f}%)")
+
+
+if __name__ == "__main__":
+    main()
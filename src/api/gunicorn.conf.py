@@ -0,0 +1,54 @@
+"""
+Gunicorn configuration: preload the app, then fork the uvicorn workers.
+
+The app module is imported and warmed up (model, preprocessing pipeline and
+georef lookup loaded, see app/model_store.py) once in the master. Workers
+are forked afterwards and share those pages copy-on-write instead of each
+unpickling its own copy.
+
+Environment:
+    WEB_CONCURRENCY: number of workers (default 2)
+    BIND: address to listen on (default 0.0.0.0:8000)
+    PRELOAD_APP: set to 0 to let every worker import the app itself
+    PROMETHEUS_MULTIPROC_DIR: where workers write their metric samples
+"""
+
+import gc
+import os
+import shutil
+
+bind = os.environ.get("BIND", "0.0.0.0:8000")
+workers = int(os.environ.get("WEB_CONCURRENCY", "2"))
+worker_class = "uvicorn_worker.UvicornWorker"
+preload_app = os.environ.get("PRELOAD_APP", "1") != "0"
+
+# Must be set before the app (and its metrics) are imported, which with
+# preload_app happens right after this file is read
+multiproc_dir = os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", "/tmp/prometheus_multiproc")
+shutil.rmtree(multiproc_dir, ignore_errors=True)
+os.makedirs(multiproc_dir, exist_ok=True)
+
+
+def when_ready(server):
+    if preload_app:
+        # Load the model and lookups and run the dummy prediction in the master,
+        # workers are then forked warm and ready (they retry if this failed)
+        from app.main import warm_up
+
+        warm_up()
+
+    # Move everything loaded so far to the permanent generation, so the
+    # collector in the workers never writes to (and un-shares) those pages
+    gc.collect()
+    gc.freeze()
+
+
+def pre_fork(server, worker):
+    # Also covers objects the master allocated since, e.g. before a respawn
+    gc.freeze()
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
@@ -1,42 +1,66 @@
-import pandas as pd
 import streamlit as st
 from pathlib import Path
+from data_loader import (
+    Filters,
+    connect,
+    filter_options,
+    has_history,
+    listing_summary,
+    load_analysis_cube,
+    price_history,
+    sample_rows,
+)
+from ml.pipelines.analysis_cubes import CUBE_FILE, HISTOGRAM_BINS, bands_from, histogram_series
+from ml.pipelines.analysis_preprocess import latest_analysis_dataset
 
 st.set_page_config(page_title="Real Estate Dashboard", layout="wide")
 
-DATA_PATH = (
-    Path(__file__).resolve().parents[3] / "data" / "analysis" / "analysis_dataset.parquet"
-)
+DATA_DIR = Path(__file__).resolve().parents[3] / "data"
+ANALYSIS_DIR = DATA_DIR / "analysis"
+CUBE_PATH = ANALYSIS_DIR / CUBE_FILE
+RAW_DIR = DATA_DIR / "raw"
 
 st.title("Real Estate Analysis Dashboard")
 
+# Full build file or latest snapshot partition, a new partition gets its own connection
+DATA_PATH = latest_analysis_dataset(ANALYSIS_DIR)
+
 if not DATA_PATH.exists():
     st.warning("Analysis dataset not found. Run the Airflow DAG to generate it.")
 else:
-    df = pd.read_parquet(DATA_PATH)
+    con = connect(str(DATA_PATH), str(RAW_DIR))
+    type_options, locality_options = filter_options(con, DATA_PATH)
 
     # Filters
     cols = st.columns(3)
-    type_sel = cols[0].selectbox(
-        "Type", options=["All"] + sorted(df["Type of property"].dropna().unique().tolist())
-    )
-    city = cols[1].selectbox(
-        "Locality", options=["All"] + sorted(df["Locality"].dropna().unique().tolist())
-    )
+    type_sel = cols[0].selectbox("Type", options=["All"] + type_options)
+    city = cols[1].selectbox("Locality", options=["All"] + locality_options)
     min_bed = cols[2].number_input("Min bedrooms", value=1, step=1)
+    filters = Filters(type_sel, city, int(min_bed))
 
-    f = df.copy()
-    if type_sel != "All":
-        f = f[f["Type of property"] == type_sel]
-    if city != "All":
-        f = f[f["Locality"] == city]
-    f = f[f["Number of bedrooms"] >= min_bed]
+    # Answer from the cube when it has the filter combination, query the rows otherwise
+    cube = load_analysis_cube(CUBE_PATH)
+    bands = bands_from(min_bed)
+    if cube is not None and bands is not None:
+        summary = cube.summary(type_sel, city, bands)
+        n_listings = summary.count
+        median = summary.median if summary.digest.count else 0
+        histogram = summary.histogram_series()
+    else:
+        summary = listing_summary(con, filters, HISTOGRAM_BINS)
+        n_listings = summary.count
+        median = summary.median if summary.histogram.sum() else 0
+        histogram = histogram_series(summary.histogram, summary.histogram_edges)
 
-    st.metric("Listings", len(f))
-    st.metric("Median price €/m²", round(f["price_per_m2"].median() if len(f) else 0))
+    st.metric("Listings", n_listings)
+    st.metric("Median price €/m²", round(median))
 
     st.subheader("Price €/m² distribution")
-    st.bar_chart(f["price_per_m2"])
+    st.bar_chart(histogram)
+
+    if has_history(con):
+        st.subheader("Median price €/m² per scrape")
+        st.line_chart(price_history(con, filters)["median_price_per_m2"])
 
     st.subheader("Sample rows")
-    st.dataframe(f.head(200))
+    st.dataframe(sample_rows(con, filters))
@@ -0,0 +1,209 @@
+"""
+Dashboard data layer: the analysis cube plus in-process DuckDB queries.
+
+Streamlit reruns the whole script on every widget interaction. Metrics and
+distributions are answered from the pre-aggregated cube, read once per file
+version: the cache is keyed by the file's content hash, itself only
+recomputed when the file's mtime or size changes. Everything that needs the
+rows (sample table, filter options, combinations the cube cannot answer,
+history over the raw scrape partitions) is a DuckDB query over the parquet
+files, with the filters, LIMIT, aggregates and histogram binning pushed
+down into the engine, so nothing is loaded into pandas beyond the results.
+"""
+
+import hashlib
+import duckdb
+import numpy as np
+import pandas as pd
+import streamlit as st
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+from ml.pipelines.analysis_cubes import AnalysisCube
+
+SAMPLE_LIMIT = 200
+# Columns shown in the sample rows table
+SAMPLE_COLUMNS = [
+    "Type of property", "Locality", "Number of bedrooms", "price_per_m2",
+    "Price", "Living area", "Postal Code", "URL",
+]
+
+
+@dataclass(frozen=True)
+class Filters:
+    """Dashboard filters, "All" disables a selectbox filter."""
+    property_type: str
+    locality: str
+    min_bedrooms: int
+
+    def where(self) -> tuple[str, list]:
+        """SQL WHERE clause and its parameters."""
+        clauses, params = ['"Number of bedrooms" >= ?'], [self.min_bedrooms]
+        if self.property_type != "All":
+            clauses.append('"Type of property" = ?')
+            params.append(self.property_type)
+        if self.locality != "All":
+            clauses.append('"Locality" = ?')
+            params.append(self.locality)
+        return " AND ".join(clauses), params
+
+
+@dataclass(frozen=True)
+class ListingSummary:
+    count: int
+    median: float
+    histogram: np.ndarray
+    histogram_edges: np.ndarray
+
+
+def _sql_string(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+
+# One in-memory database per process, only holding views: the parquet files
+# are scanned in place by each query, so a new dataset version is picked up
+@st.cache_resource(show_spinner=False, max_entries=2)
+def connect(data_path: str, raw_dir: str) -> duckdb.DuckDBPyConnection:
+    con = duckdb.connect()
+    # file_row_number keeps the file order for the sample rows, like a head() would
+    con.execute(
+        "CREATE VIEW listings AS SELECT * FROM "
+        f"read_parquet({_sql_string(data_path)}, file_row_number = true)"
+    )
+
+    # Every scrape partition, data/raw/<apartments|houses>/<kind>_<YYYY-MM-DD>.parquet
+    raw_glob = str(Path(raw_dir) / "*" / "*.parquet")
+    if any(Path(raw_dir).glob("*/*.parquet")):
+        con.execute(
+            f"""
+            CREATE VIEW raw_listings AS
+            SELECT
+                *,
+                TRY_CAST(regexp_extract(filename, '(\\d{{4}}-\\d{{2}}-\\d{{2}})', 1) AS DATE) AS scrape_date
+            FROM read_parquet({_sql_string(raw_glob)}, union_by_name = true, filename = true)
+            """
+        )
+    return con
+
+
+def _cursor(con: duckdb.DuckDBPyConnection) -> duckdb.DuckDBPyConnection:
+    # The connection is shared by the session threads, each query gets its own cursor
+    return con.cursor()
+
+
+def has_history(con: duckdb.DuckDBPyConnection) -> bool:
+    tables = _cursor(con).execute("SELECT view_name FROM duckdb_views()").fetchall()
+    return ("raw_listings",) in tables
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def dataset_hash(path: str, mtime_ns: int, size: int) -> str:
+    """Content hash of a file, cached per (path, mtime, size)."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _content_hash(path: Path) -> str:
+    stat = path.stat()
+    return dataset_hash(str(path), stat.st_mtime_ns, stat.st_size)
+
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def _filter_options(_con: duckdb.DuckDBPyConnection, content_hash: str) -> tuple[list, list]:
+    cursor = _cursor(_con)
+    options = []
+    for column in ("Type of property", "Locality"):
+        rows = cursor.execute(
+            f'SELECT DISTINCT "{column}" FROM listings WHERE "{column}" IS NOT NULL ORDER BY 1'
+        ).fetchall()
+        options.append([str(row[0]) for row in rows])
+    return options[0], options[1]
+
+
+def filter_options(con: duckdb.DuckDBPyConnection, data_path: Path) -> tuple[list, list]:
+    """Sorted property types and localities, recomputed only when the dataset changes."""
+    return _filter_options(con, _content_hash(data_path))
+
+
+def sample_rows(
+    con: duckdb.DuckDBPyConnection, filters: Filters, limit: int = SAMPLE_LIMIT
+) -> pd.DataFrame:
+    """First `limit` listings matching the filters, in file order."""
+    where, params = filters.where()
+    cursor = _cursor(con)
+    # Older datasets lack some of the columns, only the ones present are selected
+    available = {row[0] for row in cursor.execute("DESCRIBE listings").fetchall()}
+    columns = ", ".join(f'"{column}"' for column in SAMPLE_COLUMNS if column in available)
+    return cursor.execute(
+        f"SELECT {columns} FROM listings WHERE {where} ORDER BY file_row_number LIMIT ?",
+        params + [limit],
+    ).df()
+
+
+def listing_summary(con: duckdb.DuckDBPyConnection, filters: Filters, bins: int) -> ListingSummary:
+    """Count, median and histogram of price_per_m2 of the listings matching the filters."""
+    where, params = filters.where()
+    cursor = _cursor(con)
+    count, median, low, high = cursor.execute(
+        f"""
+        SELECT count(*), median(price_per_m2), min(price_per_m2), max(price_per_m2)
+        FROM listings WHERE {where}
+        """,
+        params,
+    ).fetchone()
+
+    histogram = np.zeros(bins, dtype=np.int64)
+    if low is None:
+        return ListingSummary(count, np.nan, histogram, np.linspace(0.0, 1.0, bins + 1))
+
+    # Same bins as numpy.histogram: equal width over [min, max], the last one closed
+    width = (high - low) / bins or 1.0
+    rows = cursor.execute(
+        f"""
+        SELECT least(CAST(floor((price_per_m2 - ?) / ?) AS INTEGER), ?) AS bin, count(*)
+        FROM listings WHERE {where} AND price_per_m2 IS NOT NULL
+        GROUP BY bin
+        """,
+        [low, width, bins - 1] + params,
+    ).fetchall()
+    for bin_index, bin_count in rows:
+        histogram[bin_index] = bin_count
+    return ListingSummary(count, median, histogram, np.linspace(low, low + width * bins, bins + 1))
+
+
+def price_history(con: duckdb.DuckDBPyConnection, filters: Filters) -> pd.DataFrame:
+    """Listings and median price per m² of every scrape date in the raw partitions."""
+    where, params = filters.where()
+    return (
+        _cursor(con)
+        .execute(
+            f"""
+            SELECT
+                scrape_date,
+                count(*) AS listings,
+                median("Price" / NULLIF("Living area", 0)) AS median_price_per_m2
+            FROM raw_listings
+            WHERE {where} AND scrape_date IS NOT NULL
+            GROUP BY scrape_date
+            ORDER BY scrape_date
+            """,
+            params,
+        )
+        .df()
+        .set_index("scrape_date")
+    )
+
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def _load_analysis_cube(path: str, content_hash: str) -> AnalysisCube:
+    return AnalysisCube.load(path)
+
+
+def load_analysis_cube(path: Path) -> Optional[AnalysisCube]:
+    """Load the analysis cube at `path`, re-reading it only when its content changed."""
+    if not path.exists():
+        return None
+    return _load_analysis_cube(str(path), _content_hash(path))
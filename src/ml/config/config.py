@@ -3,7 +3,7 @@
 import os
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Tuple
 
 
 @dataclass
@@ -17,6 +17,17 @@ class MLFlowConfig:
         "http://mlflow:5001" if os.path.exists("/.dockerenv") else "http://localhost:5001",
     )
 
+    # Lightweight logging: params, metrics and tags are queued and sent by a
+    # background thread, the run end waits for them
+    async_logging: bool = False
+    log_input_example: bool = True
+    # Register the model in the validation gate once it passes, not at every training run
+    defer_registration: bool = False
+    # Runs are logged to this local file store when the tracking server does not
+    # answer its health check, and synced later, see ml/utils/experiments.py
+    local_fallback_dir: Optional[Path] = None
+    health_check_timeout_s: float = 5.0
+
 
 @dataclass
 class ModelConfig:
@@ -25,6 +36,68 @@ class ModelConfig:
     l1_ratio: float = 0.5
     random_state: int = 42
     test_size: float = 0.2
+    cv_folds: int = 5
+    n_jobs: int = -1  # joblib workers for CV and search, -1 uses all cores
+
+    # What to do with the CV fold models: "refit" (extra full fit), "best_fold"
+    # (keep the best scoring fold model) or "ensemble" (average all fold models).
+    # Only "refit" applies with a search_strategy
+    cv_reuse: str = "refit"
+    signature_sample_size: int = 100  # rows used to infer the MLFlow model signature
+
+    # Prediction interval served with each prediction: None, "conformal" (residual
+    # quantiles on the test split) or "quantile" (lower/upper quantile models,
+    # gradient-boosted backends only, falls back to conformal otherwise)
+    prediction_interval: Optional[str] = None
+    interval_coverage: float = 0.9
+
+    # Warm start from the previous nightly model, falling back to a full retrain
+    # on schema changes, drift or when too many rows changed
+    warm_start: bool = False
+    warm_start_iter: int = 50  # extra boosting rounds, fitted on the full training set
+    warm_start_max_new_fraction: float = 0.3
+    warm_start_scaler_rtol: float = 0.05
+    # The warm started model is kept only if its MAE on the test rows neither it nor the
+    # previous model trained on is at most this much (relative) above the previous model's
+    warm_start_mae_tolerance: float = 0.01
+    warm_start_min_check_rows: int = 30
+
+    # Model backend: "elasticnet", "hist_gb" or "xgboost"
+    backend: str = "elasticnet"
+    n_threads: Optional[int] = None  # threads inside a single fit, None lets the backend decide
+
+    # Gradient-boosted backends
+    learning_rate: float = 0.1
+    max_iter: int = 500
+    max_depth: Optional[int] = 6
+    early_stopping: bool = True
+    early_stopping_rounds: int = 20
+    validation_fraction: float = 0.1
+
+    # Hyperparameter search: None (fixed hyperparameters), "grid", "halving" or
+    # "path" (ElasticNetCV regularization paths, elasticnet backend only)
+    search_strategy: Optional[str] = None
+    alpha_grid: Tuple[float, ...] = (0.001, 0.01, 0.1, 1.0, 10.0)
+    l1_ratio_grid: Tuple[float, ...] = (0.1, 0.5, 0.7, 0.9, 0.95, 1.0)
+    learning_rate_grid: Tuple[float, ...] = (0.03, 0.1, 0.3)
+    max_depth_grid: Tuple[Optional[int], ...] = (4, 6, 8)
+
+
+@dataclass
+class ValidationConfig:
+    """Thresholds of the model validation gate."""
+    min_r2: float = 0.7  # on the metrics logged by the trainer
+    max_mae: float = 50000
+    # Allowed regressions against the production model, on the rows neither model trained on
+    r2_tolerance: float = 0.0  # absolute R² drop
+    mae_tolerance: float = 0.0  # relative MAE increase
+    min_holdout_rows: int = 200  # fewer unseen rows and the models are not compared
+    # p95 single-row latency may exceed production's by the larger of the relative
+    # tolerance and the absolute floor, both models timed alternately over the rounds
+    latency_tolerance: float = 0.1
+    latency_floor_ms: float = 0.5
+    latency_rounds: int = 5
+    production_alias: str = "production"
 
 
 @dataclass
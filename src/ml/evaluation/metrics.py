@@ -0,0 +1,16 @@
+"""Regression metrics shared by the trainer and the validation gate."""
+
+import numpy as np
+import pandas as pd
+from sklearn.metrics import mean_absolute_error, r2_score, mean_squared_error
+
+
+def regression_metrics(y_true: pd.Series, y_pred: np.ndarray) -> dict:
+    """Compute MAE, RMSE, R² and MAPE."""
+    return {
+        "mae": mean_absolute_error(y_true, y_pred),
+        "rmse": np.sqrt(mean_squared_error(y_true, y_pred)),
+        "r2": r2_score(y_true, y_pred),
+        "mape": np.mean(np.abs((y_true - y_pred) / y_true))
+        * 100,  # Mean Absolute Percentage Error
+    }
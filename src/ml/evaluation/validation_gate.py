@@ -0,0 +1,329 @@
+"""Model validation gate deciding whether a trained model gets promoted."""
+
+import json
+import pickle
+import tracemalloc
+import joblib
+import mlflow
+import mlflow.sklearn as mlflow_sklearn
+import numpy as np
+import pandas as pd
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional, Tuple
+from mlflow import MlflowClient
+from ml.config.config import MLFlowConfig, ValidationConfig
+from ml.evaluation.metrics import regression_metrics
+from ml.pipelines.training_preprocess import (
+    RAW_ROWS_FILE,
+    ROW_HASHES_FILE,
+    TARGET_COLUMN,
+    transform_features,
+)
+from ml.utils.benchmarking import measure_inference_latency
+from ml.utils.experiments import resolve_tracking_uri
+from utils.logging_utils import setup_logger
+
+
+@dataclass
+class GateResult:
+    """Outcome of the validation gate."""
+    passed: bool
+    candidate: dict
+    production: Optional[dict] = None
+    failures: list[str] = field(default_factory=list)
+    logged: dict = field(default_factory=dict)
+    comparison_skipped: Optional[str] = None
+    promotion_skipped: Optional[str] = None
+
+
+@dataclass
+class SavedModel:
+    """A model with the preprocessor and training row hashes saved next to it, if any."""
+    name: str
+    model: object
+    preprocessor: Optional[object] = None
+    row_hashes: Optional[np.ndarray] = None
+
+
+class ModelValidationGate:
+    """
+    Validate a candidate model before promoting it to production.
+
+    The candidate's logged metrics are read from MLFlow, or from the metadata
+    JSON the trainer writes next to the saved model when MLFlow is unreachable,
+    and checked against the absolute thresholds. The candidate and the current
+    production model are then compared on the rows of tonight's dataset that
+    neither of them trained on, each transforming the raw rows with its own
+    preprocessor, and timed alternately for inference latency. The candidate
+    is promoted only if it meets the thresholds and does not regress on
+    accuracy or latency. When the models cannot be compared fairly (no saved
+    row hashes or preprocessor, too few unseen rows) only the thresholds apply.
+    """
+
+    def __init__(
+        self,
+        models_dir: Path,
+        config: Optional[ValidationConfig] = None,
+        mlflow_config: Optional[MLFlowConfig] = None,
+    ):
+        self.models_dir = models_dir
+        self.config = config or ValidationConfig()
+        self.mlflow_config = mlflow_config or MLFlowConfig()
+        self.logger = setup_logger(__name__)
+
+        # Same store as the trainer: the local fallback one while the server is unreachable
+        self.tracking_uri = resolve_tracking_uri(self.mlflow_config)
+        mlflow.set_tracking_uri(self.tracking_uri)
+        self.client = MlflowClient()
+
+    def find_local_model(self, run_id: str) -> Tuple[Optional[Path], Optional[dict]]:
+        """Find the saved model and metadata written by the trainer for a run."""
+        for metadata_path in sorted(self.models_dir.glob("*.json"), reverse=True):
+            metadata = json.loads(metadata_path.read_text())
+            if metadata.get("run_id") == run_id:
+                return metadata_path.with_suffix(".pkl"), metadata
+        return None, None
+
+    def load_run_metrics(self, run_id: str) -> dict:
+        """Read the metrics of a run from MLFlow, falling back to the local metadata JSON."""
+        try:
+            return dict(self.client.get_run(run_id).data.metrics)
+        except Exception as e:
+            self.logger.warning(f"Could not read metrics of run {run_id} from MLFlow: {e}")
+
+        _, metadata = self.find_local_model(run_id)
+        if metadata is None:
+            raise FileNotFoundError(f"No metrics found for run {run_id}")
+        return metadata["metrics"]
+
+    def load_saved_model(self, model_path: Path) -> SavedModel:
+        """Load a model saved by the trainer with its `<stem>_preprocessor.joblib` and `<stem>_rows.npy`."""
+        preprocessor_path = model_path.parent / f"{model_path.stem}_preprocessor.joblib"
+        rows_path = model_path.parent / f"{model_path.stem}_rows.npy"
+        return SavedModel(
+            name=model_path.name,
+            model=joblib.load(model_path),
+            preprocessor=joblib.load(preprocessor_path) if preprocessor_path.exists() else None,
+            row_hashes=np.load(rows_path) if rows_path.exists() else None,
+        )
+
+    def load_holdout(
+        self, data_path: Path, models: list[SavedModel]
+    ) -> Tuple[Optional[pd.DataFrame], Optional[str]]:
+        """
+        Raw rows of the dataset next to `data_path` that none of `models` trained
+        on, or None with the reason they cannot be selected.
+
+        Listings stay online for many nights, so a split of tonight's dataset
+        holds rows an older model trained on; rows are told apart by the raw
+        row hashes the trainer saved with each model.
+        """
+        raw_path = data_path.parent / RAW_ROWS_FILE
+        hashes_path = data_path.parent / ROW_HASHES_FILE
+        if not raw_path.exists() or not hashes_path.exists():
+            return None, f"no raw rows or row hashes next to {data_path}"
+
+        hashes = np.load(hashes_path)
+        seen = np.zeros(len(hashes), dtype=bool)
+        for saved in models:
+            if saved.row_hashes is None:
+                return None, f"no training row hashes saved with {saved.name}"
+            if saved.preprocessor is None:
+                return None, f"no preprocessor saved with {saved.name}"
+            seen |= np.isin(hashes, saved.row_hashes)
+
+        n_unseen = int((~seen).sum())
+        if n_unseen < self.config.min_holdout_rows:
+            return None, (
+                f"only {n_unseen} rows unseen by {', '.join(m.name for m in models)} "
+                f"(< {self.config.min_holdout_rows})"
+            )
+        return pd.read_parquet(raw_path)[~seen], None
+
+    def load_production_model(self) -> Optional[SavedModel]:
+        """Load the model currently aliased as production, or None if there is none."""
+        try:
+            version = self.client.get_model_version_by_alias(
+                self.mlflow_config.registered_model_name, self.config.production_alias
+            )
+        except Exception:
+            self.logger.info("No production model registered yet")
+            return None
+
+        # Prefer the local copy, it needs no artifact download and has the sidecars
+        model_path, _ = self.find_local_model(version.run_id)
+        if model_path is not None and model_path.exists():
+            return self.load_saved_model(model_path)
+
+        return SavedModel(
+            name=f"{version.name} version {version.version}",
+            model=mlflow_sklearn.load_model(
+                f"models:/{self.mlflow_config.registered_model_name}@{self.config.production_alias}"
+            ),
+        )
+
+    def model_inputs(self, saved: SavedModel, holdout: pd.DataFrame) -> pd.DataFrame:
+        """The holdout rows as the model's features, through its own preprocessor."""
+        X = transform_features(saved.preprocessor, holdout.drop(columns=[TARGET_COLUMN]))
+        # Columns the preprocessor yields but the model was not fitted on are dropped
+        if hasattr(saved.model, "feature_names_in_"):
+            X = X.reindex(columns=saved.model.feature_names_in_, fill_value=0.0)
+        return X
+
+    def benchmark_model(self, model, X: pd.DataFrame, y: pd.Series) -> dict:
+        """Accuracy and memory footprint of a model on the held-out set."""
+        tracemalloc.start()
+        y_pred = model.predict(X)
+        _, peak_bytes = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        results = {name: float(value) for name, value in regression_metrics(y, y_pred).items()}
+        results["model_size_bytes"] = float(len(pickle.dumps(model)))
+        results["predict_peak_memory_bytes"] = float(peak_bytes)
+        return results
+
+    def benchmark_latency(self, models: dict[str, Tuple[object, pd.DataFrame]]) -> dict[str, dict]:
+        """
+        Median over `latency_rounds` of each latency metric, the models being
+        timed one after the other in every round so they share the worker's load.
+        """
+        rounds: dict[str, list[dict]] = {name: [] for name in models}
+        for _ in range(self.config.latency_rounds):
+            for name, (model, X) in models.items():
+                rounds[name].append(measure_inference_latency(model, X))
+        return {
+            name: {key: float(np.median([r[key] for r in results])) for key in results[0]}
+            for name, results in rounds.items()
+        }
+
+    def compare(
+        self, logged: dict, candidate: Optional[dict], production: Optional[dict]
+    ) -> list[str]:
+        """Return the reasons the candidate fails the gate, empty if it passes."""
+        failures = []
+
+        if logged["r2"] < self.config.min_r2:
+            failures.append(f"R² {logged['r2']:.3f} < {self.config.min_r2}")
+        if logged["mae"] > self.config.max_mae:
+            failures.append(f"MAE {logged['mae']:.2f} > {self.config.max_mae}")
+
+        if candidate is None or production is None:
+            return failures
+
+        if candidate["r2"] < production["r2"] - self.config.r2_tolerance:
+            failures.append(
+                f"R² regressed: {candidate['r2']:.3f} < production {production['r2']:.3f}"
+            )
+        if candidate["mae"] > production["mae"] * (1 + self.config.mae_tolerance):
+            failures.append(
+                f"MAE regressed: {candidate['mae']:.2f} > production {production['mae']:.2f}"
+            )
+        production_p95 = production["predict_single_p95_ms"]
+        latency_limit = max(
+            production_p95 * (1 + self.config.latency_tolerance),
+            production_p95 + self.config.latency_floor_ms,
+        )
+        if candidate["predict_single_p95_ms"] > latency_limit:
+            failures.append(
+                f"p95 latency regressed: {candidate['predict_single_p95_ms']:.3f}ms "
+                f"> production {production_p95:.3f}ms"
+            )
+
+        return failures
+
+    def promote(self, run_id: str) -> None:
+        """
+        Point the production alias at the model version registered by the run,
+        registering the run's model first if the trainer deferred it.
+        """
+        versions = self.client.search_model_versions(f"run_id='{run_id}'")
+        if versions:
+            version = max(versions, key=lambda v: int(v.version))
+        else:
+            _, metadata = self.find_local_model(run_id)
+            model_uri = (metadata or {}).get("model_uri")
+            if model_uri is None:
+                raise RuntimeError(f"No registered model version found for run {run_id}")
+            version = mlflow.register_model(model_uri, self.mlflow_config.registered_model_name)
+            self.logger.info(f"Registered {version.name} version {version.version} from {model_uri}")
+
+        self.client.set_registered_model_alias(
+            self.mlflow_config.registered_model_name,
+            self.config.production_alias,
+            version.version,
+        )
+        self.logger.info(
+            f"Promoted {version.name} version {version.version} to {self.config.production_alias}"
+        )
+
+    def validate(self, run_id: str, data_path: Path, promote: bool = True) -> GateResult:
+        """Run the gate for a training run and promote the model if it passes."""
+        logged = self.load_run_metrics(run_id)
+        self.logger.info(f"Logged metrics of run {run_id}: {logged}")
+
+        model_path, _ = self.find_local_model(run_id)
+        if model_path is None or not model_path.exists():
+            raise FileNotFoundError(f"No saved model found for run {run_id} in {self.models_dir}")
+        candidate_model = self.load_saved_model(model_path)
+        production_model = self.load_production_model()
+
+        models = {"candidate": candidate_model}
+        if production_model is not None:
+            models["production"] = production_model
+        holdout, skipped = self.load_holdout(data_path, list(models.values()))
+
+        benchmarks: dict[str, dict] = {}
+        if holdout is not None:
+            y = holdout[TARGET_COLUMN]
+            inputs = {
+                name: (saved.model, self.model_inputs(saved, holdout))
+                for name, saved in models.items()
+            }
+            latencies = self.benchmark_latency(inputs)
+            for name, (model, X) in inputs.items():
+                benchmarks[name] = {**self.benchmark_model(model, X, y), **latencies[name]}
+            self.logger.info(f"Compared on {len(holdout)} rows unseen by {list(models)}")
+        elif production_model is not None:
+            self.logger.warning(f"Not comparing with production, {skipped}")
+        else:
+            self.logger.info(f"No candidate benchmark, {skipped}")
+
+        candidate = benchmarks.get("candidate")
+        production = benchmarks.get("production")
+        failures = self.compare(logged, candidate, production)
+        result = GateResult(
+            passed=not failures,
+            candidate=candidate or logged,
+            production=production,
+            failures=failures,
+            logged=logged,
+            comparison_skipped=skipped if production_model is not None else None,
+        )
+
+        try:
+            with mlflow.start_run(run_id=run_id):
+                if candidate is not None:
+                    mlflow.log_metrics({f"gate_{name}": value for name, value in candidate.items()})
+                if production is not None:
+                    mlflow.log_metrics(
+                        {f"gate_production_{name}": value for name, value in production.items()}
+                    )
+                mlflow.set_tag("validation_gate", "passed" if result.passed else "failed")
+                if result.comparison_skipped:
+                    mlflow.set_tag("validation_gate_comparison_skipped", result.comparison_skipped)
+        except Exception as e:
+            self.logger.warning(f"Could not log gate results to MLFlow: {e}")
+
+        if result.passed and promote:
+            if self.tracking_uri != self.mlflow_config.tracking_uri:
+                # The registry is on the server, the run gets there with sync_local_runs
+                result.promotion_skipped = (
+                    f"run {run_id} is on the local fallback store {self.tracking_uri}, "
+                    "not promoted until synced to the tracking server"
+                )
+                self.logger.warning(f"Promotion skipped: {result.promotion_skipped}")
+            else:
+                self.promote(run_id)
+
+        return result
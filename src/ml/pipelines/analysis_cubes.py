@@ -0,0 +1,207 @@
+"""
+Pre-aggregated summaries of the analysis dataset.
+
+The analysis cube holds one cell per property type × locality × bedroom band,
+plus the cells where the type, the locality or both are rolled up to "All".
+Each cell has the listing count, quantiles and a t-digest of price_per_m2
+and a histogram over bin edges shared by the whole cube. Digests and
+histograms merge, so any set of bedroom bands is answered from at most one
+cell per band instead of scanning the rows.
+"""
+
+import json
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+from ml.utils.sketches import TDigest
+
+
+CUBE_FILE = "analysis_cube.parquet"
+
+ALL = "All"
+BEDROOM_BANDS = ["0", "1", "2", "3", "4", "5+"]
+UNKNOWN_BAND = "unknown"
+DIMENSIONS = ["property_type", "locality", "bedroom_band"]
+CUBE_QUANTILES = (0.1, 0.25, 0.5, 0.75, 0.9)
+HISTOGRAM_BINS = 40
+COMPRESSION = 100.0
+
+_METADATA_KEY = b"analysis_cube"
+
+
+def bedroom_bands(bedrooms: pd.Series) -> pd.Series:
+    """Bedroom band of each listing: "0" to "4", "5+", or "unknown"."""
+    bedrooms = pd.to_numeric(bedrooms, errors="coerce")
+    band = np.clip(np.floor(bedrooms.fillna(0)), 0, len(BEDROOM_BANDS) - 1).astype(int)
+    labels = np.asarray(BEDROOM_BANDS, dtype=object)[band]
+    return pd.Series(np.where(bedrooms.isna(), UNKNOWN_BAND, labels), index=bedrooms.index)
+
+
+def bands_from(min_bedrooms: float) -> Optional[list[str]]:
+    """
+    Bands of the listings with at least `min_bedrooms` bedrooms, None when
+    the bands cannot tell (above the last, open-ended band).
+    """
+    first = max(int(np.ceil(min_bedrooms)), 0)
+    if first >= len(BEDROOM_BANDS):
+        return None
+    return BEDROOM_BANDS[first:]
+
+
+def build_analysis_cube(df: pd.DataFrame) -> tuple[pd.DataFrame, np.ndarray]:
+    """
+    Build the cube cells of the analysis dataset.
+
+    Args:
+        df: Analysis dataset with "Type of property", "Locality",
+            "Number of bedrooms" and "price_per_m2" columns.
+
+    Returns:
+        The cells, one row per (property_type, locality, bedroom_band) with
+        "All" for rolled-up dimensions, and the histogram bin edges.
+    """
+    values = pd.to_numeric(df["price_per_m2"], errors="coerce").to_numpy(np.float64)
+    known = ~np.isnan(values)
+    if known.any():
+        edges = np.linspace(values[known].min(), values[known].max(), HISTOGRAM_BINS + 1)
+    else:
+        edges = np.linspace(0.0, 1.0, HISTOGRAM_BINS + 1)
+    bins = np.clip(np.searchsorted(edges, values, side="right") - 1, 0, HISTOGRAM_BINS - 1)
+
+    frame = pd.DataFrame(
+        {
+            "property_type": df["Type of property"].astype(object),
+            "locality": df["Locality"].astype(object),
+            "bedroom_band": bedroom_bands(df["Number of bedrooms"]).to_numpy(),
+        }
+    )
+
+    cells = []
+    for rolled_up in ([], ["locality"], ["property_type"], ["property_type", "locality"]):
+        keys = [dimension for dimension in DIMENSIONS if dimension not in rolled_up]
+        for key, rows in frame.groupby(keys, dropna=False, sort=False).indices.items():
+            key = dict(zip(keys, key if isinstance(key, tuple) else (key,)))
+            rows_known = rows[known[rows]]
+            digest = TDigest.from_values(values[rows_known], COMPRESSION)
+            cell = {
+                dimension: ALL if dimension in rolled_up else _label(key[dimension])
+                for dimension in DIMENSIONS
+            }
+            cell.update(
+                {
+                    "count": len(rows),
+                    "price_count": len(rows_known),
+                    **{
+                        f"p{round(q * 100)}": value
+                        for q, value in zip(CUBE_QUANTILES, digest.quantiles(CUBE_QUANTILES))
+                    },
+                    "digest_means": digest.means,
+                    "digest_weights": digest.weights,
+                    "digest_min": digest.min_value,
+                    "digest_max": digest.max_value,
+                    "histogram": np.bincount(bins[rows_known], minlength=HISTOGRAM_BINS),
+                }
+            )
+            cells.append(cell)
+
+    return pd.DataFrame(cells), edges
+
+
+def _label(value) -> Optional[str]:
+    return None if pd.isna(value) else str(value)
+
+
+def save_analysis_cube(cells: pd.DataFrame, edges: np.ndarray, path: Path) -> Path:
+    """Write the cells to parquet, the histogram edges in the file metadata."""
+    table = pa.Table.from_pandas(cells, preserve_index=False)
+    metadata = {
+        **(table.schema.metadata or {}),
+        _METADATA_KEY: json.dumps(
+            {"histogram_edges": edges.tolist(), "compression": COMPRESSION}
+        ).encode(),
+    }
+    pq.write_table(table.replace_schema_metadata(metadata), path)
+    return path
+
+
+@dataclass
+class CubeSummary:
+    """Aggregates of price_per_m2 over a set of cube cells."""
+    count: int
+    digest: TDigest
+    histogram: np.ndarray
+    histogram_edges: np.ndarray
+
+    @property
+    def median(self) -> float:
+        return self.digest.quantile(0.5)
+
+    def histogram_series(self) -> pd.Series:
+        return histogram_series(self.histogram, self.histogram_edges)
+
+
+def histogram_series(counts: np.ndarray, edges: np.ndarray) -> pd.Series:
+    """Histogram counts indexed by the rounded lower edge of their bin."""
+    return pd.Series(counts, index=pd.Index(np.round(edges[:-1]).astype(int), name="price_per_m2"))
+
+
+class AnalysisCube:
+    """
+    Cube cells indexed by (property_type, locality, bedroom_band) for O(1) lookups.
+
+    Args:
+        cells: Cells built by `build_analysis_cube`.
+        histogram_edges: Bin edges shared by every cell's histogram.
+    """
+
+    def __init__(self, cells: pd.DataFrame, histogram_edges: np.ndarray):
+        self.cells = cells
+        self.histogram_edges = np.asarray(histogram_edges, dtype=np.float64)
+        self._positions = {
+            key: position
+            for position, key in enumerate(
+                zip(cells["property_type"], cells["locality"], cells["bedroom_band"])
+            )
+        }
+
+    @classmethod
+    def load(cls, path: Path) -> "AnalysisCube":
+        table = pq.read_table(path)
+        metadata = json.loads(table.schema.metadata[_METADATA_KEY])
+        return cls(table.to_pandas(), np.asarray(metadata["histogram_edges"]))
+
+    def summary(
+        self, property_type: str = ALL, locality: str = ALL, bands: Optional[list[str]] = None
+    ) -> CubeSummary:
+        """
+        Aggregates of the listings of a type and locality ("All" for any) in
+        the given bedroom bands (None for every band, unknown included).
+        """
+        if bands is None:
+            bands = BEDROOM_BANDS + [UNKNOWN_BAND]
+        positions = [
+            self._positions[key]
+            for key in ((property_type, locality, band) for band in bands)
+            if key in self._positions
+        ]
+        cells = self.cells.iloc[positions]
+
+        digests = [
+            TDigest(COMPRESSION, means, weights, min_value, max_value)
+            for means, weights, min_value, max_value in zip(
+                cells["digest_means"], cells["digest_weights"], cells["digest_min"], cells["digest_max"]
+            )
+        ]
+        histogram = np.zeros(HISTOGRAM_BINS, dtype=np.int64)
+        for counts in cells["histogram"]:
+            histogram += counts
+        return CubeSummary(
+            count=int(cells["count"].sum()),
+            digest=digests[0] if len(digests) == 1 else TDigest.merge_all(digests, COMPRESSION),
+            histogram=histogram,
+            histogram_edges=self.histogram_edges,
+        )
@@ -1,11 +1,47 @@
+import json
+import os
+import re
+import tempfile
 import pandas as pd
 from pathlib import Path
+from ml.pipelines.analysis_cubes import CUBE_FILE, build_analysis_cube, save_analysis_cube
+from ml.utils.sketches import TDigest
+
+
+ANALYSIS_DATASET_FILE = "analysis_dataset.parquet"
+# Incremental mode: one partition per scrape snapshot, plus the state of the build
+PARTITIONED_DATASET_DIR = "analysis_dataset"
+PARTITION_FILE = "part-0.parquet"
+STATE_FILE = "analysis_state.json"
+
+SNAPSHOT_KINDS = ("apartments", "houses")
+CLIP_QUANTILES = (0.01, 0.99)
+SKETCH_COMPRESSION = 200.0
+
+_SNAPSHOT_DATE = re.compile(r"(\d{4}-\d{2}-\d{2})")
+
+
+def _with_price_per_m2(df: pd.DataFrame) -> pd.DataFrame:
+    # Analysis-focused cleaning: keep human-friendly fields, derive a few KPIs
+    price_per_m2 = df["Price"] / df["Living area"].replace(0, pd.NA)
+    # A zero area leaves pd.NA in an object column, the sketches and the cube need floats
+    df["price_per_m2"] = pd.to_numeric(price_per_m2, errors="coerce").astype("float64")
+
+    # Optional: map postal_code to province here if available
+    # df["province"] = df["postal_code"].map(...)
+    return df
 
 
 def prepare_analysis_dataset(
     apartment_data_path: Path, house_data_path: Path, out_dir: Path
 ) -> Path:
-    """Build analysis dataset from raw apartment and house data."""
+    """
+    Build analysis dataset from raw apartment and house data.
+
+    The pre-aggregated analysis cube the dashboard answers from is written
+    next to it, see ml/pipelines/analysis_cubes.py. See
+    `update_analysis_dataset` for the incremental, partitioned build.
+    """
     frames = []
     frames.append(pd.read_parquet(apartment_data_path))
     frames.append(pd.read_parquet(house_data_path))
@@ -13,22 +49,149 @@ def prepare_analysis_dataset(
     if not frames:
         raise RuntimeError("No raw data found to build analysis dataset")
 
-    df = pd.concat(frames, ignore_index=True)
-
-    # Analysis-focused cleaning: keep human-friendly fields, derive a few KPIs
-    df["price_per_m2"] = df["Price"] / df["Living area"].replace(0, pd.NA)
+    df = _with_price_per_m2(pd.concat(frames, ignore_index=True))
 
     # Simple winsorization to reduce outliers impact on dashboard
     df["price_per_m2"] = df["price_per_m2"].clip(
-        lower=df["price_per_m2"].quantile(0.01), upper=df["price_per_m2"].quantile(0.99)
+        lower=df["price_per_m2"].quantile(CLIP_QUANTILES[0]),
+        upper=df["price_per_m2"].quantile(CLIP_QUANTILES[1]),
     )
 
-    # Optional: map postal_code to province here if available
-    # df["province"] = df["postal_code"].map(...)
-
     out_dir.mkdir(parents=True, exist_ok=True)
-    out_file = out_dir / "analysis_dataset.parquet"
+    out_file = out_dir / ANALYSIS_DATASET_FILE
 
     df.to_parquet(out_file, index=False)
 
+    # Summary tables by type × locality × bedroom band
+    save_analysis_cube(*build_analysis_cube(df), out_dir / CUBE_FILE)
+
     return out_file
+
+
+def raw_snapshots(raw_dir: Path) -> dict[str, list[Path]]:
+    """
+    Raw scrape files grouped by snapshot date, from the
+    <raw_dir>/<apartments|houses>/<kind>_<YYYY-MM-DD>.parquet files.
+    """
+    snapshots: dict[str, list[Path]] = {}
+    for kind in SNAPSHOT_KINDS:
+        for path in sorted((raw_dir / kind).glob("*.parquet")):
+            match = _SNAPSHOT_DATE.search(path.stem)
+            if match:
+                snapshots.setdefault(match.group(1), []).append(path)
+    return snapshots
+
+
+def partition_path(out_dir: Path, snapshot_date: str) -> Path:
+    return out_dir / PARTITIONED_DATASET_DIR / f"snapshot_date={snapshot_date}" / PARTITION_FILE
+
+
+def update_analysis_dataset(raw_dir: Path, out_dir: Path) -> Path:
+    """
+    Incrementally build the partitioned analysis dataset.
+
+    Only the raw snapshots not processed yet (or whose files changed since)
+    are read, each one written to its own partition,
+    <out_dir>/analysis_dataset/snapshot_date=<YYYY-MM-DD>/part-0.parquet.
+    price_per_m2 is winsorized at the 1%/99% quantiles of every snapshot so
+    far, taken from the t-digests of the snapshots kept in the build state
+    instead of rescanning the history, so the nightly cost is proportional
+    to the new data. Partitions written on earlier nights keep the clip
+    bounds of their night, recorded in the state; `prepare_analysis_dataset`
+    is the full rebuild.
+
+    The analysis cube is rebuilt from the latest snapshot, like the full build.
+
+    Args:
+        raw_dir: Directory containing 'apartments' and 'houses' subdirectories
+        out_dir: Directory of the partitioned dataset, its state and the cube
+
+    Returns:
+        Path of the latest snapshot partition.
+    """
+    snapshots = raw_snapshots(raw_dir)
+    if not snapshots:
+        raise RuntimeError("No raw data found to build analysis dataset")
+
+    state_path = out_dir / STATE_FILE
+    state = json.loads(state_path.read_text()) if state_path.exists() else {"partitions": {}}
+    partitions = state["partitions"]
+
+    updated = []
+    for snapshot_date, files in sorted(snapshots.items()):
+        inputs = [[path.name, path.stat().st_mtime_ns, path.stat().st_size] for path in files]
+        if partitions.get(snapshot_date, {}).get("inputs") == inputs:
+            continue
+
+        df = _with_price_per_m2(pd.concat([pd.read_parquet(path) for path in files], ignore_index=True))
+        digest = TDigest.from_values(df["price_per_m2"], SKETCH_COMPRESSION)
+
+        # A changed snapshot replaces its previous digest instead of being counted twice
+        running = TDigest.merge_all(
+            [digest]
+            + [_digest(entry["digest"]) for date, entry in partitions.items() if date != snapshot_date],
+            SKETCH_COMPRESSION,
+        )
+        lower, upper = (float(bound) for bound in running.quantiles(CLIP_QUANTILES))
+        df["price_per_m2"] = df["price_per_m2"].clip(lower=lower, upper=upper)
+
+        _write_parquet(df, partition_path(out_dir, snapshot_date))
+        partitions[snapshot_date] = {
+            "inputs": inputs,
+            "rows": len(df),
+            "clip_bounds": [lower, upper],
+            "digest": {
+                "means": digest.means.tolist(),
+                "weights": digest.weights.tolist(),
+                "min": float(digest.min_value),
+                "max": float(digest.max_value),
+            },
+        }
+        # Saved after every partition so a failed night resumes where it stopped
+        _write_text(json.dumps(state), state_path)
+        updated.append(snapshot_date)
+
+    latest = partition_path(out_dir, max(partitions))
+    if max(partitions) in updated or not (out_dir / CUBE_FILE).exists():
+        save_analysis_cube(*build_analysis_cube(pd.read_parquet(latest)), out_dir / CUBE_FILE)
+
+    return latest
+
+
+def latest_analysis_dataset(out_dir: Path) -> Path:
+    """
+    The most recently written analysis dataset: the full build's file or the
+    latest snapshot partition of the incremental build.
+    """
+    candidates = [out_dir / ANALYSIS_DATASET_FILE]
+    dataset_dir = out_dir / PARTITIONED_DATASET_DIR
+    if dataset_dir.exists():
+        candidates += sorted(dataset_dir.glob(f"snapshot_date=*/{PARTITION_FILE}"))[-1:]
+    existing = [path for path in candidates if path.exists()]
+    if not existing:
+        return candidates[0]
+    return max(existing, key=lambda path: path.stat().st_mtime_ns)
+
+
+def _digest(entry: dict) -> TDigest:
+    return TDigest(SKETCH_COMPRESSION, entry["means"], entry["weights"], entry["min"], entry["max"])
+
+
+def _write_parquet(df: pd.DataFrame, path: Path) -> None:
+    # Written next to the target then renamed, readers never see a partial partition
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    os.close(fd)
+    try:
+        df.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def _write_text(text: str, path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    tmp_path.write_text(text)
+    os.replace(tmp_path, path)
@@ -0,0 +1,274 @@
+"""
+Consolidated listing store across the nightly scrape snapshots.
+
+The raw data is one apartments_<date>.parquet / houses_<date>.parquet file
+per night, with the same listings showing up night after night. The store
+is an embedded SQLite database keyed by listing URL: each snapshot is
+upserted in one transaction, keeping the latest attributes of every listing
+with the dates it was first and last seen, and a price history row whenever
+a listing appears or its price changes.
+
+    listings        one row per URL, the latest scraped fields plus
+                    kind, first_seen and last_seen
+    price_history   (URL, changed_on, price), primary key on (URL, changed_on)
+    snapshots       the ingested raw files with their mtime and size, so
+                    ingestion is idempotent and a re-scraped night is
+                    upserted again
+"""
+
+import sqlite3
+import pandas as pd
+from pathlib import Path
+from typing import Optional
+from ml.pipelines.analysis_preprocess import raw_snapshots
+from utils.logging_utils import setup_logger
+
+
+LISTING_STORE_FILE = "listings.sqlite"
+
+KEY_COLUMN = "URL"
+PRICE_COLUMN = "Price"
+METADATA_COLUMNS = ["kind", "first_seen", "last_seen"]
+
+logger = setup_logger(__name__)
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _sql_values(df: pd.DataFrame) -> list[tuple]:
+    # sqlite3 only binds Python scalars: numpy integers and pandas NA are converted
+    columns = [
+        df[column].astype(object).where(df[column].notna(), None).tolist() for column in df.columns
+    ]
+    return list(zip(*columns))
+
+
+class ListingStore:
+    """
+    SQLite store of every scraped listing, keyed by URL.
+
+    Args:
+        path: Database file, created with its tables if missing.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(self.path)
+        # WAL lets readers query the store while a snapshot is upserted
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(
+            f"""
+            CREATE TABLE IF NOT EXISTS listings (
+                {_quote(KEY_COLUMN)} TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                first_seen TEXT NOT NULL,
+                last_seen TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS listings_last_seen ON listings (kind, last_seen);
+            CREATE TABLE IF NOT EXISTS price_history (
+                {_quote(KEY_COLUMN)} TEXT NOT NULL,
+                changed_on TEXT NOT NULL,
+                price REAL,
+                PRIMARY KEY ({_quote(KEY_COLUMN)}, changed_on)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS snapshots (
+                file TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                snapshot_date TEXT NOT NULL,
+                rows INTEGER NOT NULL,
+                mtime_ns INTEGER,
+                size INTEGER
+            );
+            """
+        )
+        # Stores created before the file stats were recorded
+        snapshot_columns = {
+            row[1] for row in self.connection.execute("PRAGMA table_info(snapshots)").fetchall()
+        }
+        with self.connection:
+            for column in ("mtime_ns", "size"):
+                if column not in snapshot_columns:
+                    self.connection.execute(f"ALTER TABLE snapshots ADD COLUMN {column} INTEGER")
+
+    def __enter__(self) -> "ListingStore":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def _listing_columns(self) -> list[str]:
+        rows = self.connection.execute("PRAGMA table_info(listings)").fetchall()
+        return [row[1] for row in rows if row[1] not in METADATA_COLUMNS]
+
+    def upsert_snapshot(self, df: pd.DataFrame, snapshot_date: str, kind: str) -> dict:
+        """
+        Upsert the listings of one snapshot.
+
+        Listings are updated only by snapshots at least as recent as their
+        last_seen date, so the nights must be ingested in date order for
+        the price history to be exact (`ingest` does).
+
+        Args:
+            df: Raw scraped listings, with a "URL" column.
+            snapshot_date: Scrape date, YYYY-MM-DD.
+            kind: "apartments" or "houses".
+
+        Returns:
+            Counts of new, price-changed and upserted listings.
+        """
+        df = df.dropna(subset=[KEY_COLUMN]).drop_duplicates(subset=[KEY_COLUMN], keep="last")
+        columns = [KEY_COLUMN] + [column for column in df.columns if column != KEY_COLUMN]
+        df = df[columns]
+
+        with self.connection:
+            # New scraped fields become new nullable columns
+            existing = set(self._listing_columns())
+            for column in columns:
+                if column not in existing:
+                    self.connection.execute(f"ALTER TABLE listings ADD COLUMN {_quote(column)}")
+
+            quoted = [_quote(column) for column in columns]
+            self.connection.execute("DROP TABLE IF EXISTS temp.staging")
+            self.connection.execute(f"CREATE TEMP TABLE staging ({', '.join(quoted)})")
+            self.connection.executemany(
+                f"INSERT INTO temp.staging VALUES ({', '.join('?' * len(columns))})", _sql_values(df)
+            )
+
+            key, price = _quote(KEY_COLUMN), _quote(PRICE_COLUMN)
+            has_price = PRICE_COLUMN in columns
+            new, changed = self.connection.execute(
+                f"""
+                SELECT
+                    count(*) FILTER (WHERE l.{key} IS NULL),
+                    count(*) FILTER (WHERE l.{key} IS NOT NULL AND l.{price} IS NOT s.{price})
+                FROM temp.staging s LEFT JOIN listings l ON l.{key} = s.{key}
+                WHERE l.{key} IS NULL OR l.last_seen <= ?
+                """
+                if has_price
+                else f"""
+                SELECT count(*) FILTER (WHERE l.{key} IS NULL), 0
+                FROM temp.staging s LEFT JOIN listings l ON l.{key} = s.{key}
+                """,
+                [snapshot_date] if has_price else [],
+            ).fetchone()
+
+            if has_price:
+                # History first: it compares with the prices the upsert overwrites
+                self.connection.execute(
+                    f"""
+                    INSERT OR REPLACE INTO price_history ({key}, changed_on, price)
+                    SELECT s.{key}, ?, s.{price}
+                    FROM temp.staging s LEFT JOIN listings l ON l.{key} = s.{key}
+                    WHERE l.{key} IS NULL OR (l.last_seen <= ? AND l.{price} IS NOT s.{price})
+                    """,
+                    [snapshot_date, snapshot_date],
+                )
+
+            updates = ", ".join(f"{column} = excluded.{column}" for column in quoted[1:])
+            self.connection.execute(
+                f"""
+                INSERT INTO listings ({', '.join(quoted)}, kind, first_seen, last_seen)
+                SELECT *, ?, ?, ? FROM temp.staging WHERE true
+                ON CONFLICT ({key}) DO UPDATE SET
+                    {updates + ',' if updates else ''}
+                    kind = excluded.kind,
+                    last_seen = excluded.last_seen
+                WHERE listings.last_seen <= excluded.last_seen
+                """,
+                [kind, snapshot_date, snapshot_date],
+            )
+            self.connection.execute(
+                "UPDATE listings SET first_seen = ? WHERE first_seen > ? AND "
+                f"{key} IN (SELECT {key} FROM temp.staging)",
+                [snapshot_date, snapshot_date],
+            )
+            self.connection.execute("DROP TABLE temp.staging")
+
+        return {"new": new, "price_changed": changed, "upserted": len(df)}
+
+    def ingest(self, raw_dir: Path) -> list[Path]:
+        """
+        Upsert the raw snapshot files not ingested yet or changed since, oldest first.
+
+        A file counts as changed when its mtime or size differs from the ingested
+        one, e.g. a night scraped again. Its listings are upserted again: those
+        not seen since get the new fields, listings dropped from the new file
+        keep that night as their last_seen.
+
+        Args:
+            raw_dir: Directory containing 'apartments' and 'houses' subdirectories
+
+        Returns:
+            The ingested files.
+        """
+        ingested = {
+            row[0]: (row[1], row[2])
+            for row in self.connection.execute("SELECT file, mtime_ns, size FROM snapshots")
+        }
+        files = []
+        for snapshot_date, paths in sorted(raw_snapshots(raw_dir).items()):
+            for path in paths:
+                stat = path.stat()
+                file_stats = (stat.st_mtime_ns, stat.st_size)
+                if ingested.get(path.name) == file_stats:
+                    continue
+                if ingested.get(path.name) == (None, None):
+                    # Ingested before the stats were recorded, taken as unchanged
+                    with self.connection:
+                        self.connection.execute(
+                            "UPDATE snapshots SET mtime_ns = ?, size = ? WHERE file = ?",
+                            [*file_stats, path.name],
+                        )
+                    continue
+                kind = path.parent.name
+                df = pd.read_parquet(path)
+                counts = self.upsert_snapshot(df, snapshot_date, kind)
+                with self.connection:
+                    self.connection.execute(
+                        "INSERT OR REPLACE INTO snapshots "
+                        "(file, kind, snapshot_date, rows, mtime_ns, size) VALUES (?, ?, ?, ?, ?, ?)",
+                        [path.name, kind, snapshot_date, len(df), *file_stats],
+                    )
+                logger.info(
+                    f"Ingested {path.name}: {counts['upserted']} listings, "
+                    f"{counts['new']} new, {counts['price_changed']} price changes"
+                )
+                files.append(path)
+        return files
+
+    def current_listings(self, kind: Optional[str] = None, with_metadata: bool = False) -> pd.DataFrame:
+        """
+        Listings of the latest snapshot of their kind, the ones still online.
+
+        Without metadata the columns are the raw scraped fields, so the
+        result stands in for the latest raw files.
+        """
+        columns = [_quote(column) for column in self._listing_columns()]
+        if with_metadata:
+            columns += METADATA_COLUMNS
+        query = f"""
+            SELECT {', '.join('listings.' + column for column in columns)}
+            FROM (SELECT kind, max(snapshot_date) AS latest FROM snapshots GROUP BY kind) latest
+            JOIN listings ON listings.kind = latest.kind AND listings.last_seen = latest.latest
+        """
+        params = []
+        if kind is not None:
+            query += " WHERE latest.kind = ?"
+            params.append(kind)
+        return pd.read_sql_query(query, self.connection, params=params)
+
+    def listing_history(self, url: str) -> pd.DataFrame:
+        """Price of a listing each time it appeared or changed, indexed by date."""
+        return pd.read_sql_query(
+            f"SELECT changed_on, price FROM price_history WHERE {_quote(KEY_COLUMN)} = ? ORDER BY changed_on",
+            self.connection,
+            params=[url],
+            index_col="changed_on",
+        )
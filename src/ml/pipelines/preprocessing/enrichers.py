@@ -1,16 +1,27 @@
+import numpy as np
 import pandas as pd
 from importlib import resources
+from pathlib import Path
 from sklearn.base import BaseEstimator, TransformerMixin
 
 
+POSTAL_CODES_FILE = "georef_postal_codes.npy"
+LAT_LON_FILE = "georef_lat_lon.npy"
+
+
 class PostalCodeEnricher(BaseEstimator, TransformerMixin):
     """
     Transformer that enriches a DataFrame with latitude and longitude columns
     based on postal codes using a reference CSV.
+
+    The reference is kept as two NumPy arrays, the sorted postal codes and their
+    (lat, lon) pairs, so a fitted enricher can be saved to .npy files and loaded
+    memory-mapped, sharing the pages between serving processes.
     """
 
     def __init__(self):
-        self._geo_df_unique = None
+        self._postal_codes = None
+        self._lat_lon = None
 
     def fit(self, X, y=None):
         # Load and preprocess georef CSV once during fitting
@@ -22,18 +33,51 @@ class PostalCodeEnricher(BaseEstimator, TransformerMixin):
         geo_df["lon"] = geo_df["lon"].astype(float)
         geo_df["postCode"] = geo_df["Post code"].astype(str)
 
-        self._geo_df_unique = geo_df.drop_duplicates(subset=["postCode"])
+        # First occurrence of each postal code wins, sorted for binary search
+        geo_df_unique = geo_df.drop_duplicates(subset=["postCode"]).sort_values("postCode")
+        self._postal_codes = geo_df_unique["postCode"].to_numpy(dtype=str)
+        self._lat_lon = geo_df_unique[["lat", "lon"]].to_numpy(dtype=np.float64)
 
         return self
 
+    def coordinates(self, postal_codes) -> np.ndarray:
+        """(lat, lon) of each postal code, NaN for unknown postal codes."""
+        assert self._postal_codes is not None, "fit() must be called before coordinates()"
+
+        codes = np.asarray(postal_codes, dtype=str)
+        positions = np.searchsorted(self._postal_codes, codes)
+        positions = np.minimum(positions, len(self._postal_codes) - 1)
+        found = self._postal_codes[positions] == codes
+        return np.where(found[:, None], self._lat_lon[positions], np.nan)
+
     def transform(self, X):
-        assert self._geo_df_unique is not None, "fit() must be called before transform()"
-        
+        assert self._postal_codes is not None, "fit() must be called before transform()"
+
         df = X.copy()
         df["postCode"] = df["postCode"].astype(str)
 
-        return df.merge(
-            self._geo_df_unique[["postCode", "lat", "lon"]],
-            on="postCode",
-            how="left"
-        )
\ No newline at end of file
+        # Left join on postCode: unknown postal codes get NaN coordinates
+        lat_lon = self.coordinates(df["postCode"])
+
+        # Same fresh RangeIndex as the merge this replaces
+        df = df.reset_index(drop=True)
+        df["lat"] = lat_lon[:, 0]
+        df["lon"] = lat_lon[:, 1]
+        return df
+
+    def save(self, directory: Path) -> None:
+        """Save the fitted lookup arrays as .npy files in `directory`."""
+        assert self._postal_codes is not None, "fit() must be called before save()"
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        np.save(directory / POSTAL_CODES_FILE, self._postal_codes)
+        np.save(directory / LAT_LON_FILE, self._lat_lon)
+
+    @classmethod
+    def load(cls, directory: Path, mmap_mode: str | None = "r") -> "PostalCodeEnricher":
+        """Load a fitted enricher from the .npy files written by `save`, memory-mapped by default."""
+        directory = Path(directory)
+        enricher = cls()
+        enricher._postal_codes = np.load(directory / POSTAL_CODES_FILE, mmap_mode=mmap_mode)
+        enricher._lat_lon = np.load(directory / LAT_LON_FILE, mmap_mode=mmap_mode)
+        return enricher
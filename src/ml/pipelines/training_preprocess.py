@@ -2,15 +2,20 @@ import pandas as pd
 import numpy as np
 import joblib
 from pathlib import Path
+from typing import Optional
 from sklearn.impute import SimpleImputer
 from sklearn.compose import ColumnTransformer
 from sklearn.preprocessing import OneHotEncoder, StandardScaler
 from sklearn.pipeline import Pipeline
 from utils.logging_utils import setup_logger
+from ml.pipelines.listing_store import ListingStore
 
 
 TRAINING_DATASET_FILE = "training_dataset.parquet"
 PREPROCESSOR_FILE = "preprocessor.joblib"
+ROW_HASHES_FILE = "training_row_hashes.npy"
+RAW_ROWS_FILE = "training_raw_rows.parquet"
+TARGET_COLUMN = "Price"
 
 logger = setup_logger(__name__)
 
@@ -56,15 +61,49 @@ def _assemble_dataframe(raw_dir: Path) -> pd.DataFrame:
     return combined_df
 
 
-def prepare_training_dataset(raw_dir: Path, out_dir: Path) -> Path:
+def transform_features(preprocessor: ColumnTransformer, X: pd.DataFrame) -> pd.DataFrame:
+    """
+    Transform raw rows with a fitted preprocessor into the training features,
+    named as in the training dataset. Raw columns the preprocessor was not
+    fitted on are dropped, missing ones are treated as missing values.
+    """
+    X = X.reindex(columns=preprocessor.feature_names_in_)
+    X_transformed = preprocessor.transform(X)
+
+    # Ensure we have a dense array
+    if hasattr(X_transformed, "toarray"):
+        X_transformed = getattr(X_transformed, "toarray")()
+
+    return pd.DataFrame(np.asarray(X_transformed), columns=_feature_names(preprocessor))
+
+
+def _feature_names(preprocessor: ColumnTransformer) -> list[str]:
+    # In output order, without the numeric columns the imputer dropped for being all missing
+    names = []
+    for _, transformer, columns in preprocessor.transformers_:
+        if transformer != "drop" and len(columns):
+            names += list(transformer.get_feature_names_out())
+    return names
+
+
+def prepare_training_dataset(
+    raw_dir: Path, out_dir: Path, listing_store_path: Optional[Path] = None
+) -> Path:
     """
     Prepare and preprocess the training dataset for later use by a trainer.
 
     Args:
         raw_dir: Directory containing raw data files
         out_dir: Directory to save the processed dataset
+        listing_store_path: Listing store to take the current listings from,
+            deduplicated by URL, instead of the latest raw files
     """
-    df = _assemble_dataframe(raw_dir)
+    if listing_store_path is not None:
+        with ListingStore(listing_store_path) as store:
+            df = store.current_listings()
+        logger.info(f"Loaded {len(df)} current listings from {listing_store_path}")
+    else:
+        df = _assemble_dataframe(raw_dir)
 
     # Drop rows with missing critical fields
     df = df.dropna(subset=["Price", "Living area", "Postal Code"])
@@ -75,8 +114,8 @@ def prepare_training_dataset(raw_dir: Path, out_dir: Path) -> Path:
         )
 
     # Define features and target
-    y = df["Price"]
-    X = df.drop(columns=["Price"])
+    y = df[TARGET_COLUMN]
+    X = df.drop(columns=[TARGET_COLUMN])
 
     # Identify column types
     numeric_cols = [col for col in X.columns if X[col].dtype != "object"]
@@ -115,13 +154,10 @@ def prepare_training_dataset(raw_dir: Path, out_dir: Path) -> Path:
     X_transformed = np.asarray(X_transformed)
 
     # Get feature names for the transformed data
-    numeric_feature_names = numeric_cols
-    categorical_feature_names = list(
-        preprocessor.named_transformers_["categorical"].get_feature_names_out(
-            categorical_cols
-        )
-    )
-    all_feature_names = numeric_feature_names + categorical_feature_names
+    all_feature_names = _feature_names(preprocessor)
+    categorical_feature_names = all_feature_names[
+        len(preprocessor.named_transformers_["numeric"].get_feature_names_out()):
+    ]
 
     # Create final dataframe with transformed features and target
     processed_df = pd.DataFrame(X_transformed, columns=all_feature_names)
@@ -138,10 +174,19 @@ def prepare_training_dataset(raw_dir: Path, out_dir: Path) -> Path:
     preprocessor_path = out_dir / PREPROCESSOR_FILE
     joblib.dump(preprocessor, preprocessor_path)
 
+    # Hash the raw rows, aligned with the processed dataset, so a trainer can tell
+    # new or changed listings apart even when the scaler statistics move
+    row_hashes_path = out_dir / ROW_HASHES_FILE
+    np.save(row_hashes_path, pd.util.hash_pandas_object(df, index=False).to_numpy())
+
+    # And keep the raw rows, the validation gate transforms them with each
+    # model's own preprocessor to compare models fitted on different nights
+    df.to_parquet(out_dir / RAW_ROWS_FILE, index=False)
+
     logger.info(f"Processed dataset saved to {training_dataset_path}")
     logger.info(f"Dataset shape: {processed_df.shape}")
     logger.info(
-        f"Features: {len(all_feature_names)} ({len(numeric_cols)} numeric, {len(categorical_feature_names)} categorical)"
+        f"Features: {len(all_feature_names)} ({len(all_feature_names) - len(categorical_feature_names)} numeric, {len(categorical_feature_names)} categorical)"
     )
     logger.info(f"Preprocessor saved to {preprocessor_path}")
 
@@ -0,0 +1,223 @@
+"""Nearest comparable listings of a property, by location and features."""
+
+import numpy as np
+import pandas as pd
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+from sklearn.neighbors import KDTree
+from ml.prediction.price_predictor import load_model, save_model
+
+
+COMPARABLES_FILE = "comparables.joblib"
+
+EARTH_RADIUS_KM = 6371.0088
+
+# Scale of each dimension of the index: listings GEO_SCALE_KM apart, a living
+# area AREA_SCALE (log ratio) larger or BEDROOM_SCALE bedrooms more are
+# equally far from a property
+GEO_SCALE_KM = 5.0
+AREA_SCALE = np.log(1.25)
+BEDROOM_SCALE = 1.0
+
+# Scraped "Type of property" values (first word of the listing title) indexed
+# as apartments, every other type is indexed with the houses
+APARTMENT_LISTING_TYPES = {
+    "APARTMENT", "FLAT", "STUDIO", "DUPLEX", "TRIPLEX", "PENTHOUSE",
+    "GROUND-FLOOR", "LOFT", "KOT", "SERVICE-FLAT",
+}
+
+# Analysis dataset columns read to build the index
+LISTING_COLUMNS = [
+    "URL", "Type of property", "Locality", "Postal Code",
+    "Price", "Living area", "Number of bedrooms",
+]
+
+
+def listing_property_type(listing_type: str) -> str:
+    """API property type ("APARTMENT" or "HOUSE") of a scraped listing type."""
+    return "APARTMENT" if str(listing_type).upper() in APARTMENT_LISTING_TYPES else "HOUSE"
+
+
+def haversine_km(lat1, lon1, lat2, lon2) -> np.ndarray:
+    """Great-circle distance in km between points given in degrees."""
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = (
+        np.sin((lat2 - lat1) / 2) ** 2
+        + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+def _embed(lat, lon, living_area, bedrooms) -> np.ndarray:
+    """
+    Points of the index space, where the euclidean distance combines the
+    geographic and the feature distance.
+
+    Locations are points on the sphere in km, whose chord length matches the
+    haversine distance to within 0.1% below 100 km.
+    """
+    lat, lon = np.radians(lat), np.radians(lon)
+    scale = EARTH_RADIUS_KM / GEO_SCALE_KM
+    return np.column_stack(
+        [
+            scale * np.cos(lat) * np.cos(lon),
+            scale * np.cos(lat) * np.sin(lon),
+            scale * np.sin(lat),
+            np.log(living_area) / AREA_SCALE,
+            np.asarray(bedrooms, dtype=np.float64) / BEDROOM_SCALE,
+        ]
+    )
+
+
+class _StringColumn:
+    """Strings stored as one UTF-8 buffer and offsets, so they can be memory-mapped."""
+
+    def __init__(self, values):
+        encoded = [str(value).encode() if pd.notna(value) else b"" for value in values]
+        self.offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(value) for value in encoded], out=self.offsets[1:])
+        self.buffer = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+
+    def __getitem__(self, i: int) -> str:
+        return self.buffer[self.offsets[i]:self.offsets[i + 1]].tobytes().decode()
+
+
+@dataclass
+class ComparablesIndex:
+    """
+    Recent listings indexed for k-nearest neighbour lookups.
+
+    One KD-tree per property type over (location, log living area,
+    bedrooms), so a single exact query returns the listings closest in
+    location and features combined. Listings are sorted by property type,
+    the tree of a type indexes the rows from `starts[type]`. Every array is
+    saved uncompressed so the index loads memory-mapped, see `load`.
+    """
+    trees: dict
+    starts: dict
+    median_bedrooms: dict
+    lat: np.ndarray
+    lon: np.ndarray
+    price: np.ndarray
+    living_area: np.ndarray
+    bedrooms: np.ndarray
+    postal_code: np.ndarray
+    url: _StringColumn
+    locality: _StringColumn
+
+    @classmethod
+    def build(cls, listings: pd.DataFrame, leaf_size: int = 40) -> "ComparablesIndex":
+        """
+        Index listings with `LISTING_COLUMNS` and lat/lon columns.
+
+        Listings without price, living area or coordinates are dropped, missing
+        bedroom counts are set to the median of their property type.
+        """
+        df = listings.dropna(subset=["Price", "Living area", "lat", "lon"])
+        df = df[df["Living area"] > 0].copy()
+        df["property_type"] = df["Type of property"].map(listing_property_type)
+        df = df.sort_values("property_type", kind="stable").reset_index(drop=True)
+
+        bedrooms = pd.to_numeric(df["Number of bedrooms"], errors="coerce")
+        median_bedrooms = bedrooms.groupby(df["property_type"]).median().fillna(0).to_dict()
+        bedrooms = bedrooms.fillna(df["property_type"].map(median_bedrooms))
+
+        points = _embed(df["lat"], df["lon"], df["Living area"], bedrooms)
+        trees, starts = {}, {}
+        for property_type, rows in df.groupby("property_type", sort=False).indices.items():
+            starts[property_type] = int(rows[0])
+            trees[property_type] = KDTree(points[rows], leaf_size=leaf_size)
+
+        return cls(
+            trees=trees,
+            starts=starts,
+            median_bedrooms=median_bedrooms,
+            lat=df["lat"].to_numpy(np.float64),
+            lon=df["lon"].to_numpy(np.float64),
+            price=df["Price"].to_numpy(np.float64),
+            living_area=df["Living area"].to_numpy(np.float64),
+            bedrooms=bedrooms.to_numpy(np.float64),
+            postal_code=pd.to_numeric(df["Postal Code"], errors="coerce")
+            .fillna(0)
+            .to_numpy(np.int32),
+            url=_StringColumn(df["URL"]),
+            locality=_StringColumn(df["Locality"]),
+        )
+
+    def __len__(self) -> int:
+        return len(self.price)
+
+    def query(
+        self,
+        property_type: str,
+        lat: float,
+        lon: float,
+        living_area: float,
+        bedrooms: Optional[float] = None,
+        k: int = 10,
+    ) -> list[dict]:
+        """
+        The `k` listings of the same property type closest to a property,
+        closest first.
+
+        Args:
+            property_type: "APARTMENT" or "HOUSE".
+            lat, lon: Location of the property in degrees.
+            living_area: Living area in m².
+            bedrooms: Number of bedrooms, the median of the type when unknown.
+            k: Number of listings returned.
+        """
+        tree = self.trees.get(property_type)
+        if tree is None:
+            return []
+        if bedrooms is None:
+            bedrooms = self.median_bedrooms[property_type]
+
+        point = _embed([lat], [lon], [living_area], [bedrooms])
+        distances, positions = tree.query(point, k=min(k, tree.data.shape[0]))
+        rows = positions[0] + self.starts[property_type]
+        distances_km = haversine_km(lat, lon, self.lat[rows], self.lon[rows])
+
+        return [
+            {
+                "url": self.url[row],
+                "locality": self.locality[row],
+                "postal_code": int(self.postal_code[row]),
+                "property_type": property_type,
+                "price": float(self.price[row]),
+                "living_area": float(self.living_area[row]),
+                "bedroom_count": float(self.bedrooms[row]),
+                "distance_km": float(distance_km),
+                "similarity_distance": float(distance),
+            }
+            for row, distance_km, distance in zip(rows, distances_km, distances[0])
+        ]
+
+    def save(self, path: Path) -> None:
+        """Save the index atomically and uncompressed, so it can be loaded memory-mapped."""
+        save_model(self, str(path))
+
+    @classmethod
+    def load(cls, path: Path, mmap_mode: Optional[str] = "r") -> "ComparablesIndex":
+        """Load an index, memory-mapping its arrays (tree nodes included) by default."""
+        return load_model(str(path), mmap_mode=mmap_mode)
+
+
+def build_comparables_index(analysis_dataset_path: Path, out_path: Path) -> Path:
+    """
+    Build the comparables index of the analysis dataset and save it to `out_path`.
+
+    Listings are located by postal code with the georef enricher.
+    """
+    from ml.pipelines.preprocessing.enrichers import PostalCodeEnricher
+
+    df = pd.read_parquet(analysis_dataset_path, columns=LISTING_COLUMNS)
+    postal_codes = pd.to_numeric(df["Postal Code"], errors="coerce").astype("Int64")
+    lat_lon = PostalCodeEnricher().fit(None).coordinates(postal_codes.astype(str))
+    df["lat"], df["lon"] = lat_lon[:, 0], lat_lon[:, 1]
+
+    index = ComparablesIndex.build(df)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    index.save(out_path)
+    return out_path
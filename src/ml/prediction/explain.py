@@ -0,0 +1,262 @@
+"""Per-feature contributions to a price prediction."""
+
+import weakref
+import numpy as np
+import pandas as pd
+from dataclasses import dataclass
+from scipy import sparse
+from sklearn.ensemble import HistGradientBoostingRegressor
+from sklearn.pipeline import Pipeline
+from ml.training.ensembles import FoldEnsembleRegressor
+from ml.training.intervals import IntervalRegressor, point_model
+
+
+# XGBoost objectives whose prediction is the raw margin, i.e. the sum of the contributions
+XGB_IDENTITY_OBJECTIVES = {"reg:squarederror", "reg:absoluteerror", "reg:pseudohubererror"}
+# Same for HistGradientBoosting losses
+HIST_GB_IDENTITY_LOSSES = {"squared_error", "absolute_error", "quantile"}
+
+
+class ExplanationNotSupportedError(ValueError):
+    """Raised for models without a cheap way to compute feature contributions."""
+
+
+@dataclass
+class Explanation:
+    """
+    Prediction of one row split into a baseline and one contribution per feature.
+
+    `baseline + contributions.sum()` equals `prediction`.
+    """
+    prediction: float
+    baseline: float
+    feature_names: list[str]
+    values: np.ndarray
+    contributions: np.ndarray
+
+    def top(self, k: int) -> list[dict]:
+        """The `k` features with the largest absolute contribution."""
+        order = np.argsort(-np.abs(self.contributions), kind="stable")[:k]
+        return [
+            {
+                "feature": self.feature_names[i],
+                "value": float(self.values[i]),
+                "contribution": float(self.contributions[i]),
+            }
+            for i in order
+        ]
+
+
+def explain_prediction(model, X: pd.DataFrame) -> Explanation:
+    """
+    Predict the first row of X and attribute the prediction to its features.
+
+    The prediction is computed from the contributions, in the same pass:
+    - Linear models (`coef_`): coefficient × transformed feature value, plus the intercept.
+    - XGBoost: TreeSHAP values from the booster (`pred_contribs`), computed on
+      the precomputed tree paths, plus the bias. Up to the best iteration when
+      early stopping picked one, like `predict`.
+    - HistGradientBoosting: path attribution, each split on the row's decision
+      path credits its feature with the change of the expected tree output.
+      The expected node outputs are precomputed once per model.
+    - Fold ensembles: the average of the fold models' explanations.
+    - Interval regressors: the explanation of their point model.
+    Pipelines are unwrapped, the contributions are those of the final estimator
+    on the transformed features.
+
+    Raises:
+        ExplanationNotSupportedError: For other models, e.g. random forests or
+            HistGradientBoosting with categorical splits.
+    """
+    model = point_model(model)
+    estimator, Xt = _final_estimator_input(model, X)
+    prediction, baseline, contributions = _explain_estimator(estimator, Xt)
+    return Explanation(
+        prediction=prediction,
+        baseline=baseline,
+        feature_names=_feature_names(model, estimator, Xt, len(contributions)),
+        values=_first_row(Xt),
+        contributions=contributions,
+    )
+
+
+def _final_estimator_input(model, X):
+    """The estimator doing the prediction and its input, transformed by any pipeline steps."""
+    if not isinstance(model, Pipeline):
+        return model, X
+    for _, step in model.steps[:-1]:
+        if step is not None and step != "passthrough":
+            X = step.transform(X)
+    return model.steps[-1][1], X
+
+
+def _explain_estimator(estimator, X) -> tuple[float, float, np.ndarray]:
+    if isinstance(estimator, IntervalRegressor):
+        return _explain_estimator(estimator.estimator, X)
+
+    if isinstance(estimator, FoldEnsembleRegressor):
+        explanations = [_explain_estimator(fold, X) for fold in estimator.estimators_]
+        return (
+            float(np.mean([prediction for prediction, _, _ in explanations])),
+            float(np.mean([baseline for _, baseline, _ in explanations])),
+            np.mean([contributions for _, _, contributions in explanations], axis=0),
+        )
+
+    if hasattr(estimator, "coef_"):
+        coef = np.ravel(estimator.coef_)
+        intercept = float(np.ravel(estimator.intercept_)[0])
+        contributions = coef * _first_row(X)
+        return intercept + float(contributions.sum()), intercept, contributions
+
+    if hasattr(estimator, "get_booster"):
+        import xgboost as xgb
+
+        row = X.iloc[:1] if isinstance(X, pd.DataFrame) else X[:1]
+        # predict() stops at the best iteration after early stopping, the booster does not
+        best_iteration = getattr(estimator, "best_iteration", None)
+        iteration_range = (0, best_iteration + 1) if best_iteration is not None else (0, 0)
+        contribs = estimator.get_booster().predict(
+            xgb.DMatrix(row), pred_contribs=True, iteration_range=iteration_range
+        )[0]
+        baseline, contributions = float(contribs[-1]), contribs[:-1].astype(np.float64)
+        if estimator.get_params().get("objective") in XGB_IDENTITY_OBJECTIVES:
+            prediction = baseline + float(contributions.sum())
+        else:
+            prediction = float(estimator.predict(row)[0])
+        return prediction, baseline, contributions
+
+    if isinstance(estimator, HistGradientBoostingRegressor):
+        baseline, contributions = _hist_gb_forest(estimator).explain(_first_row(X))
+        if estimator.loss in HIST_GB_IDENTITY_LOSSES:
+            prediction = baseline + float(contributions.sum())
+        else:
+            row = X.iloc[:1] if isinstance(X, pd.DataFrame) else X[:1]
+            prediction = float(estimator.predict(row)[0])
+        return prediction, baseline, contributions
+
+    raise ExplanationNotSupportedError(
+        f"Explanations are not supported for {type(estimator).__name__} models"
+    )
+
+
+@dataclass
+class _HistGBForest:
+    """
+    Node arrays of every tree of a HistGradientBoosting model, padded to
+    (n_trees, max_nodes), so all trees are walked together.
+
+    `value` is the expected output of each node: leaves hold their (shrunk)
+    value, internal nodes the training-count weighted mean of their children.
+    """
+    n_trees: int
+    n_features: int
+    feature: np.ndarray
+    threshold: np.ndarray
+    missing_left: np.ndarray
+    left: np.ndarray
+    right: np.ndarray
+    is_leaf: np.ndarray
+    value: np.ndarray
+    max_depth: int
+    baseline: float
+
+    @classmethod
+    def from_estimator(cls, estimator: HistGradientBoostingRegressor) -> "_HistGBForest":
+        trees = [predictors[0].nodes for predictors in estimator._predictors]
+        if any(nodes["is_categorical"].any() for nodes in trees):
+            raise ExplanationNotSupportedError(
+                "Explanations are not supported for HistGradientBoosting categorical splits"
+            )
+
+        shape = (len(trees), max((len(nodes) for nodes in trees), default=1))
+        forest = cls(
+            n_trees=len(trees),
+            n_features=estimator.n_features_in_,
+            feature=np.zeros(shape, dtype=np.intp),
+            threshold=np.zeros(shape),
+            missing_left=np.zeros(shape, dtype=bool),
+            left=np.zeros(shape, dtype=np.intp),
+            right=np.zeros(shape, dtype=np.intp),
+            is_leaf=np.ones(shape, dtype=bool),
+            value=np.zeros(shape),
+            max_depth=max((int(nodes["depth"].max()) for nodes in trees), default=0),
+            baseline=float(np.ravel(estimator._baseline_prediction)[0]),
+        )
+        for t, nodes in enumerate(trees):
+            n = len(nodes)
+            forest.feature[t, :n] = nodes["feature_idx"]
+            forest.threshold[t, :n] = nodes["num_threshold"]
+            forest.missing_left[t, :n] = nodes["missing_go_to_left"]
+            forest.left[t, :n] = nodes["left"]
+            forest.right[t, :n] = nodes["right"]
+            forest.is_leaf[t, :n] = nodes["is_leaf"]
+            forest.value[t, :n] = _expected_node_values(nodes)
+        forest.baseline += float(forest.value[:, 0].sum())
+        return forest
+
+    def explain(self, row: np.ndarray) -> tuple[float, np.ndarray]:
+        """Baseline (expected output) and per-feature contributions for one row."""
+        contributions = np.zeros(self.n_features)
+        trees = np.arange(self.n_trees)
+        node = np.zeros(self.n_trees, dtype=np.intp)
+        for _ in range(self.max_depth):
+            active = ~self.is_leaf[trees, node]
+            if not active.any():
+                break
+            t, n = trees[active], node[active]
+            feature = self.feature[t, n]
+            x = row[feature]
+            # Same rule as the predictor: NaNs follow the missing direction, else x <= threshold
+            go_left = np.where(np.isnan(x), self.missing_left[t, n], x <= self.threshold[t, n])
+            child = np.where(go_left, self.left[t, n], self.right[t, n])
+            np.add.at(contributions, feature, self.value[t, child] - self.value[t, n])
+            node[active] = child
+        return self.baseline, contributions
+
+
+def _expected_node_values(nodes: np.ndarray) -> np.ndarray:
+    # Internal node values are stored before shrinkage, so they are recomputed from the leaves
+    values = nodes["value"].astype(np.float64)
+    count = nodes["count"].astype(np.float64)
+    internal = np.flatnonzero(~nodes["is_leaf"].astype(bool))
+    depth = nodes["depth"][internal]
+    # Deepest first, children are always set before their parent
+    for level in np.unique(depth)[::-1]:
+        idx = internal[depth == level]
+        left, right = nodes["left"][idx], nodes["right"][idx]
+        values[idx] = (count[left] * values[left] + count[right] * values[right]) / (
+            count[left] + count[right]
+        )
+    return values
+
+
+# Per fitted model, rebuilt when a warm start added trees
+_HIST_GB_FORESTS: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+
+def _hist_gb_forest(estimator: HistGradientBoostingRegressor) -> _HistGBForest:
+    forest = _HIST_GB_FORESTS.get(estimator)
+    if forest is None or forest.n_trees != len(estimator._predictors):
+        forest = _HIST_GB_FORESTS[estimator] = _HistGBForest.from_estimator(estimator)
+    return forest
+
+
+def _first_row(X) -> np.ndarray:
+    if isinstance(X, pd.DataFrame):
+        return X.iloc[0].to_numpy(dtype=np.float64)
+    if sparse.issparse(X):
+        return X[:1].toarray().ravel().astype(np.float64)
+    return np.asarray(X[0], dtype=np.float64).ravel()
+
+
+def _feature_names(model, estimator, X, n_features: int) -> list[str]:
+    if isinstance(X, pd.DataFrame):
+        return list(map(str, X.columns))
+    if hasattr(estimator, "feature_names_in_"):
+        return list(map(str, estimator.feature_names_in_))
+    if isinstance(model, Pipeline) and len(model.steps) > 1:
+        try:
+            return list(map(str, model[:-1].get_feature_names_out()))
+        except (AttributeError, ValueError):
+            pass
+    return [f"x{i}" for i in range(n_features)]
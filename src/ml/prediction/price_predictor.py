@@ -1,15 +1,50 @@
 import pandas as pd
 import os
+import tempfile
 import joblib
 
 
-def predict_price(df: pd.DataFrame, model_path: str) -> int:
+def load_model(model_path: str, mmap_mode: str | None = None):
+    """
+    Load a model saved with joblib.
+
+    With `mmap_mode="r"` the NumPy arrays inside the pickle (coefficients,
+    tree node arrays, ...) are memory-mapped instead of read into memory, so
+    loading is near-instant and processes loading the same file share the OS
+    page cache. This requires an uncompressed dump, see `save_model`.
+    """
     if not os.path.exists(model_path):
         print(f"Error: Model file not found at '{model_path}'")
         raise FileNotFoundError(f"Model file not found at '{model_path}'")
 
-    with open(model_path, "rb") as f:
-        model = joblib.load(f)
+    # joblib can only memory-map when given a path, not an open file
+    return joblib.load(model_path, mmap_mode=mmap_mode)
+
+
+def save_model(model, model_path: str) -> None:
+    """
+    Save a model so it can be loaded memory-mapped, replacing any previous file atomically.
+
+    The dump is uncompressed (compressed arrays cannot be memory-mapped) and is
+    written to a temporary file then renamed over `model_path`. Processes still
+    mapping the previous model keep reading the old file instead of crashing
+    on a file truncated under them.
+    """
+    directory = os.path.dirname(os.path.abspath(model_path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    os.close(fd)
+    try:
+        joblib.dump(model, tmp_path, compress=0)
+        os.replace(tmp_path, model_path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def predict_price(df: pd.DataFrame, model_path: str | None = None, model=None) -> int:
+    # Callers holding a loaded model pass it to skip loading from disk
+    if model is None:
+        model = load_model(model_path)
 
     predicted_price = model.predict(df)[0]
 
@@ -17,3 +52,20 @@ def predict_price(df: pd.DataFrame, model_path: str) -> int:
     predicted_price_value = predicted_price.item()
 
     return round(predicted_price_value)
+
+
+def predict_price_interval(
+    df: pd.DataFrame, model_path: str | None = None, model=None
+) -> tuple[int, int, int]:
+    """
+    Predict the price with its prediction interval, as (price, lower, upper).
+
+    The model must be an interval regressor (see ml.training.intervals), which
+    computes the bounds in the same call as the point prediction.
+    """
+    if model is None:
+        model = load_model(model_path)
+
+    prediction, lower, upper = model.predict_interval(df)
+
+    return round(prediction[0].item()), round(lower[0].item()), round(upper[0].item())
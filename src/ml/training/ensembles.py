@@ -0,0 +1,44 @@
+"""Ensembles built from cross-validation fold models."""
+
+import numpy as np
+import pandas as pd
+from sklearn.base import BaseEstimator, RegressorMixin, clone
+
+
+class FoldEnsembleRegressor(RegressorMixin, BaseEstimator):
+    """
+    Regressor averaging the predictions of one model per cross-validation fold.
+
+    Built with `from_fitted` from the estimators returned by
+    `cross_validate(..., return_estimator=True)`, so no extra full fit is needed.
+    Calling `fit` refits a clone of every estimator on the given data.
+
+    Parameters
+    ----------
+    estimators : list
+        Estimators to average. Left untouched, the fitted ones live in `estimators_`.
+    """
+
+    def __init__(self, estimators: list):
+        self.estimators = estimators
+
+    @classmethod
+    def from_fitted(cls, estimators: list) -> "FoldEnsembleRegressor":
+        """Wrap already fitted fold estimators without refitting them."""
+        ensemble = cls(estimators)
+        ensemble._set_fitted(list(estimators))
+        return ensemble
+
+    def fit(self, X: pd.DataFrame, y: pd.Series) -> "FoldEnsembleRegressor":
+        self._set_fitted([clone(estimator).fit(X, y) for estimator in self.estimators])
+        return self
+
+    def predict(self, X: pd.DataFrame) -> np.ndarray:
+        return np.mean([estimator.predict(X) for estimator in self.estimators_], axis=0)
+
+    def _set_fitted(self, estimators: list) -> None:
+        self.estimators_ = estimators
+        first = estimators[0]
+        self.n_features_in_ = first.n_features_in_
+        if hasattr(first, "feature_names_in_"):
+            self.feature_names_in_ = first.feature_names_in_
@@ -0,0 +1,134 @@
+"""Regressors returning a prediction interval along with the point prediction."""
+
+import numpy as np
+import pandas as pd
+from abc import ABCMeta, abstractmethod
+from sklearn.base import BaseEstimator, RegressorMixin
+
+
+class IntervalRegressor(RegressorMixin, BaseEstimator, metaclass=ABCMeta):
+    """
+    Regressor wrapping a fitted point model and adding `predict_interval`.
+
+    `predict` is the point model's prediction, so the wrapper can be used,
+    evaluated and logged like the model itself.
+
+    Parameters
+    ----------
+    estimator : RegressorMixin
+        Fitted point model.
+    coverage : float
+        Nominal probability that the true value falls within the interval.
+    """
+
+    def __init__(self, estimator: RegressorMixin, coverage: float = 0.9):
+        self.estimator = estimator
+        self.coverage = coverage
+
+    def predict(self, X: pd.DataFrame) -> np.ndarray:
+        return self.estimator.predict(X)
+
+    @abstractmethod
+    def predict_interval(self, X: pd.DataFrame) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Point prediction, lower and upper bound of every row of X."""
+
+    def _copy_fitted_attributes(self) -> None:
+        self.n_features_in_ = self.estimator.n_features_in_
+        if hasattr(self.estimator, "feature_names_in_"):
+            self.feature_names_in_ = self.estimator.feature_names_in_
+
+
+class ConformalIntervalRegressor(IntervalRegressor):
+    """
+    Split conformal interval: the point prediction plus residual quantiles.
+
+    The lower and upper offsets are quantiles of the signed residuals
+    `y - prediction` on a calibration set the model was not fitted on, with
+    the finite-sample correction, so the interval covers at least `coverage`
+    of new rows drawn from the same distribution. It costs nothing at
+    inference: two additions on top of the point prediction.
+
+    Parameters
+    ----------
+    estimator : RegressorMixin
+        Fitted point model.
+    coverage : float
+        Nominal probability that the true value falls within the interval.
+    """
+
+    def calibrate(self, X: pd.DataFrame, y: pd.Series) -> "ConformalIntervalRegressor":
+        """Compute the residual quantiles on a held-out calibration set."""
+        residuals = np.sort(np.asarray(y, dtype=np.float64) - self.estimator.predict(X))
+        n = len(residuals)
+        tail = (1 - self.coverage) / 2
+        # Order statistics rounded outwards, k-th of n + 1 as in split conformal
+        lower_rank = max(int(np.floor(tail * (n + 1))), 1)
+        upper_rank = min(int(np.ceil((1 - tail) * (n + 1))), n)
+        self.lower_offset_ = float(residuals[lower_rank - 1])
+        self.upper_offset_ = float(residuals[upper_rank - 1])
+        self.n_calibration_ = n
+        self._copy_fitted_attributes()
+        return self
+
+    def predict_interval(self, X):
+        prediction = self.estimator.predict(X)
+        return prediction, prediction + self.lower_offset_, prediction + self.upper_offset_
+
+
+class QuantileIntervalRegressor(IntervalRegressor):
+    """
+    Interval from models fitted on the lower and upper quantiles of the target.
+
+    Unlike the conformal interval, the width adapts to each row (e.g. wider
+    for rare, expensive properties). The three models predict the same batch
+    and the bounds are clipped so they never cross the point prediction.
+
+    Parameters
+    ----------
+    estimator : RegressorMixin
+        Fitted point model.
+    lower_estimator, upper_estimator : RegressorMixin
+        Fitted models of the (1 - coverage) / 2 and (1 + coverage) / 2 quantiles.
+    coverage : float
+        Nominal probability that the true value falls within the interval.
+    """
+
+    def __init__(
+        self,
+        estimator: RegressorMixin,
+        lower_estimator: RegressorMixin,
+        upper_estimator: RegressorMixin,
+        coverage: float = 0.9,
+    ):
+        super().__init__(estimator, coverage)
+        self.lower_estimator = lower_estimator
+        self.upper_estimator = upper_estimator
+
+    @classmethod
+    def from_fitted(
+        cls, estimator, lower_estimator, upper_estimator, coverage: float
+    ) -> "QuantileIntervalRegressor":
+        """Wrap already fitted point and quantile models."""
+        model = cls(estimator, lower_estimator, upper_estimator, coverage)
+        model._copy_fitted_attributes()
+        return model
+
+    def predict_interval(self, X):
+        prediction = self.estimator.predict(X)
+        lower = np.minimum(self.lower_estimator.predict(X), prediction)
+        upper = np.maximum(self.upper_estimator.predict(X), prediction)
+        return prediction, lower, upper
+
+
+def point_model(model: RegressorMixin) -> RegressorMixin:
+    """The point model of an interval regressor, any other model as is."""
+    return model.estimator if isinstance(model, IntervalRegressor) else model
+
+
+def interval_metrics(y_true: pd.Series, lower: np.ndarray, upper: np.ndarray) -> dict:
+    """Empirical coverage and mean width of prediction intervals."""
+    y_true = np.asarray(y_true, dtype=np.float64)
+    return {
+        "interval_coverage": float(np.mean((y_true >= lower) & (y_true <= upper))),
+        "interval_mean_width": float(np.mean(upper - lower)),
+    }
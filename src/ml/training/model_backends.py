@@ -0,0 +1,232 @@
+"""Model backends for the regression trainer."""
+
+import pandas as pd
+from abc import ABC, abstractmethod
+from contextlib import AbstractContextManager, nullcontext
+from sklearn.base import RegressorMixin
+from sklearn.model_selection import train_test_split
+from threadpoolctl import threadpool_limits
+from ml.config.config import ModelConfig
+
+
+class ModelBackend(ABC):
+    """
+    A family of regressors the trainer can fit.
+
+    A backend knows how to build an unfitted estimator from the ModelConfig,
+    which hyperparameters to search, how to cap the threads used by a single
+    fit and how to fit with early stopping on a validation split.
+
+    Attributes:
+        name (str): Short name used for MLFlow run names and saved model files.
+        supports_quantile (bool): Whether `build_quantile` is implemented.
+        supports_warm_start (bool): Whether `warm_fit` is implemented.
+    """
+
+    name: str = ""
+    supports_quantile: bool = False
+    supports_warm_start: bool = False
+
+    def __init__(self, config: ModelConfig):
+        self.config = config
+
+    @abstractmethod
+    def build(self) -> RegressorMixin:
+        """Build an unfitted estimator."""
+
+    @abstractmethod
+    def param_grid(self) -> dict:
+        """Hyperparameter grid used by the trainer search strategies."""
+
+    def build_quantile(self, quantile: float) -> RegressorMixin:
+        """Build an unfitted estimator of the given quantile, see `supports_quantile`."""
+        raise ValueError(f"Backend {self.name} does not support quantile models")
+
+    def thread_limits(self) -> AbstractContextManager:
+        """Context manager capping the threads used inside a single fit."""
+        return nullcontext()
+
+    def fit(self, model: RegressorMixin, X: pd.DataFrame, y: pd.Series) -> RegressorMixin:
+        """Fit the final model."""
+        with self.thread_limits():
+            return model.fit(X, y)
+
+    def warm_fit(
+        self,
+        model: RegressorMixin,
+        X: pd.DataFrame,
+        y: pd.Series,
+        X_new: pd.DataFrame,
+        y_new: pd.Series,
+    ) -> RegressorMixin:
+        """
+        Continue fitting a previously trained model on the full current
+        training set, so the added fit does not drift toward the new rows.
+        See `supports_warm_start`.
+
+        Args:
+            model: Model loaded from the previous run.
+            X, y: Full current training set, new rows included.
+            X_new, y_new: Rows that are new or changed since the previous run.
+        """
+        raise ValueError(f"Backend {self.name} does not support warm start")
+
+
+class ElasticNetBackend(ModelBackend):
+    """Linear ElasticNet regression. Converges on tolerance, no early stopping."""
+
+    name = "elasticnet"
+    supports_warm_start = True
+
+    def build(self) -> RegressorMixin:
+        from sklearn.linear_model import ElasticNet
+
+        return ElasticNet(
+            alpha=self.config.alpha,
+            l1_ratio=self.config.l1_ratio,
+            random_state=self.config.random_state,
+            max_iter=1000,  # Ensure convergence
+        )
+
+    def param_grid(self) -> dict:
+        return {
+            "alpha": list(self.config.alpha_grid),
+            "l1_ratio": list(self.config.l1_ratio_grid),
+        }
+
+    def thread_limits(self) -> AbstractContextManager:
+        # Coordinate descent itself is single threaded, only the BLAS calls are not
+        if self.config.n_threads is None:
+            return nullcontext()
+        return threadpool_limits(limits=self.config.n_threads, user_api="blas")
+
+    def warm_fit(self, model, X, y, X_new, y_new):
+        # The ElasticNet optimum depends on every row, so refit on the full set
+        # starting from the previous coefficients, which converges in a few sweeps
+        model.set_params(warm_start=True)
+        with self.thread_limits():
+            model.fit(X, y)
+        return model.set_params(warm_start=False)
+
+
+class HistGradientBoostingBackend(ModelBackend):
+    """Scikit-learn histogram gradient boosting, multi-threaded through OpenMP."""
+
+    name = "hist_gb"
+    supports_quantile = True
+    supports_warm_start = True
+
+    def build(self) -> RegressorMixin:
+        from sklearn.ensemble import HistGradientBoostingRegressor
+
+        return HistGradientBoostingRegressor(
+            learning_rate=self.config.learning_rate,
+            max_iter=self.config.max_iter,
+            max_depth=self.config.max_depth,
+            early_stopping=self.config.early_stopping,
+            validation_fraction=self.config.validation_fraction,
+            n_iter_no_change=self.config.early_stopping_rounds,
+            random_state=self.config.random_state,
+        )
+
+    def param_grid(self) -> dict:
+        return {
+            "learning_rate": list(self.config.learning_rate_grid),
+            "max_depth": list(self.config.max_depth_grid),
+        }
+
+    def build_quantile(self, quantile: float) -> RegressorMixin:
+        return self.build().set_params(loss="quantile", quantile=quantile)
+
+    def thread_limits(self) -> AbstractContextManager:
+        if self.config.n_threads is None:
+            return nullcontext()
+        return threadpool_limits(limits=self.config.n_threads, user_api="openmp")
+
+    # Early stopping is handled by the estimator on its own validation_fraction split
+
+    def warm_fit(self, model, X, y, X_new, y_new):
+        # Add a fixed number of boosting iterations fitted on the full set. The
+        # features are binned again on every fit, on the full set they keep the
+        # same resolution as the previous fit instead of the new rows' range
+        model.set_params(
+            warm_start=True,
+            early_stopping=False,
+            max_iter=model.n_iter_ + self.config.warm_start_iter,
+        )
+        with self.thread_limits():
+            model.fit(X, y)
+        return model.set_params(warm_start=False, early_stopping=self.config.early_stopping)
+
+
+class XGBoostBackend(ModelBackend):
+    """XGBoost with the CPU `hist` tree method."""
+
+    name = "xgboost"
+    supports_quantile = True
+    supports_warm_start = True
+
+    def build(self) -> RegressorMixin:
+        from xgboost import XGBRegressor
+
+        # early_stopping_rounds is only set in fit(), CV and search fits have no eval set
+        return XGBRegressor(
+            tree_method="hist",
+            device="cpu",
+            learning_rate=self.config.learning_rate,
+            n_estimators=self.config.max_iter,
+            max_depth=self.config.max_depth,
+            n_jobs=self.config.n_threads,
+            random_state=self.config.random_state,
+        )
+
+    def param_grid(self) -> dict:
+        return {
+            "learning_rate": list(self.config.learning_rate_grid),
+            "max_depth": list(self.config.max_depth_grid),
+        }
+
+    def build_quantile(self, quantile: float) -> RegressorMixin:
+        return self.build().set_params(objective="reg:quantileerror", quantile_alpha=quantile)
+
+    def fit(self, model: RegressorMixin, X: pd.DataFrame, y: pd.Series) -> RegressorMixin:
+        if not self.config.early_stopping:
+            return model.fit(X, y)
+
+        X_fit, X_val, y_fit, y_val = train_test_split(
+            X,
+            y,
+            test_size=self.config.validation_fraction,
+            random_state=self.config.random_state,
+        )
+        model.set_params(early_stopping_rounds=self.config.early_stopping_rounds)
+        model.fit(X_fit, y_fit, eval_set=[(X_val, y_val)], verbose=False)
+        # A clone or refit of the returned model has no eval set to stop on
+        return model.set_params(early_stopping_rounds=None)
+
+    def warm_fit(self, model, X, y, X_new, y_new):
+        # Continue boosting from the previous booster, on the full set. Its early
+        # stopping best iteration is dropped, predict() would stop there otherwise
+        booster = model.get_booster()
+        booster.set_attr(best_iteration=None, best_score=None)
+        model.set_params(
+            n_estimators=self.config.warm_start_iter, early_stopping_rounds=None
+        )
+        return model.fit(X, y, xgb_model=booster, verbose=False)
+
+
+MODEL_BACKENDS: dict[str, type[ModelBackend]] = {
+    backend.name: backend
+    for backend in (ElasticNetBackend, HistGradientBoostingBackend, XGBoostBackend)
+}
+
+
+def get_backend(config: ModelConfig) -> ModelBackend:
+    """Return the backend selected by `config.backend`."""
+    try:
+        return MODEL_BACKENDS[config.backend](config)
+    except KeyError:
+        raise ValueError(
+            f"Unknown model backend: {config.backend}. "
+            f"Available: {', '.join(MODEL_BACKENDS)}"
+        ) from None
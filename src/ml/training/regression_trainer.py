@@ -1,5 +1,7 @@
 """Model training pipeline."""
 
+import json
+import shutil
 import time
 import pandas as pd
 import numpy as np
@@ -7,16 +9,50 @@ import joblib
 import mlflow
 import mlflow.sklearn as mlflow_sklearn
 from mlflow.models import infer_signature
+from dataclasses import dataclass
 from pathlib import Path
 from typing import Tuple, Optional
-from sklearn.model_selection import train_test_split, cross_val_score
-from sklearn.metrics import mean_absolute_error, r2_score, mean_squared_error
-from sklearn.linear_model import ElasticNet
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+from sklearn.model_selection import (
+    train_test_split,
+    cross_validate,
+    GridSearchCV,
+    HalvingGridSearchCV,
+)
+from sklearn.linear_model import ElasticNetCV
+from sklearn.base import RegressorMixin
 from ml.config.config import MLFlowConfig, ModelConfig
-from ml.utils.validation import validate_data, detect_data_drift
+from ml.evaluation.metrics import regression_metrics
+from ml.pipelines.training_preprocess import PREPROCESSOR_FILE, ROW_HASHES_FILE
+from ml.training.ensembles import FoldEnsembleRegressor
+from ml.training.intervals import (
+    ConformalIntervalRegressor,
+    QuantileIntervalRegressor,
+    interval_metrics,
+    point_model,
+)
+from ml.training.model_backends import get_backend
+from ml.utils.benchmarking import measure_inference_latency
+from ml.utils.experiments import resolve_tracking_uri
+from ml.utils.validation import validate_data
+from ml.utils.vectorized_validation import DriftReport, detect_distribution_drift
 from utils.logging_utils import setup_logger
 
 
+# What to do with the CV fold models, see ModelConfig.cv_reuse
+CV_REUSE_MODES = ("refit", "best_fold", "ensemble")
+
+
+@dataclass
+class PreviousModel:
+    """A model saved by a previous run, with the artifacts needed to warm start it."""
+    path: Path
+    model: RegressorMixin
+    metadata: dict
+    row_hashes: Optional[np.ndarray] = None
+    preprocessor: Optional[object] = None
+
+
 class RegressionTrainer:
     """Regression model training with validation and MLFlow logging."""
 
@@ -28,11 +64,31 @@ class RegressionTrainer:
         self.config = config or ModelConfig()
         self.mlflow_config = mlflow_config or MLFlowConfig()
         self.logger = setup_logger(__name__)
-        self.model_name = "elasticnet"
+        self.backend = get_backend(self.config)
 
-        # Setup MLFlow
-        mlflow.set_tracking_uri(self.mlflow_config.tracking_uri)
+        # Checked before any data is loaded, not after the cross-validation
+        if self.config.cv_reuse not in CV_REUSE_MODES:
+            raise ValueError(
+                f"Unknown CV reuse mode: {self.config.cv_reuse}, expected one of {CV_REUSE_MODES}"
+            )
+        if self.config.search_strategy and self.config.cv_reuse != "refit":
+            self.logger.warning(
+                f"cv_reuse={self.config.cv_reuse!r} is ignored with "
+                f"search_strategy={self.config.search_strategy!r}, the search has no fold "
+                "models of the best candidate, it is refitted"
+            )
+        self.model_name = self.backend.name
+        self.best_params: dict = {}
+        self.fit_time_s: float = 0.0
+        self.warm_start_new_rows: int = 0
+        self.drift_report: Optional[DriftReport] = None
+
+        # Setup MLFlow, on the local fallback store if the server is unreachable
+        self.tracking_uri = resolve_tracking_uri(self.mlflow_config)
+        mlflow.set_tracking_uri(self.tracking_uri)
         mlflow.set_experiment(self.mlflow_config.training_experiment_name)
+        if self.mlflow_config.async_logging:
+            mlflow.config.enable_async_logging(True)
 
     def load_and_validate_data(self, data_path: Path) -> Tuple[pd.DataFrame, pd.Series]:
         """Load and validate training data."""
@@ -65,8 +121,9 @@ class RegressionTrainer:
             stratify=None,  # For regression
         )
 
-        # Check for data drift
-        drift_columns = detect_data_drift(X_train, X_test)
+        # Check for data drift, the report is logged to MLFlow with the run
+        self.drift_report = detect_distribution_drift(X_train, X_test)
+        drift_columns = self.drift_report.drifted_columns
         if drift_columns:
             self.logger.warning(
                 f"Potential data drift detected in columns: {drift_columns}"
@@ -74,51 +131,413 @@ class RegressionTrainer:
 
         return X_train, X_test, y_train, y_test
 
-    def train_model(self, X_train: pd.DataFrame, y_train: pd.Series) -> ElasticNet:
+    def train_model(self, X_train: pd.DataFrame, y_train: pd.Series) -> RegressorMixin:
         """Train the regression model."""
-        model = ElasticNet(
-            alpha=self.config.alpha,
-            l1_ratio=self.config.l1_ratio,
-            random_state=self.config.random_state,
-            max_iter=1000,  # Ensure convergence
+        model = self.backend.build()
+
+        if self.config.search_strategy:
+            model = self.search_hyperparameters(model, X_train, y_train)
+        else:
+            # Cross-validation, keeping the fold models when they are reused
+            reuse_folds = self.config.cv_reuse != "refit"
+            with self.backend.thread_limits():
+                cv_results = cross_validate(
+                    model,
+                    X_train,
+                    y_train,
+                    cv=self.config.cv_folds,
+                    scoring="r2",
+                    n_jobs=self.config.n_jobs,
+                    return_estimator=reuse_folds,
+                )
+            cv_scores = cv_results["test_score"]
+            self.logger.info(
+                f"Cross-validation R² scores: {cv_scores.mean():.3f} ± {cv_scores.std():.3f}"
+            )
+
+            if reuse_folds:
+                self.fit_time_s = float(np.mean(cv_results["fit_time"]))
+                return self._reuse_fold_models(cv_results["estimator"], cv_scores)
+
+        # Fit model
+        start = time.perf_counter()
+        model = self.backend.fit(model, X_train, y_train)
+        self.fit_time_s = time.perf_counter() - start
+
+        return model
+
+    def _reuse_fold_models(self, estimators: list, cv_scores: np.ndarray) -> RegressorMixin:
+        """Turn the CV fold models into the final model instead of refitting."""
+        if self.config.cv_reuse == "best_fold":
+            best_fold = int(np.argmax(cv_scores))
+            self.logger.info(f"Reusing fold {best_fold} model (R² = {cv_scores[best_fold]:.3f})")
+            return estimators[best_fold]
+
+        self.logger.info(f"Averaging {len(estimators)} fold models")
+        return FoldEnsembleRegressor.from_fitted(estimators)
+
+    def search_hyperparameters(
+        self, model: RegressorMixin, X_train: pd.DataFrame, y_train: pd.Series
+    ) -> RegressorMixin:
+        """
+        Search the backend hyperparameter grid in parallel and return an unfitted
+        model set to the best candidate.
+
+        Strategies:
+            - "grid": exhaustive GridSearchCV
+            - "halving": successive halving, cheap rounds on few samples first
+            - "path": ElasticNetCV warm-started regularization paths (elasticnet only)
+        """
+        strategy = self.config.search_strategy
+        param_grid = self.backend.param_grid()
+        self.logger.info(
+            f"Running {strategy} search over {param_grid} "
+            f"(cv={self.config.cv_folds}, n_jobs={self.config.n_jobs})"
         )
 
-        # Cross-validation
-        cv_scores = cross_val_score(model, X_train, y_train, cv=5, scoring="r2")
+        if strategy in ("grid", "halving"):
+            search_cls = GridSearchCV if strategy == "grid" else HalvingGridSearchCV
+            search_kwargs = {} if strategy == "grid" else {"random_state": self.config.random_state}
+            search = search_cls(
+                model,
+                param_grid,
+                cv=self.config.cv_folds,
+                scoring="r2",
+                n_jobs=self.config.n_jobs,
+                refit=False,  # the backend refits with early stopping
+                **search_kwargs,
+            )
+            with self.backend.thread_limits():
+                search.fit(X_train, y_train)
+
+            results = search.cv_results_
+            candidates = [
+                (params, results["mean_test_score"][i], results["std_test_score"][i])
+                for i, params in enumerate(results["params"])
+            ]
+            self._log_search_candidates(candidates, "cv_r2")
+            self.best_params = dict(search.best_params_)
+
+        elif strategy == "path":
+            if self.backend.name != "elasticnet":
+                raise ValueError(
+                    f"Search strategy 'path' is not supported by backend {self.backend.name}"
+                )
+
+            # Alphas are fitted along a warm-started path, so each l1_ratio costs
+            # roughly one fit per fold instead of one per alpha
+            search = ElasticNetCV(
+                l1_ratio=param_grid["l1_ratio"],
+                alphas=param_grid["alpha"],
+                cv=self.config.cv_folds,
+                n_jobs=self.config.n_jobs,
+                random_state=self.config.random_state,
+                max_iter=1000,
+            )
+            with self.backend.thread_limits():
+                search.fit(X_train, y_train)
+
+            # mse_path_ is (n_l1_ratio, n_alphas, n_folds), minus the first axis
+            # when a single l1_ratio is searched
+            l1_ratios = np.atleast_1d(search.l1_ratio)
+            alphas = np.atleast_2d(search.alphas_)
+            mse_path = search.mse_path_.reshape(len(l1_ratios), alphas.shape[1], -1)
+            candidates = [
+                (
+                    {"alpha": float(alpha), "l1_ratio": float(l1_ratio)},
+                    -mse_path[i, j].mean(),
+                    mse_path[i, j].std(),
+                )
+                for i, l1_ratio in enumerate(l1_ratios)
+                for j, alpha in enumerate(alphas[i])
+            ]
+            self._log_search_candidates(candidates, "cv_neg_mse")
+            self.best_params = {
+                "alpha": float(search.alpha_),
+                "l1_ratio": float(search.l1_ratio_),
+            }
+
+        else:
+            raise ValueError(f"Unknown search strategy: {strategy}")
+
+        self.logger.info(f"Best hyperparameters: {self.best_params}")
+        return model.set_params(**self.best_params)
+
+    def fit_prediction_interval(
+        self,
+        model: RegressorMixin,
+        X_train: pd.DataFrame,
+        y_train: pd.Series,
+        X_test: pd.DataFrame,
+        y_test: pd.Series,
+    ) -> RegressorMixin:
+        """
+        Wrap the fitted model with the prediction interval selected by the config.
+
+        Strategies:
+            - "conformal": quantiles of the residuals on the test split, which
+              the model was not fitted on
+            - "quantile": lower and upper quantile models fitted on the training
+              split, falling back to "conformal" for backends without them
+        """
+        strategy = self.config.prediction_interval
+        coverage = self.config.interval_coverage
+        self.logger.info(f"Fitting {coverage:.0%} {strategy} prediction interval")
+
+        if strategy == "quantile" and not self.backend.supports_quantile:
+            self.logger.warning(
+                f"Backend {self.backend.name} does not support quantile models, "
+                "using a conformal interval instead"
+            )
+            strategy = "conformal"
+
+        if strategy == "quantile":
+            tail = (1 - coverage) / 2
+            # Same hyperparameters as the point model, if a search picked them
+            lower_model = self.backend.build_quantile(tail).set_params(**self.best_params)
+            upper_model = self.backend.build_quantile(1 - tail).set_params(**self.best_params)
+            return QuantileIntervalRegressor.from_fitted(
+                model,
+                self.backend.fit(lower_model, X_train, y_train),
+                self.backend.fit(upper_model, X_train, y_train),
+                coverage,
+            )
+
+        if strategy == "conformal":
+            return ConformalIntervalRegressor(model, coverage).calibrate(X_test, y_test)
+
+        raise ValueError(f"Unknown prediction interval: {strategy}")
+
+    def _log_search_candidates(self, candidates: list, metric_name: str) -> None:
+        """Log each search candidate as a nested MLFlow run of the active run."""
+        if mlflow.active_run() is None:
+            return
+
+        best_index = int(np.argmax([mean for _, mean, _ in candidates]))
+        for i, (params, mean, std) in enumerate(candidates):
+            with mlflow.start_run(
+                run_name=f"{self.model_name}_candidate_{i}", nested=True
+            ):
+                mlflow.log_params(params)
+                mlflow.log_metrics(
+                    {f"{metric_name}_mean": float(mean), f"{metric_name}_std": float(std)}
+                )
+                mlflow.set_tag("best_candidate", str(i == best_index))
+
+    def load_row_hashes(self, data_path: Path) -> Optional[np.ndarray]:
+        """Load the raw row hashes written next to the training dataset, if any."""
+        row_hashes_path = data_path.parent / ROW_HASHES_FILE
+        if not row_hashes_path.exists():
+            return None
+        return np.load(row_hashes_path)
+
+    def load_previous_model(self, models_dir: Path) -> Optional[PreviousModel]:
+        """Load the latest saved model that has warm start metadata."""
+        for model_path in sorted(models_dir.glob("*.pkl"), reverse=True):
+            metadata_path = model_path.with_suffix(".json")
+            if not metadata_path.exists():
+                continue
+
+            rows_path = model_path.parent / f"{model_path.stem}_rows.npy"
+            preprocessor_path = model_path.parent / f"{model_path.stem}_preprocessor.joblib"
+
+            self.logger.info(f"Loaded previous model {model_path.name} for warm start")
+            return PreviousModel(
+                path=model_path,
+                model=joblib.load(model_path),
+                metadata=json.loads(metadata_path.read_text()),
+                row_hashes=np.load(rows_path) if rows_path.exists() else None,
+                preprocessor=joblib.load(preprocessor_path) if preprocessor_path.exists() else None,
+            )
+
+        self.logger.info(f"No previous model found in {models_dir}, training from scratch")
+        return None
+
+    def warm_start_model(
+        self,
+        previous: PreviousModel,
+        X_train: pd.DataFrame,
+        y_train: pd.Series,
+        train_hashes: Optional[np.ndarray],
+        preprocessor_path: Path,
+        X_test: Optional[pd.DataFrame] = None,
+        y_test: Optional[pd.Series] = None,
+        test_hashes: Optional[np.ndarray] = None,
+    ) -> Optional[RegressorMixin]:
+        """
+        Continue fitting the previous model with the new or changed rows.
+
+        Returns None when a full retrain is needed: backend, model type, feature
+        schema or preprocessor statistics changed, too many rows are new, the
+        new rows drifted away from the ones the previous model already saw, or
+        the warm started model does worse than the previous one on the test
+        rows neither of them trained on. Without new rows the previous model is
+        returned as is, unless it does worse on those test rows than it logged.
+        """
+        def fall_back(reason: str) -> None:
+            self.logger.warning(f"Warm start not possible, full retrain: {reason}")
+            return None
+
+        # The prediction interval, if any, is fitted again on top of the result
+        previous_model = point_model(previous.model)
+        if not self.backend.supports_warm_start:
+            return fall_back(f"backend {self.backend.name} does not support warm start")
+        if previous.metadata.get("backend") != self.backend.name:
+            return fall_back(f"backend changed from {previous.metadata.get('backend')}")
+        if type(previous_model) is not type(self.backend.build()):
+            return fall_back(f"model type {type(previous_model).__name__} cannot be warm started")
+        if previous.metadata.get("feature_names") != list(X_train.columns):
+            return fall_back("feature schema changed")
+        if previous.preprocessor is None or not preprocessor_path.exists():
+            return fall_back("preprocessor not available")
+
+        preprocessor = joblib.load(preprocessor_path)
+        if self._preprocessor_changed(previous.preprocessor, preprocessor):
+            return fall_back("preprocessor statistics changed")
+
+        if previous.row_hashes is None or train_hashes is None:
+            return fall_back("row hashes not available")
+
+        # Rows neither the previous model nor the warm fit train on, to check the result
+        if X_test is None or y_test is None or test_hashes is None:
+            return fall_back("no test rows to check the warm started model on")
+        unseen = ~np.isin(test_hashes, previous.row_hashes)
+        if unseen.sum() < self.config.warm_start_min_check_rows:
+            return fall_back(
+                f"only {int(unseen.sum())} unseen test rows to check the warm started model "
+                f"(< {self.config.warm_start_min_check_rows})"
+            )
+        X_check, y_check = X_test[unseen], y_test[unseen]
+        # Before the warm fit, which continues the previous model in place
+        previous_mae = regression_metrics(y_check, previous_model.predict(X_check))["mae"]
+        tolerance = 1 + self.config.warm_start_mae_tolerance
+
+        is_new = ~np.isin(train_hashes, previous.row_hashes)
+        self.warm_start_new_rows = int(is_new.sum())
+        new_fraction = is_new.mean()
         self.logger.info(
-            f"Cross-validation R² scores: {cv_scores.mean():.3f} ± {cv_scores.std():.3f}"
+            f"{self.warm_start_new_rows} new or changed rows ({new_fraction:.1%} of training set)"
         )
 
-        # Fit model
-        model.fit(X_train, y_train)
+        if not is_new.any():
+            # Reused as is only if it still does as well as logged on rows it never saw
+            logged_mae = previous.metadata.get("metrics", {}).get("mae")
+            if logged_mae is not None and previous_mae > logged_mae * tolerance:
+                return fall_back(
+                    f"previous model MAE {previous_mae:.2f} on {len(y_check)} unseen test rows "
+                    f"> its logged {logged_mae:.2f}"
+                )
+            self.logger.info("No new rows, reusing previous model as is")
+            self.fit_time_s = 0.0
+            return previous_model
+        if new_fraction > self.config.warm_start_max_new_fraction:
+            return fall_back(
+                f"{new_fraction:.1%} new rows > {self.config.warm_start_max_new_fraction:.1%}"
+            )
+
+        # Only numeric features, one-hot means are too noisy on a few new rows
+        numeric_input_columns = {
+            name: columns for name, _, columns in preprocessor.transformers_
+        }["numeric"]
+        numeric_columns = [col for col in numeric_input_columns if col in X_train.columns]
+        if (~is_new).any():
+            drift_columns = detect_distribution_drift(
+                X_train.loc[~is_new], X_train.loc[is_new], columns=numeric_columns
+            ).drifted_columns
+            if drift_columns:
+                return fall_back(f"drift detected in new rows: {drift_columns}")
+
+        start = time.perf_counter()
+        model = self.backend.warm_fit(
+            previous_model, X_train, y_train, X_train[is_new], y_train[is_new]
+        )
+        self.fit_time_s = time.perf_counter() - start
+
+        warm_mae = regression_metrics(y_check, model.predict(X_check))["mae"]
+        self.logger.info(
+            f"Warm started {previous.path.name} in {self.fit_time_s:.2f}s, MAE {warm_mae:.2f} "
+            f"vs previous {previous_mae:.2f} on {len(y_check)} unseen test rows"
+        )
+        if warm_mae > previous_mae * tolerance:
+            return fall_back(
+                f"warm started model MAE {warm_mae:.2f} > previous model {previous_mae:.2f}"
+            )
         return model
 
+    def _preprocessor_changed(self, previous, current) -> bool:
+        """Check whether features or scaling differ between two fitted preprocessors."""
+        if list(previous.get_feature_names_out()) != list(current.get_feature_names_out()):
+            return True
+
+        previous_scaler = previous.named_transformers_["numeric"].named_steps["scaler"]
+        current_scaler = current.named_transformers_["numeric"].named_steps["scaler"]
+        rtol = self.config.warm_start_scaler_rtol
+        return not (
+            np.allclose(previous_scaler.mean_, current_scaler.mean_, rtol=rtol)
+            and np.allclose(previous_scaler.scale_, current_scaler.scale_, rtol=rtol)
+        )
+
     def evaluate_model(
-        self, model: ElasticNet, X_test: pd.DataFrame, y_test: pd.Series
+        self, model: RegressorMixin, X_test: pd.DataFrame, y_test: pd.Series
     ) -> dict:
         """Evaluate model performance."""
         y_pred = model.predict(X_test)
+        return regression_metrics(y_test, y_pred)
 
-        metrics = {
-            "mae": mean_absolute_error(y_test, y_pred),
-            "rmse": np.sqrt(mean_squared_error(y_test, y_pred)),
-            "r2": r2_score(y_test, y_pred),
-            "mape": np.mean(np.abs((y_test - y_pred) / y_test))
-            * 100,  # Mean Absolute Percentage Error
-        }
-
-        return metrics
-
-    def save_model(self, model: ElasticNet, models_dir: Path) -> Path:
-        """Save model with timestamp."""
+    def save_model(
+        self,
+        model: RegressorMixin,
+        models_dir: Path,
+        metadata: Optional[dict] = None,
+        row_hashes: Optional[np.ndarray] = None,
+        preprocessor_path: Optional[Path] = None,
+    ) -> Path:
+        """
+        Save model with timestamp.
+
+        Metadata, training row hashes and the preprocessor are saved next to it
+        as `<stem>.json`, `<stem>_rows.npy` and `<stem>_preprocessor.joblib` so
+        the next run can warm start from this model.
+        """
         models_dir.mkdir(parents=True, exist_ok=True)
         timestamp = time.strftime("%Y%m%d_%H%M%S")
         model_path = models_dir / f"{timestamp}_{self.model_name}.pkl"
 
         joblib.dump(model, model_path)
+
+        if metadata is not None:
+            model_path.with_suffix(".json").write_text(json.dumps(metadata, indent=2))
+        if row_hashes is not None:
+            np.save(models_dir / f"{model_path.stem}_rows.npy", row_hashes)
+        if preprocessor_path is not None and preprocessor_path.exists():
+            shutil.copy(preprocessor_path, models_dir / f"{model_path.stem}_preprocessor.joblib")
+
         self.logger.info(f"Model saved to {model_path}")
         return model_path
 
+    def _warm_start_report(
+        self,
+        previous: PreviousModel,
+        metrics: dict,
+        warm_started: bool,
+        train_time_s: float,
+        full_train_time_s: float,
+    ) -> dict:
+        """Report time saved against a full retrain and metric deltas against the previous model."""
+        report = {
+            "warm_started": float(warm_started),
+            "warm_start_new_rows": float(self.warm_start_new_rows),
+            "time_saved_s": full_train_time_s - train_time_s if warm_started else 0.0,
+        }
+
+        previous_metrics = previous.metadata.get("metrics", {})
+        for name in ("mae", "rmse", "r2", "mape"):
+            if name in previous_metrics:
+                report[f"delta_{name}"] = float(metrics[name]) - previous_metrics[name]
+
+        self.logger.info(f"Warm start report: {report}")
+        return report
+
     def train_and_evaluate_model(self, train_data_path: Path, models_dir: Path) -> str:
         """Complete training pipeline with MLFlow logging."""
         try:
@@ -126,43 +545,134 @@ class RegressionTrainer:
             X, y = self.load_and_validate_data(train_data_path)
             X_train, X_test, y_train, y_test = self.split_data(X, y)
 
+            row_hashes = self.load_row_hashes(train_data_path)
+            train_hashes = (
+                row_hashes[X_train.index.to_numpy()] if row_hashes is not None else None
+            )
+            test_hashes = (
+                row_hashes[X_test.index.to_numpy()] if row_hashes is not None else None
+            )
+            preprocessor_path = train_data_path.parent / PREPROCESSOR_FILE
+            previous = (
+                self.load_previous_model(models_dir) if self.config.warm_start else None
+            )
+
             with mlflow.start_run(run_name=f"{self.model_name}_regression_training") as run:
                 # Log parameters
                 mlflow.log_params(
                     {
-                        "alpha": self.config.alpha,
-                        "l1_ratio": self.config.l1_ratio,
+                        "backend": self.backend.name,
+                        "n_threads": self.config.n_threads,
+                        **{
+                            name: getattr(self.config, name)
+                            for name in self.backend.param_grid()
+                        },
                         "test_size": self.config.test_size,
                         "random_state": self.config.random_state,
+                        "cv_folds": self.config.cv_folds,
+                        "n_jobs": self.config.n_jobs,
+                        "search_strategy": self.config.search_strategy,
+                        "cv_reuse": self.config.cv_reuse,
+                        "warm_start": self.config.warm_start,
+                        "prediction_interval": self.config.prediction_interval,
+                        "interval_coverage": self.config.interval_coverage,
                         "n_features": X_train.shape[1],
                         "n_samples": X_train.shape[0],
                     }
                 )
 
+                if self.drift_report is not None:
+                    self.drift_report.log_to_mlflow()
+
                 # Train model
-                model = self.train_model(X_train, y_train)
+                start = time.perf_counter()
+                model = None
+                if previous is not None:
+                    model = self.warm_start_model(
+                        previous,
+                        X_train,
+                        y_train,
+                        train_hashes,
+                        preprocessor_path,
+                        X_test,
+                        y_test,
+                        test_hashes,
+                    )
+                warm_started = model is not None
+                if model is None:
+                    model = self.train_model(X_train, y_train)
+                train_time_s = time.perf_counter() - start
+
+                # A warm started or reused model also trained on the rows of earlier runs,
+                # part of the test split. It is evaluated and calibrated on the others only
+                # and the rows it saved cover every row it was fitted on
+                X_eval, y_eval, trained_hashes = X_test, y_test, train_hashes
+                if warm_started:
+                    unseen = ~np.isin(test_hashes, previous.row_hashes)
+                    X_eval, y_eval = X_test[unseen], y_test[unseen]
+                    trained_hashes = np.union1d(previous.row_hashes, train_hashes)
+                    mlflow.log_param("n_eval_samples", len(y_eval))
+
+                # Log the hyperparameters picked by the search, if any
+                if self.best_params:
+                    mlflow.log_params(
+                        {f"best_{name}": value for name, value in self.best_params.items()}
+                    )
 
                 # Evaluate model
-                metrics = self.evaluate_model(model, X_test, y_test)
-
-                # Log metrics
-                for metric_name, metric_value in metrics.items():
-                    mlflow.log_metric(metric_name, float(metric_value))
+                metrics = self.evaluate_model(model, X_eval, y_eval)
+
+                # Wrap the model with its prediction interval, served in the same call.
+                # The coverage of a conformal interval is measured on its own
+                # calibration set, so it only checks the quantiles were computed right
+                if self.config.prediction_interval:
+                    model = self.fit_prediction_interval(model, X_train, y_train, X_eval, y_eval)
+                    _, lower, upper = model.predict_interval(X_eval)
+                    metrics.update(interval_metrics(y_eval, lower, upper))
+
+                # Training time/throughput and inference latency report
+                metrics.update(
+                    {
+                        "train_time_s": train_time_s,
+                        "fit_time_s": self.fit_time_s,
+                        "fit_rows_per_s": X_train.shape[0] / self.fit_time_s
+                        if self.fit_time_s > 0
+                        else 0.0,
+                    }
+                )
+                metrics.update(measure_inference_latency(model, X_test))
+
+                # Time saved and metric deltas against the previous model
+                full_train_time_s = train_time_s
+                if previous is not None:
+                    if warm_started:
+                        full_train_time_s = previous.metadata.get("full_train_time_s", train_time_s)
+                    metrics.update(
+                        self._warm_start_report(
+                            previous, metrics, warm_started, train_time_s, full_train_time_s
+                        )
+                    )
+
+                # Log metrics, in one request
+                mlflow.log_metrics({name: float(value) for name, value in metrics.items()})
 
                 self.logger.info(f"Validation metrics: {metrics}")
 
-                # Save model locally
-                model_path = self.save_model(model, models_dir)
-
-                # Infer the model signature
-                signature = infer_signature(X_train, model.predict(X_train))
+                # Infer the model signature from a sample, the schema is the same
+                X_sample = X_train.head(self.config.signature_sample_size)
+                signature = infer_signature(X_sample, model.predict(X_sample))
 
-                # Log model to MLFlow
+                # Log model to MLFlow. Registration is left to the validation gate
+                # when deferred, or when logging to the fallback store until synced
+                register = (
+                    not self.mlflow_config.defer_registration
+                    and self.tracking_uri == self.mlflow_config.tracking_uri
+                )
                 model_info = mlflow_sklearn.log_model(
                     sk_model=model,
                     signature=signature,
-                    input_example=X_train.head(10),
-                    registered_model_name=self.mlflow_config.registered_model_name,
+                    input_example=X_train.head(10) if self.mlflow_config.log_input_example else None,
+                    registered_model_name=self.mlflow_config.registered_model_name if register else None,
                 )
 
                 # Set a tag that we can use to remind ourselves what this model was for
@@ -173,6 +683,28 @@ class RegressionTrainer:
                     },
                 )
 
+                # Save model locally, with what the next run needs to warm start
+                model_path = self.save_model(
+                    model,
+                    models_dir,
+                    metadata={
+                        "run_id": run.info.run_id,
+                        "tracking_uri": self.tracking_uri,
+                        "model_uri": model_info.model_uri,
+                        "backend": self.backend.name,
+                        "test_size": self.config.test_size,
+                        "random_state": self.config.random_state,
+                        "feature_names": list(X_train.columns),
+                        "warm_started": warm_started,
+                        "prediction_interval": self.config.prediction_interval,
+                        "train_time_s": train_time_s,
+                        "full_train_time_s": full_train_time_s,
+                        "metrics": {name: float(value) for name, value in metrics.items()},
+                    },
+                    row_hashes=trained_hashes,
+                    preprocessor_path=preprocessor_path,
+                )
+
                 # Log model artifact
                 # mlflow.log_artifact(str(model_path))
 
@@ -0,0 +1,47 @@
+"""Inference benchmarking utilities."""
+
+import time
+import numpy as np
+import pandas as pd
+
+
+def measure_inference_latency(
+    model, X: pd.DataFrame, n_single: int = 200, n_batch: int = 5
+) -> dict:
+    """
+    Benchmark batch throughput and single-row latency of a fitted model.
+
+    Args:
+        model: Fitted estimator exposing `predict`.
+        X: Rows to predict on, usually the held-out set.
+        n_single: Number of single-row predictions to time.
+        n_batch: Number of full-batch predictions to time (best one is kept).
+
+    Returns:
+        dict: Latency metrics in milliseconds and rows per second.
+    """
+    # Warm-up so lazy initialisation does not count against the model
+    model.predict(X.iloc[:1])
+
+    batch_times = []
+    for _ in range(n_batch):
+        start = time.perf_counter()
+        model.predict(X)
+        batch_times.append(time.perf_counter() - start)
+    batch_time = min(batch_times)
+
+    single_times = np.empty(n_single)
+    for i in range(n_single):
+        row = X.iloc[[i % len(X)]]
+        start = time.perf_counter()
+        model.predict(row)
+        single_times[i] = time.perf_counter() - start
+    single_times *= 1000
+
+    return {
+        "predict_batch_ms": batch_time * 1000,
+        "predict_rows_per_s": len(X) / batch_time if batch_time > 0 else float("inf"),
+        "predict_single_p50_ms": float(np.percentile(single_times, 50)),
+        "predict_single_p95_ms": float(np.percentile(single_times, 95)),
+        "predict_single_p99_ms": float(np.percentile(single_times, 99)),
+    }
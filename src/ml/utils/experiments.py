@@ -1,4 +1,25 @@
+import json
+import tempfile
+import mlflow
+import mlflow.sklearn as mlflow_sklearn
+import requests
 from pathlib import Path
+from typing import Optional
+from mlflow import MlflowClient
+from mlflow.entities import Param
+from mlflow.models import Model
+from ml.config.config import MLFlowConfig
+from utils.logging_utils import setup_logger
+
+
+# Tag of a fallback run already copied to the tracking server, holding the server run id
+SYNCED_TAG = "synced_run_id"
+PARENT_RUN_TAG = "mlflow.parentRunId"
+
+# Most metrics or params per log_batch request accepted by the server
+BATCH_SIZE = 100
+
+logger = setup_logger(__name__)
 
 
 def extract_experiment_run_name(model_path: Path) -> str:
@@ -11,4 +32,149 @@ def extract_experiment_run_name(model_path: Path) -> str:
     if len(parts) == 3:
         ts_date, ts_time, model_name = parts
         return f"{model_name}_{ts_date}_{ts_time}"
-    return stem  # fallback: just use the filename stem
\ No newline at end of file
+    return stem  # fallback: just use the filename stem
+
+
+def local_tracking_uri(local_dir: Path) -> str:
+    return Path(local_dir).resolve().as_uri()
+
+
+def tracking_server_available(tracking_uri: str, timeout_s: float = 5.0) -> bool:
+    """Whether an HTTP tracking server answers its health check, always True for local stores."""
+    if not tracking_uri.startswith(("http://", "https://")):
+        return True
+    try:
+        return requests.get(f"{tracking_uri.rstrip('/')}/health", timeout=timeout_s).ok
+    except requests.RequestException:
+        return False
+
+
+def resolve_tracking_uri(config: MLFlowConfig) -> str:
+    """
+    The configured tracking URI, or the local fallback file store when one is
+    configured and the server does not answer within the health check timeout.
+    """
+    if config.local_fallback_dir is None or tracking_server_available(
+        config.tracking_uri, config.health_check_timeout_s
+    ):
+        return config.tracking_uri
+
+    fallback_uri = local_tracking_uri(config.local_fallback_dir)
+    logger.warning(
+        f"Tracking server {config.tracking_uri} unreachable, logging to {fallback_uri} "
+        "until the runs are synced"
+    )
+    return fallback_uri
+
+
+def sync_local_runs(
+    local_dir: Path, tracking_uri: str, models_dir: Optional[Path] = None
+) -> dict[str, str]:
+    """
+    Copy the finished runs of the local fallback store to the tracking server.
+
+    Params, full metric histories, tags, artifacts and logged models are
+    copied, nested runs keep their parent. Copied runs are tagged in the
+    local store so a sync is never repeated. The model metadata JSON files
+    in `models_dir` written by these runs are pointed at the server runs.
+
+    Args:
+        local_dir: Fallback store directory, see `MLFlowConfig.local_fallback_dir`.
+        tracking_uri: Tracking server to copy the runs to.
+        models_dir: Directory of the models saved by the trainer.
+
+    Returns:
+        Server run id of each run copied, by local run id.
+    """
+    if not Path(local_dir).exists():
+        return {}
+
+    local = MlflowClient(local_tracking_uri(local_dir))
+    remote = MlflowClient(tracking_uri)
+    synced: dict[str, str] = {}
+    model_uris: dict[str, str] = {}
+
+    previous_uri = mlflow.get_tracking_uri()
+    mlflow.set_tracking_uri(tracking_uri)
+    try:
+        for experiment in local.search_experiments():
+            runs = [
+                run
+                for run in local.search_runs(
+                    [experiment.experiment_id], order_by=["attributes.start_time ASC"]
+                )
+                if run.info.status == "FINISHED" and SYNCED_TAG not in run.data.tags
+            ]
+            if not runs:
+                continue
+
+            remote_experiment = remote.get_experiment_by_name(experiment.name)
+            experiment_id = (
+                remote_experiment.experiment_id
+                if remote_experiment is not None
+                else remote.create_experiment(experiment.name)
+            )
+
+            # Oldest first, so a parent run is copied before its nested runs
+            for run in runs:
+                tags = dict(run.data.tags)
+                if PARENT_RUN_TAG in tags:
+                    tags[PARENT_RUN_TAG] = synced.get(tags[PARENT_RUN_TAG], tags[PARENT_RUN_TAG])
+                remote_run = remote.create_run(
+                    experiment_id,
+                    start_time=run.info.start_time,
+                    tags=tags,
+                    run_name=run.info.run_name,
+                )
+                run_id = remote_run.info.run_id
+
+                params = [Param(key, value) for key, value in run.data.params.items()]
+                metrics = [
+                    metric
+                    for key in run.data.metrics
+                    for metric in local.get_metric_history(run.info.run_id, key)
+                ]
+                for i in range(0, max(len(params), len(metrics)), BATCH_SIZE):
+                    remote.log_batch(
+                        run_id,
+                        metrics=metrics[i : i + BATCH_SIZE],
+                        params=params[i : i + BATCH_SIZE],
+                    )
+
+                with tempfile.TemporaryDirectory() as tmp:
+                    artifacts_dir = local.download_artifacts(run.info.run_id, "", tmp)
+                    if any(Path(artifacts_dir).iterdir()):
+                        remote.log_artifacts(run_id, artifacts_dir)
+
+                for logged_model in local.search_logged_models(
+                    experiment_ids=[experiment.experiment_id],
+                    filter_string=f"source_run_id = '{run.info.run_id}'",
+                ):
+                    with mlflow.start_run(run_id=run_id):
+                        model_info = mlflow_sklearn.log_model(
+                            sk_model=mlflow_sklearn.load_model(logged_model.artifact_location),
+                            name=logged_model.name,
+                            signature=Model.load(logged_model.artifact_location).signature,
+                        )
+                    model_uris[f"models:/{logged_model.model_id}"] = model_info.model_uri
+
+                remote.set_terminated(run_id, status=run.info.status, end_time=run.info.end_time)
+                local.set_tag(run.info.run_id, SYNCED_TAG, run_id)
+                synced[run.info.run_id] = run_id
+                logger.info(f"Synced run {run.info.run_id} to {tracking_uri} as {run_id}")
+    finally:
+        mlflow.set_tracking_uri(previous_uri)
+
+    if models_dir is not None and synced:
+        for metadata_path in models_dir.glob("*.json"):
+            metadata = json.loads(metadata_path.read_text())
+            if metadata.get("run_id") not in synced:
+                continue
+            metadata["local_run_id"] = metadata["run_id"]
+            metadata["run_id"] = synced[metadata["run_id"]]
+            metadata["tracking_uri"] = tracking_uri
+            if metadata.get("model_uri") in model_uris:
+                metadata["model_uri"] = model_uris[metadata["model_uri"]]
+            metadata_path.write_text(json.dumps(metadata, indent=2))
+
+    return synced
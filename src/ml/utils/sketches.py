@@ -0,0 +1,100 @@
+"""Mergeable summaries of value distributions."""
+
+import numpy as np
+from typing import Iterable, Optional
+
+
+class TDigest:
+    """
+    Merging t-digest of a set of values, for approximate quantiles.
+
+    The values are summarized by centroids (mean, weight), small near the
+    tails and larger around the median, following the k1 scale function of
+    Dunning & Ertl: a centroid spans at most one unit of
+    `compression / (2π) · asin(2q - 1)`. Digests of disjoint sets merge into
+    the digest of their union, so quantiles of any roll-up can be computed
+    from per-group digests without the rows. Accuracy is best in the tails,
+    with relative rank errors around 1 / compression around the median.
+
+    Args:
+        compression: Accuracy parameter, the digest keeps about compression / 2 centroids.
+        means: Centroid means.
+        weights: Centroid weights, same length as `means`.
+        min_value, max_value: Extremes of the summarized values.
+    """
+
+    def __init__(
+        self,
+        compression: float = 100.0,
+        means: Optional[np.ndarray] = None,
+        weights: Optional[np.ndarray] = None,
+        min_value: float = np.nan,
+        max_value: float = np.nan,
+    ):
+        self.compression = compression
+        self.means = np.asarray(means if means is not None else [], dtype=np.float64)
+        self.weights = np.asarray(weights if weights is not None else [], dtype=np.float64)
+        self.min_value = min_value
+        self.max_value = max_value
+
+    @classmethod
+    def from_values(cls, values, compression: float = 100.0) -> "TDigest":
+        """Digest of the values, NaNs are ignored."""
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return cls(compression)
+        return cls(compression)._compressed(values, np.ones(len(values)), values.min(), values.max())
+
+    @classmethod
+    def merge_all(cls, digests: Iterable["TDigest"], compression: Optional[float] = None) -> "TDigest":
+        """Digest of the union of the values summarized by `digests`."""
+        digests = [digest for digest in digests if digest.count > 0]
+        if compression is None:
+            compression = max((digest.compression for digest in digests), default=100.0)
+        if not digests:
+            return cls(compression)
+        return cls(compression)._compressed(
+            np.concatenate([digest.means for digest in digests]),
+            np.concatenate([digest.weights for digest in digests]),
+            min(digest.min_value for digest in digests),
+            max(digest.max_value for digest in digests),
+        )
+
+    def merge(self, other: "TDigest") -> "TDigest":
+        return TDigest.merge_all([self, other], max(self.compression, other.compression))
+
+    @property
+    def count(self) -> float:
+        return float(self.weights.sum())
+
+    def quantile(self, q: float) -> float:
+        return float(self.quantiles([q])[0])
+
+    def quantiles(self, qs) -> np.ndarray:
+        """Approximate quantiles, interpolated between centroids and the extremes."""
+        qs = np.asarray(qs, dtype=np.float64)
+        if self.count == 0:
+            return np.full(qs.shape, np.nan)
+        # Centroid means sit at the middle of their cumulative weight
+        cumulative = np.cumsum(self.weights)
+        ranks = np.concatenate([[0.0], cumulative - self.weights / 2, [cumulative[-1]]])
+        values = np.concatenate([[self.min_value], self.means, [self.max_value]])
+        return np.interp(qs * cumulative[-1], ranks, values)
+
+    def _compressed(self, means, weights, min_value, max_value) -> "TDigest":
+        """Digest of the weighted points, merged into centroids along the scale function."""
+        order = np.argsort(means, kind="stable")
+        means, weights = means[order], weights[order]
+
+        # Each point goes to the unit of the scale function its middle rank falls in,
+        # consecutive points of the same unit form one centroid
+        total = weights.sum()
+        q = (np.cumsum(weights) - weights / 2) / total
+        k = self.compression / (2 * np.pi) * np.arcsin(2 * q - 1)
+        units = np.floor(k - k[0]).astype(np.int64)
+        starts = np.flatnonzero(np.diff(units, prepend=units[0] - 1))
+
+        centroid_weights = np.add.reduceat(weights, starts)
+        centroid_means = np.add.reduceat(means * weights, starts) / centroid_weights
+        return TDigest(self.compression, centroid_means, centroid_weights, min_value, max_value)
@@ -0,0 +1,395 @@
+"""Vectorized column statistics and drift tests.
+
+Everything is computed column-wise with NumPy over row chunks, so wide frames
+(thousands of one-hot columns) are handled without a Python loop over columns
+and without materialising the whole frame as float64. Drift detection reads
+each frame once: the statistics and the histograms come from the same chunks,
+only the quantile bin edges are taken from a row sample of the reference first.
+Frames larger than `DRIFT_SAMPLE_ROWS` are compared on a row sample, so the
+cost of a drift check does not grow with the number of rows.
+"""
+
+import mlflow
+import numpy as np
+import pandas as pd
+from dataclasses import dataclass, field
+from typing import Iterator, List, Optional, Tuple
+
+
+# Target size of one float64 chunk, keeps peak memory bounded on wide frames
+CHUNK_BYTES = 256 * 1024 * 1024
+
+PSI_EPSILON = 1e-6
+
+# Reference rows the quantile bin edges are computed on, enough to put every bin
+# within about half a percent of its share, the bins are counted on more rows
+QUANTILE_SAMPLE_ROWS = 10_000
+# Rows of each frame the drift tests run on, the sampling noise of the KS statistic
+# is then about 0.01 and the KS critical values are computed on the sampled counts
+DRIFT_SAMPLE_ROWS = 50_000
+
+
+@dataclass
+class ColumnStats:
+    """Per-column statistics, each attribute is an array aligned with `columns`."""
+    columns: List[str]
+    count: np.ndarray
+    nan_count: np.ndarray
+    mean: np.ndarray
+    std: np.ndarray
+    min: np.ndarray
+    max: np.ndarray
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame(
+            {
+                "count": self.count,
+                "nan_count": self.nan_count,
+                "mean": self.mean,
+                "std": self.std,
+                "min": self.min,
+                "max": self.max,
+            },
+            index=self.columns,
+        )
+
+
+@dataclass
+class DriftReport:
+    """Result of `detect_distribution_drift`, arrays are aligned with `columns`."""
+    columns: List[str]
+    psi: np.ndarray
+    ks: np.ndarray
+    reference_mean: np.ndarray
+    current_mean: np.ndarray
+    # Two-sample KS critical value of each column at `ks_alpha`, from its non-NaN counts
+    ks_critical: np.ndarray
+    psi_threshold: float
+    ks_threshold: float
+    ks_alpha: float
+    n_bins: int
+    max_rows: Optional[int] = None
+    drifted: np.ndarray = field(init=False)
+
+    def __post_init__(self):
+        # On small samples the KS statistic of identical distributions is about as large
+        # as the threshold, so a column is only flagged above its critical value as well
+        self.drifted = (self.psi > self.psi_threshold) | (
+            self.ks > np.maximum(self.ks_threshold, self.ks_critical)
+        )
+
+    @property
+    def drifted_columns(self) -> List[str]:
+        return [col for col, drifted in zip(self.columns, self.drifted) if drifted]
+
+    def summary(self) -> dict:
+        """Scalar metrics summarising the report."""
+        return {
+            "drift_n_columns": float(self.drifted.sum()),
+            "drift_max_psi": float(self.psi.max()) if len(self.psi) else 0.0,
+            "drift_max_ks": float(self.ks.max()) if len(self.ks) else 0.0,
+        }
+
+    def to_dict(self) -> dict:
+        return {
+            "psi_threshold": self.psi_threshold,
+            "ks_threshold": self.ks_threshold,
+            "ks_alpha": self.ks_alpha,
+            "n_bins": self.n_bins,
+            "max_rows": self.max_rows,
+            **self.summary(),
+            "drifted_columns": self.drifted_columns,
+            "columns": {
+                col: {
+                    "psi": float(self.psi[i]),
+                    "ks": float(self.ks[i]),
+                    "ks_critical": float(self.ks_critical[i]),
+                    "reference_mean": float(self.reference_mean[i]),
+                    "current_mean": float(self.current_mean[i]),
+                }
+                for i, col in enumerate(self.columns)
+            },
+        }
+
+    def log_to_mlflow(self, artifact_file: str = "drift_report.json") -> None:
+        """Log the summary as metrics and the full report as a JSON artifact of the active run."""
+        mlflow.log_metrics(self.summary())
+        mlflow.log_dict(self.to_dict(), artifact_file)
+
+
+def _numeric_columns(df: pd.DataFrame) -> List[str]:
+    return list(df.select_dtypes(include=["number", "bool"]).columns)
+
+
+def _iter_chunks(
+    df: pd.DataFrame, columns: List[str], rows: Optional[np.ndarray] = None
+) -> Iterator[np.ndarray]:
+    """Yield float64 row chunks of the given columns, of every row or of the `rows` positions."""
+    positions = df.columns.get_indexer(columns)
+    n_rows = len(df) if rows is None else len(rows)
+    rows_per_chunk = max(1, CHUNK_BYTES // (8 * max(1, len(columns))))
+    for start in range(0, n_rows, rows_per_chunk):
+        chunk_rows = (
+            slice(start, start + rows_per_chunk)
+            if rows is None
+            else rows[start : start + rows_per_chunk]
+        )
+        yield df.iloc[chunk_rows, positions].to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+def _sample_rows(n_rows: int, max_rows: Optional[int]) -> Optional[np.ndarray]:
+    """Sorted positions of `max_rows` random rows, None to keep all of them."""
+    if max_rows is None or n_rows <= max_rows:
+        return None
+    return np.sort(np.random.default_rng(0).choice(n_rows, max_rows, replace=False))
+
+
+def compute_column_stats(df: pd.DataFrame, columns: Optional[List[str]] = None) -> ColumnStats:
+    """
+    Compute count, NaN count, mean, std, min and max of every numeric column in one pass.
+
+    Chunk means and variances are merged with Chan's parallel algorithm, so the
+    result is numerically stable whatever the number of chunks.
+    """
+    columns = columns if columns is not None else _numeric_columns(df)
+    return _scan_columns(df, columns)[0]
+
+
+def quantile_edges(
+    df: pd.DataFrame,
+    columns: List[str],
+    n_bins: int,
+    sample_rows: int = QUANTILE_SAMPLE_ROWS,
+) -> np.ndarray:
+    """
+    Inner edges of `n_bins` equal-frequency bins of every column, on a row sample.
+
+    Columns with fewer distinct values than bins (one-hot columns) get repeated
+    edges, their empty bins weigh nothing in the PSI and KS.
+
+    Returns:
+        np.ndarray: Edges of shape (n_columns, n_bins - 1), NaN for all-NaN columns.
+    """
+    rows = _sample_rows(len(df), sample_rows)
+    if rows is not None:
+        df = df.iloc[rows]
+    values = df.iloc[:, df.columns.get_indexer(columns)].to_numpy(
+        dtype=np.float64, na_value=np.nan
+    )
+    edges = np.full((len(columns), n_bins - 1), np.nan)
+    if len(values) == 0:
+        return edges
+
+    # One sort of the sample instead of np.nanquantile, several times slower on wide
+    # frames. NaNs are sorted last, the quantiles are interpolated like numpy's
+    values = np.sort(values, axis=0)
+    valid = len(values) - np.isnan(values).sum(axis=0)
+    quantiles = np.linspace(0.0, 1.0, n_bins + 1)[1:-1]
+    position = quantiles * np.maximum(valid - 1, 0)[:, None]
+    lower = np.floor(position).astype(np.intp)
+    upper = np.ceil(position).astype(np.intp)
+    column = np.arange(len(columns))[:, None]
+    with np.errstate(invalid="ignore"):
+        edges = values[lower, column] + (values[upper, column] - values[lower, column]) * (
+            position - lower
+        )
+    edges[valid == 0] = np.nan
+    return edges
+
+
+def column_stats_and_histograms(
+    df: pd.DataFrame, columns: List[str], edges: np.ndarray, max_rows: Optional[int] = None
+) -> Tuple[ColumnStats, np.ndarray]:
+    """
+    Column statistics and histograms on the given bin edges, in a single pass.
+
+    A value lands in bin k when it is above k of the column's edges, values outside
+    the edges go to the edge bins and NaNs are ignored. With `max_rows`, both are
+    computed on that many random rows at most.
+
+    Returns:
+        Tuple[ColumnStats, np.ndarray]: Statistics and counts of shape (n_columns, n_bins).
+    """
+    return _scan_columns(df, columns, edges, _sample_rows(len(df), max_rows))
+
+
+def _scan_columns(
+    df: pd.DataFrame,
+    columns: List[str],
+    edges: Optional[np.ndarray] = None,
+    rows: Optional[np.ndarray] = None,
+    spread: bool = True,
+) -> Tuple[ColumnStats, Optional[np.ndarray]]:
+    # Without spread only the counts and means are computed, std, min and max are NaN
+    n_cols = len(columns)
+
+    count = np.zeros(n_cols)
+    nan_count = np.zeros(n_cols, dtype=np.int64)
+    mean = np.zeros(n_cols)
+    m2 = np.zeros(n_cols)
+    col_min = np.full(n_cols, np.inf)
+    col_max = np.full(n_cols, -np.inf)
+
+    if edges is not None:
+        # Values above each edge, only counted on the columns where the edge differs
+        # from the previous one, repeated edges (one-hot columns) reuse that count
+        above = np.zeros(edges.shape, dtype=np.int64)
+        edge_columns = [np.arange(n_cols)] + [
+            np.flatnonzero(edges[:, k] > edges[:, k - 1]) for k in range(1, edges.shape[1])
+        ]
+
+    for chunk in _iter_chunks(df, columns, rows):
+        # A NaN sum flags the only columns needing NaN handling, which is done on
+        # them alone instead of a full-width isnan and np.where
+        sums = chunk.sum(axis=0)
+        nan_columns = np.flatnonzero(~np.isfinite(sums))
+        nan_values = chunk[:, nan_columns]
+        nan_mask = np.isnan(nan_values)
+        chunk_nan = np.zeros(n_cols, dtype=np.int64)
+        chunk_nan[nan_columns] = nan_mask.sum(axis=0)
+        sums[nan_columns] = np.nansum(nan_values, axis=0)
+        chunk_count = chunk.shape[0] - chunk_nan
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            chunk_mean = np.where(chunk_count > 0, sums / chunk_count, 0.0)
+            total = count + chunk_count
+            delta = chunk_mean - mean
+            mean = np.where(total > 0, mean + delta * chunk_count / total, 0.0)
+
+            if spread:
+                centered = chunk - chunk_mean
+                chunk_m2 = np.einsum("ij,ij->j", centered, centered)
+                centered = np.where(nan_mask, 0.0, nan_values - chunk_mean[nan_columns])
+                chunk_m2[nan_columns] = np.einsum("ij,ij->j", centered, centered)
+                m2 = m2 + chunk_m2 + np.where(
+                    total > 0, delta**2 * count * chunk_count / total, 0.0
+                )
+
+        count = total
+        nan_count += chunk_nan
+        if spread:
+            # fmin/fmax skip NaNs, an all-NaN column keeps its infinite start value
+            col_min = np.fmin(col_min, np.fmin.reduce(chunk, axis=0))
+            col_max = np.fmax(col_max, np.fmax.reduce(chunk, axis=0))
+
+        if edges is not None:
+            for k, cols in enumerate(edge_columns):
+                if len(cols) == n_cols:
+                    above[:, k] += (chunk > edges[:, k]).sum(axis=0)
+                elif len(cols):
+                    above[cols, k] += (chunk[:, cols] > edges[cols, k]).sum(axis=0)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        std = np.where(count > 1, np.sqrt(m2 / np.maximum(count - 1, 1)), 0.0)
+
+    empty = count == 0
+    if not spread:
+        std = col_min = col_max = np.full(n_cols, np.nan)
+    stats = ColumnStats(
+        columns=columns,
+        count=count.astype(np.int64),
+        nan_count=nan_count,
+        mean=np.where(empty, np.nan, mean),
+        std=np.where(empty, np.nan, std),
+        min=np.where(empty, np.nan, col_min),
+        max=np.where(empty, np.nan, col_max),
+    )
+    if edges is None:
+        return stats, None
+
+    for k, cols in enumerate(edge_columns[1:], start=1):
+        repeated = np.ones(n_cols, dtype=bool)
+        repeated[cols] = False
+        above[repeated, k] = above[repeated, k - 1]
+    # Values up to each edge, the bins are the differences
+    counts = stats.count[:, None]
+    cumulative = np.hstack([np.zeros_like(counts), counts - above, counts])
+    return stats, np.diff(cumulative, axis=1)
+
+
+def population_stability_index(reference: np.ndarray, current: np.ndarray) -> np.ndarray:
+    """PSI of each row of two (n_columns, n_bins) histograms."""
+    p = _normalize(reference)
+    q = _normalize(current)
+    return ((q - p) * np.log(q / p)).sum(axis=1)
+
+
+def ks_statistic(reference: np.ndarray, current: np.ndarray) -> np.ndarray:
+    """Kolmogorov-Smirnov statistic of each row of two (n_columns, n_bins) histograms."""
+    p = np.cumsum(reference, axis=1) / np.maximum(reference.sum(axis=1, keepdims=True), 1)
+    q = np.cumsum(current, axis=1) / np.maximum(current.sum(axis=1, keepdims=True), 1)
+    return np.abs(p - q).max(axis=1)
+
+
+def _normalize(hist: np.ndarray) -> np.ndarray:
+    # Smooth empty bins so the PSI log term stays finite
+    hist = hist + PSI_EPSILON
+    return hist / hist.sum(axis=1, keepdims=True)
+
+
+def ks_critical_value(n_reference: np.ndarray, n_current: np.ndarray, alpha: float) -> np.ndarray:
+    """
+    Asymptotic two-sample KS critical value at significance `alpha`, infinite when a sample is empty.
+    """
+    c_alpha = np.sqrt(-np.log(alpha / 2) / 2)
+    n = np.asarray(n_reference, dtype=np.float64)
+    m = np.asarray(n_current, dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where((n > 0) & (m > 0), c_alpha * np.sqrt((n + m) / (n * m)), np.inf)
+
+
+def detect_distribution_drift(
+    reference: pd.DataFrame,
+    current: pd.DataFrame,
+    n_bins: int = 10,
+    psi_threshold: float = 0.2,
+    ks_threshold: float = 0.1,
+    ks_alpha: float = 0.01,
+    columns: Optional[List[str]] = None,
+    max_rows: Optional[int] = DRIFT_SAMPLE_ROWS,
+) -> DriftReport:
+    """
+    Compare the distribution of every numeric column of `current` against `reference`.
+
+    Both frames are binned on the reference quantiles, so skewed columns (prices,
+    surfaces) spread over every bin instead of piling up in the first equal-width
+    one, and compared with the Population Stability Index and the
+    Kolmogorov-Smirnov statistic. Each frame is read once, or only a row sample
+    of it when it has more than `max_rows` rows.
+
+    Args:
+        reference: Baseline data, e.g. the training split.
+        current: Data to check, e.g. the test split or new rows.
+        n_bins: Number of equal-frequency bins per column.
+        psi_threshold: PSI above which a column is flagged (0.2 is the usual "significant shift").
+        ks_threshold: KS statistic above which a column is flagged.
+        ks_alpha: Significance of the KS test, a column is flagged only when its
+            statistic is also above the critical value for its sample sizes.
+        columns: Columns to compare, defaults to the numeric columns of `reference`.
+        max_rows: Rows of each frame compared at most, sampled at random, None for all.
+            The reported means are those of the sample.
+    """
+    columns = columns if columns is not None else _numeric_columns(reference)
+
+    # Only the means are reported, the spread statistics are not computed
+    edges = quantile_edges(reference, columns, n_bins)
+    reference_stats, reference_hist = _scan_columns(
+        reference, columns, edges, _sample_rows(len(reference), max_rows), spread=False
+    )
+    current_stats, current_hist = _scan_columns(
+        current, columns, edges, _sample_rows(len(current), max_rows), spread=False
+    )
+
+    return DriftReport(
+        columns=columns,
+        psi=population_stability_index(reference_hist, current_hist),
+        ks=ks_statistic(reference_hist, current_hist),
+        reference_mean=reference_stats.mean,
+        current_mean=current_stats.mean,
+        ks_critical=ks_critical_value(reference_stats.count, current_stats.count, ks_alpha),
+        psi_threshold=psi_threshold,
+        ks_threshold=ks_threshold,
+        ks_alpha=ks_alpha,
+        n_bins=n_bins,
+        max_rows=max_rows,
+    )
@@ -0,0 +1,190 @@
+"""
+Content-addressed cache of the raw listing pages.
+
+Pages are stored zstd-compressed, once per distinct content (a listing left
+unchanged between two nights is stored once), packed into append-only
+segment files instead of one file per page. A SQLite index maps
+(URL, fetch date) to the page digest, and the digest to its location:
+
+    <cache_dir>/index.sqlite    responses(url, fetched_on, digest)
+                                blobs(digest, segment, offset, length)
+    <cache_dir>/segments/*.seg  concatenated compressed pages
+
+Every writer appends to segments of its own, so the apartments and houses
+scrapers can fill the same cache concurrently. The cache lets the parsers
+be rerun on past scrapes without the network, see
+`ImmovlanListingScraper.reparse_listings`, and doubles as a benchmark corpus.
+"""
+
+import hashlib
+import sqlite3
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+
+INDEX_FILE = "index.sqlite"
+SEGMENTS_DIR = "segments"
+# A writer starts a new segment past this size
+SEGMENT_BYTES = 256 * 1024 * 1024
+ZSTD_LEVEL = 10
+
+
+@dataclass(frozen=True)
+class BlobLocation:
+    """Where a compressed page is, enough for another process to read it."""
+    segment: str
+    offset: int
+    length: int
+
+
+def read_blob(cache_dir: Path, location: BlobLocation) -> bytes:
+    """Read and decompress a page, without the index."""
+    import zstandard
+
+    with open(Path(cache_dir) / SEGMENTS_DIR / location.segment, "rb") as f:
+        f.seek(location.offset)
+        return zstandard.ZstdDecompressor().decompress(f.read(location.length))
+
+
+class HtmlCache:
+    """
+    Raw pages by URL and fetch date, see the module docstring.
+
+    Args:
+        cache_dir: Cache directory, created if missing.
+    """
+
+    def __init__(self, cache_dir: Path):
+        import zstandard
+
+        self.cache_dir = Path(cache_dir)
+        (self.cache_dir / SEGMENTS_DIR).mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(self.cache_dir / INDEX_FILE, timeout=60)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS blobs (
+                digest TEXT PRIMARY KEY,
+                segment TEXT NOT NULL,
+                offset INTEGER NOT NULL,
+                length INTEGER NOT NULL,
+                size INTEGER NOT NULL
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS responses (
+                url TEXT NOT NULL,
+                fetched_on TEXT NOT NULL,
+                digest TEXT NOT NULL,
+                PRIMARY KEY (url, fetched_on)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS responses_fetched_on ON responses (fetched_on);
+            """
+        )
+        self._compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL)
+        self._segment = None
+        self._segment_name = ""
+
+    def __enter__(self) -> "HtmlCache":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self._segment is not None:
+            self._segment.close()
+            self._segment = None
+        self.connection.close()
+
+    def put(self, url: str, fetched_on: str, content: bytes) -> str:
+        """
+        Store the page fetched from `url` on `fetched_on` (YYYY-MM-DD).
+
+        Returns:
+            The page digest, its content is only written if new.
+        """
+        digest = hashlib.blake2b(content, digest_size=20).hexdigest()
+        with self.connection:
+            known = self.connection.execute(
+                "SELECT 1 FROM blobs WHERE digest = ?", [digest]
+            ).fetchone()
+            if not known:
+                location = self._append(self._compressor.compress(content))
+                self.connection.execute(
+                    "INSERT OR IGNORE INTO blobs VALUES (?, ?, ?, ?, ?)",
+                    [digest, location.segment, location.offset, location.length, len(content)],
+                )
+            self.connection.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?)", [url, fetched_on, digest]
+            )
+        return digest
+
+    def _append(self, data: bytes) -> BlobLocation:
+        if self._segment is None or self._segment.tell() + len(data) > SEGMENT_BYTES:
+            if self._segment is not None:
+                self._segment.close()
+            self._segment_name = f"{uuid.uuid4().hex}.seg"
+            self._segment = open(self.cache_dir / SEGMENTS_DIR / self._segment_name, "ab")
+        offset = self._segment.tell()
+        self._segment.write(data)
+        # On disk before the index points to it
+        self._segment.flush()
+        return BlobLocation(self._segment_name, offset, len(data))
+
+    def locations(
+        self, fetched_on: Optional[str] = None, urls: Optional[list[str]] = None
+    ) -> dict[str, BlobLocation]:
+        """
+        Location of the page of every URL: fetched on `fetched_on`, or the
+        latest fetch of each URL. Restricted to `urls` when given.
+        """
+        if fetched_on is not None:
+            query = "SELECT url, digest FROM responses WHERE fetched_on = ?"
+            params = [fetched_on]
+        else:
+            query = (
+                "SELECT url, digest FROM responses r WHERE fetched_on = "
+                "(SELECT max(fetched_on) FROM responses WHERE url = r.url)"
+            )
+            params = []
+        rows = self.connection.execute(
+            f"""
+            SELECT url, segment, offset, length
+            FROM ({query}) JOIN blobs USING (digest)
+            ORDER BY segment, offset
+            """,
+            params,
+        ).fetchall()
+        wanted = set(urls) if urls is not None else None
+        return {
+            url: BlobLocation(segment, offset, length)
+            for url, segment, offset, length in rows
+            if wanted is None or url in wanted
+        }
+
+    def get(self, url: str, fetched_on: Optional[str] = None) -> Optional[bytes]:
+        """The page of `url` fetched on `fetched_on`, or its latest one, None if not cached."""
+        row = self.connection.execute(
+            """
+            SELECT segment, offset, length FROM responses JOIN blobs USING (digest)
+            WHERE url = ? AND (? IS NULL OR fetched_on = ?)
+            ORDER BY fetched_on DESC LIMIT 1
+            """,
+            [url, fetched_on, fetched_on],
+        ).fetchone()
+        return read_blob(self.cache_dir, BlobLocation(*row)) if row else None
+
+    def stats(self) -> dict:
+        """Pages, distinct pages and their raw and compressed sizes."""
+        responses, = self.connection.execute("SELECT count(*) FROM responses").fetchone()
+        blobs, size, length = self.connection.execute(
+            "SELECT count(*), coalesce(sum(size), 0), coalesce(sum(length), 0) FROM blobs"
+        ).fetchone()
+        return {
+            "responses": responses,
+            "distinct_pages": blobs,
+            "raw_bytes": size,
+            "compressed_bytes": length,
+        }
@@ -1,5 +1,6 @@
+import argparse
+import os
 import time
-import requests
 import re
 import csv
 import random
@@ -7,10 +8,17 @@ import pandas as pd
 import pyarrow.parquet as pq
 import pyarrow as pa
 from random import randint
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from itertools import repeat
+from multiprocessing import get_context
 from pathlib import Path
+from typing import Optional
 from bs4 import BeautifulSoup
 from fake_headers import Headers
-from utils.logging_utils import setup_logger
+from utils.logging_utils import flush_logs, setup_logger
+from scrapers.run_metrics import ScraperMetrics, metrics_report_path, write_report
+from scrapers.html_cache import HtmlCache, read_blob
 
 
 class ImmovlanListingScraper:
@@ -97,16 +105,55 @@ class ImmovlanListingScraper:
         FIELD_URL,
     ]
 
+    # Text fields, every other field is parsed as an integer
+    STRING_FIELDS = {
+        FIELD_TYPE,
+        FIELD_STATE,
+        FIELD_LOCALITY,
+        FIELD_ENERGY_CLASS,
+        FIELD_HEATING_TYPE,
+        FIELD_URL,
+    }
+
     REGEX_REMOVE_NON_NUMERIC = re.compile(r"[^0-9]")
 
     BUFFER_FLUSH_SIZE = 100
 
-    def __init__(self) -> None:
+    # Fields a listing is skipped without
+    REQUIRED_FIELDS = [FIELD_PRICE, FIELD_BEDROOMS, FIELD_LIVING_AREA, FIELD_POSTAL_CODE]
+
+    # Same message at most this many times per minute, the rest is in the run summary
+    LOG_RATE_LIMIT = 10
+
+    # Most cached pages per reparse task
+    REPARSE_CHUNK_SIZE = 200
+
+    # Random whole number of seconds waited after each listing, to avoid blocking
+    REQUEST_DELAY_S = (0, 1)
+
+    def __init__(
+        self,
+        html_cache: Optional[HtmlCache] = None,
+        request_delay_s: tuple[int, int] = REQUEST_DELAY_S,
+    ) -> None:
         """
         Initialize the Scraper instance with an empty data list.
+
+        Args:
+            html_cache: Also store every fetched page in this cache, so the
+                listings can be reparsed later, see `reparse_listings`.
+            request_delay_s: Bounds of the delay after each listing, (0, 0)
+                when scraping a local server.
         """
-        self.logger = setup_logger(__name__)
+        self.html_cache = html_cache
+        self.request_delay_s = request_delay_s
+        self._writer: Optional[pq.ParquetWriter] = None
+        self.fetched_on = datetime.now(timezone.utc).date().isoformat()
+        # Records are formatted and written by a background thread, off the scraping loop
+        self.logger = setup_logger(__name__, use_queue=True, rate_limit=self.LOG_RATE_LIMIT)
         self.data: list[dict] = []
+        self.metrics = ScraperMetrics()
+        self.summary = self.metrics.summary
 
     def scrape_listings(
         self,
@@ -128,6 +175,9 @@ class ImmovlanListingScraper:
         if output_file_path.exists():
             output_file_path.unlink()  # remove existing file 
 
+        self.metrics = ScraperMetrics()
+        self.summary = self.metrics.summary
+        self.fetched_on = datetime.now(timezone.utc).date().isoformat()
         total_listings_scraped = 0
         listing_urls = self._load_urls_from_file(urls_txt_file_path)
 
@@ -135,10 +185,10 @@ class ImmovlanListingScraper:
         if start_from_url:
             try:
                 start_from = listing_urls.index(start_from_url)
-                self.logger.info(f"Start parsing from URL: {start_from_url}")
+                self.logger.info("Start parsing from URL: %s", start_from_url)
             except ValueError:
                 self.logger.warning(
-                    f"Start URL not found in listing URLs: {start_from_url}"
+                    "Start URL not found in listing URLs: %s", start_from_url
                 )
 
         listings_urls_to_parse = (
@@ -147,45 +197,139 @@ class ImmovlanListingScraper:
             else listing_urls[start_from:max_listings]
         )
 
+        self.logger.info("Scraping %d listings", len(listings_urls_to_parse))
+
         buffer = []
         for listing_url in listings_urls_to_parse:
-            self.logger.info(f"Scraping listing: {listing_url}")
+            # Per-listing lines are debug only, formatted only when enabled
+            self.logger.debug("Scraping listing: %s", listing_url)
 
             listing_data = self._get_listing_data(listing_url)
 
-            if not listing_data[self.FIELD_PRICE]:
-                self.logger.warning(
-                    f"Skipping listing because is missing {self.FIELD_PRICE}"
-                )
-            elif not listing_data[self.FIELD_BEDROOMS]:
-                self.logger.warning(
-                    f"Skipping listing because is missing {self.FIELD_BEDROOMS}"
-                )
-            elif not listing_data[self.FIELD_LIVING_AREA]:
-                self.logger.warning(
-                    f"Skipping listing because is missing {self.FIELD_LIVING_AREA}"
-                )
-            elif not listing_data[self.FIELD_POSTAL_CODE]:
-                self.logger.warning(
-                    f"Skipping listing because is missing {self.FIELD_POSTAL_CODE}"
-                )
+            skip_reason = self._skip_reason(listing_data)
+            if skip_reason:
+                self.summary.count("skipped", skip_reason)
+                self.logger.debug("Skipping listing %s: %s", listing_url, skip_reason)
             else:
                 buffer.append(listing_data)
                 total_listings_scraped += 1
 
             if len(buffer) >= self.BUFFER_FLUSH_SIZE:
-                self._append_to_parquet(output_file_path, buffer, self.FIELD_NAMES)
+                with self.metrics.timed("flush"):
+                    self._append_to_parquet(output_file_path, buffer, self.FIELD_NAMES)
                 buffer = []
 
             # Add a delay to avoid blocking
-            time.sleep(randint(0, 1))
+            if self.request_delay_s[1] > 0:
+                time.sleep(randint(*self.request_delay_s))
 
         # Flush remaining
         if buffer:
-            self._append_to_parquet(output_file_path, buffer, self.FIELD_NAMES)
+            with self.metrics.timed("flush"):
+                self._append_to_parquet(output_file_path, buffer, self.FIELD_NAMES)
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+        self.summary.count("scraped", "ok", total_listings_scraped)
+        self.summary.log(self.logger, f"Scraped {output_file_path.name}")
+
+        # Throughput report next to the output, see scrapers/run_metrics.py
+        report = self.metrics.report(
+            listings=len(listings_urls_to_parse), listings_scraped=total_listings_scraped
+        )
+        report["listings_per_s"] = (
+            round(report["listings"] / report["elapsed_s"], 3) if report["elapsed_s"] else 0.0
+        )
+        self.report_path = write_report(report, metrics_report_path(output_file_path))
+        self.logger.info(
+            "%d requests at %.2f/s, %d bytes, report saved to %s",
+            report["requests"], report["requests_per_s"], report["bytes_downloaded"], self.report_path,
+        )
+        flush_logs()
 
         return total_listings_scraped
 
+    def reparse_listings(
+        self,
+        html_cache: HtmlCache,
+        output_file_path: Path,
+        fetched_on: Optional[str] = None,
+        urls_txt_file_path: Optional[Path] = None,
+        workers: Optional[int] = None,
+    ) -> int:
+        """
+        Rebuild a listings parquet file from cached pages, without the network.
+
+        Pages are parsed in parallel, one process per CPU by default, with
+        the current parsers: a new field or a parser fix only needs a reparse.
+
+        Args:
+            html_cache (HtmlCache): Cache the pages were stored in while scraping.
+            output_file_path (Path): Path to the output parquet file.
+            fetched_on (str): Scrape date (YYYY-MM-DD) to rebuild, the latest
+                page of every URL if None.
+            urls_txt_file_path (Path): Only reparse the URLs of this links file.
+            workers (int): Number of parsing processes.
+        """
+        self.metrics = ScraperMetrics()
+        self.summary = self.metrics.summary
+
+        urls = self._load_urls_from_file(urls_txt_file_path) if urls_txt_file_path else None
+        items = list(html_cache.locations(fetched_on, urls).items())
+        # Small enough chunks for every worker to get a few
+        workers = workers or os.cpu_count() or 1
+        chunk_size = max(1, min(self.REPARSE_CHUNK_SIZE, -(-len(items) // (workers * 4))))
+        chunks = [items[i : i + chunk_size] for i in range(0, len(items), chunk_size)]
+        self.logger.info("Reparsing %d cached listings", len(items))
+
+        # Spawned workers: forked ones would inherit the logging queue without its thread
+        rows = []
+        with ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn")) as pool:
+            for chunk_rows, outcomes, parse_ms in pool.map(
+                _reparse_chunk, repeat(html_cache.cache_dir), chunks
+            ):
+                rows.extend(chunk_rows)
+                for outcome, reasons in outcomes.items():
+                    for reason, n in reasons.items():
+                        self.summary.count(outcome, reason, n)
+                self.metrics.timings_ms.setdefault("parse", []).extend(parse_ms)
+
+        with self.metrics.timed("flush"):
+            output_file_path.parent.mkdir(parents=True, exist_ok=True)
+            pd.DataFrame(rows, columns=self.FIELD_NAMES).to_parquet(
+                output_file_path, engine="pyarrow", index=False
+            )
+
+        self.summary.count("scraped", "ok", len(rows))
+        self.summary.log(self.logger, f"Reparsed {output_file_path.name}")
+
+        report = self.metrics.report(
+            listings=len(items), listings_scraped=len(rows), reparsed=True
+        )
+        report["listings_per_s"] = (
+            round(report["listings"] / report["elapsed_s"], 3) if report["elapsed_s"] else 0.0
+        )
+        self.report_path = write_report(report, metrics_report_path(output_file_path))
+        flush_logs()
+
+        return len(rows)
+
+    def _skip_reason(self, listing_data: dict) -> str:
+        """Why a listing is not kept, empty if it is."""
+        if not listing_data[self.FIELD_TYPE]:
+            return "no valid property type"
+        if listing_data[self.FIELD_TYPE] == "Project":
+            return "Project type"
+        for field in self.REQUIRED_FIELDS:
+            if not listing_data[field]:
+                return f"missing {field}"
+        return ""
+
+    def _parse_failed(self, field: str, error: Exception) -> None:
+        self.summary.count("errors", f"parse {field}")
+        self.logger.warning("Failed to parse %s: %s", field, error)
+
     def _append_to_parquet(
         self, file_path: Path, records: list[dict], fieldnames: list[str]
     ):
@@ -194,12 +338,19 @@ class ImmovlanListingScraper:
 
         df = pd.DataFrame(records, columns=fieldnames)
 
-        # If file doesn’t exist yet, write a new parquet file
-        if not file_path.exists() or file_path.stat().st_size == 0:
-            df.to_parquet(file_path, engine="pyarrow", index=False)
-        else:
-            # Append to existing parquet file
-            df.to_parquet(file_path, engine="pyarrow", index=False, append=True)
+        # A fixed schema, so every batch matches the first whatever its missing values
+        schema = pa.schema(
+            [
+                (field, pa.string() if field in self.STRING_FIELDS else pa.int64())
+                for field in fieldnames
+            ]
+        )
+        table = pa.Table.from_pandas(df, schema=schema, preserve_index=False)
+
+        # Each batch is a row group of the file, closed at the end of the scrape
+        if self._writer is None:
+            self._writer = pq.ParquetWriter(file_path, schema)
+        self._writer.write_table(table)
 
     def _get_headers(self) -> dict:
         """
@@ -231,7 +382,7 @@ class ImmovlanListingScraper:
                 with open(file_path, "r") as urls_file:
                     return [line.rstrip() for line in urls_file]
         except Exception as e:
-            self.logger.error(f"Failed to load URLs from file: {file_path} => {e}")
+            self.logger.error("Failed to load URLs from file: %s => %s", file_path, e)
         return []
 
     def _get_listing_data(self, listing_url: str) -> dict:
@@ -244,29 +395,50 @@ class ImmovlanListingScraper:
         Returns:
             dict: Parsed data fields for the listing.
         """
-        listing_data: dict = {key: None for key in self.FIELD_NAMES}
-
         try:
-            response = requests.get(listing_url, headers=self._get_headers())
+            response = self.metrics.get(listing_url, headers=self._get_headers())
             response.raise_for_status()
 
-            soup = BeautifulSoup(response.content, "html.parser")
+            if self.html_cache is not None:
+                self.html_cache.put(listing_url, self.fetched_on, response.content)
 
-            listing_type = self.__parse_listing_type(soup)
+        except Exception as e:
+            self.summary.count("errors", f"listing {type(e).__name__}")
+            self.logger.error("Failed to fetch listing data: %s", e)
+            return {key: None for key in self.FIELD_NAMES}
 
-            if not listing_type or listing_type == "Project":
-                self.logger.warning(
-                    f"Skipping listing because of invalid Property Type"
-                )
-            else:
-                listing_data[self.FIELD_TYPE] = listing_type
-                listing_data.update(self.__parse_data_rows(soup))
-                listing_data.update(self.__parse_address(soup))
-                listing_data[self.FIELD_PRICE] = self.__parse_pricing(soup)
-                listing_data[self.FIELD_URL] = listing_url
+        return self._parse_listing(response.content, listing_url)
+
+    def _parse_listing(self, content: bytes, listing_url: str) -> dict:
+        """
+        Parse the data fields of a listing page.
+
+        Args:
+            content (bytes): HTML of the listing page.
+            listing_url (str): URL of the property listing.
+
+        Returns:
+            dict: Parsed data fields for the listing.
+        """
+        listing_data: dict = {key: None for key in self.FIELD_NAMES}
+
+        try:
+            with self.metrics.timed("parse"):
+                soup = BeautifulSoup(content, "html.parser")
+
+                listing_type = self.__parse_listing_type(soup)
+
+                # Listings without a valid type are skipped, see `_skip_reason`
+                listing_data[self.FIELD_TYPE] = listing_type or None
+                if listing_type and listing_type != "Project":
+                    listing_data.update(self.__parse_data_rows(soup))
+                    listing_data.update(self.__parse_address(soup))
+                    listing_data[self.FIELD_PRICE] = self.__parse_pricing(soup)
+                    listing_data[self.FIELD_URL] = listing_url
 
         except Exception as e:
-            self.logger.error(f"Failed to parse listing data: {e}")
+            self.summary.count("errors", f"listing {type(e).__name__}")
+            self.logger.error("Failed to parse listing data: %s", e)
 
         return listing_data
 
@@ -293,7 +465,7 @@ class ImmovlanListingScraper:
                 )
 
         except Exception as e:
-            self.logger.error(f"Failed to parse {self.FIELD_TYPE}: {e}")
+            self._parse_failed(self.FIELD_TYPE, e)
 
         return ""
 
@@ -343,9 +515,7 @@ class ImmovlanListingScraper:
                                     )
                                 )
                             except Exception as ie:
-                                self.logger.error(
-                                    f"Failed to parse {self.FIELD_LIVING_AREA}: {ie}"
-                                )
+                                self._parse_failed(self.FIELD_LIVING_AREA, ie)
                         case "Number of bedrooms":
                             try:
                                 listing_data[self.FIELD_BEDROOMS] = int(
@@ -354,9 +524,7 @@ class ImmovlanListingScraper:
                                     )
                                 )
                             except Exception as ie:
-                                self.logger.error(
-                                    f"Failed to parse {self.FIELD_BEDROOMS}: {ie}"
-                                )
+                                self._parse_failed(self.FIELD_BEDROOMS, ie)
                         case "Number of bathrooms":
                             try:
                                 bathrooms = int(
@@ -365,9 +533,7 @@ class ImmovlanListingScraper:
                                     )
                                 )
                             except Exception as ie:
-                                self.logger.error(
-                                    f"Failed to parse {self.FIELD_BATHROOMS}: {ie}"
-                                )
+                                self._parse_failed(self.FIELD_BATHROOMS, ie)
                         case "Number of toilets":
                             try:
                                 toilets = int(
@@ -376,9 +542,7 @@ class ImmovlanListingScraper:
                                     )
                                 )
                             except Exception as ie:
-                                self.logger.error(
-                                    f"Failed to parse Number of toilets: {ie}"
-                                )
+                                self._parse_failed("Number of toilets", ie)
                         case "Number of showers":
                             try:
                                 showers = int(
@@ -387,9 +551,7 @@ class ImmovlanListingScraper:
                                     )
                                 )
                             except Exception as ie:
-                                self.logger.error(
-                                    f"Failed to parse Number of showers: {ie}"
-                                )
+                                self._parse_failed("Number of showers", ie)
                         case "Build Year":
                             try:
                                 listing_data[self.FIELD_CONSTRUCTION_YEAR] = int(
@@ -398,18 +560,14 @@ class ImmovlanListingScraper:
                                     )
                                 )
                             except Exception as ie:
-                                self.logger.error(
-                                    f"Failed to parse {self.FIELD_CONSTRUCTION_YEAR}: {ie}"
-                                )
+                                self._parse_failed(self.FIELD_CONSTRUCTION_YEAR, ie)
                         case "Furnished":
                             try:
                                 listing_data[self.FIELD_FURNISHED] = int(
                                     data_value_text == "Yes"
                                 )
                             except Exception as ie:
-                                self.logger.error(
-                                    f"Failed to parse {self.FIELD_FURNISHED}: {ie}"
-                                )
+                                self._parse_failed(self.FIELD_FURNISHED, ie)
                         case "Number of facades":
                             try:
                                 listing_data[self.FIELD_FACADES] = int(
@@ -418,9 +576,7 @@ class ImmovlanListingScraper:
                                     )
                                 )
                             except Exception as ie:
-                                self.logger.error(
-                                    f"Failed to parse {self.FIELD_FACADES}: {ie}"
-                                )
+                                self._parse_failed(self.FIELD_FACADES, ie)
                         case "Number of floors":
                             try:
                                 listing_data[self.FIELD_FLOORS] = int(
@@ -429,9 +585,7 @@ class ImmovlanListingScraper:
                                     )
                                 )
                             except Exception as ie:
-                                self.logger.error(
-                                    f"Failed to parse {self.FIELD_FLOORS}: {ie}"
-                                )
+                                self._parse_failed(self.FIELD_FLOORS, ie)
                         case "Specific primary energy consumption":
                             try:
                                 listing_data[self.FIELD_EPB] = int(
@@ -443,27 +597,21 @@ class ImmovlanListingScraper:
                                     self.__get_epb_class(listing_data[self.FIELD_EPB])
                                 )
                             except Exception as ie:
-                                self.logger.error(
-                                    f"Failed to parse {self.FIELD_EPB}: {ie}"
-                                )
+                                self._parse_failed(self.FIELD_EPB, ie)
                         case "Kitchen equipment":
                             try:
                                 listing_data[self.FIELD_FULL_KITCHEN] = int(
                                     data_value_text != ""
                                 )
                             except Exception as ie:
-                                self.logger.error(
-                                    f"Failed to parse {self.FIELD_FULL_KITCHEN}: {ie}"
-                                )
+                                self._parse_failed(self.FIELD_FULL_KITCHEN, ie)
                         case "Terrace":
                             try:
                                 listing_data[self.FIELD_TERRACE] = int(
                                     data_value_text == "Yes"
                                 )
                             except Exception as ie:
-                                self.logger.error(
-                                    f"Failed to parse {self.FIELD_TERRACE}: {ie}"
-                                )
+                                self._parse_failed(self.FIELD_TERRACE, ie)
                         case "Surface terrace":
                             try:
                                 listing_data[self.FIELD_TERRACE_AREA] = int(
@@ -472,18 +620,14 @@ class ImmovlanListingScraper:
                                     )
                                 )
                             except Exception as ie:
-                                self.logger.error(
-                                    f"Failed to parse {self.FIELD_TERRACE_AREA}: {ie}"
-                                )
+                                self._parse_failed(self.FIELD_TERRACE_AREA, ie)
                         case "Garden":
                             try:
                                 listing_data[self.FIELD_GARDEN] = int(
                                     data_value_text == "Yes"
                                 )
                             except Exception as ie:
-                                self.logger.error(
-                                    f"Failed to parse {self.FIELD_GARDEN}: {ie}"
-                                )
+                                self._parse_failed(self.FIELD_GARDEN, ie)
                         case "Surface garden":
                             try:
                                 listing_data[self.FIELD_GARDEN_AREA] = int(
@@ -492,63 +636,49 @@ class ImmovlanListingScraper:
                                     )
                                 )
                             except Exception as ie:
-                                self.logger.error(
-                                    f"Failed to parse {self.FIELD_GARDEN_AREA}: {ie}"
-                                )
+                                self._parse_failed(self.FIELD_GARDEN_AREA, ie)
                         case "Swimming pool":
                             try:
                                 listing_data[self.FIELD_SWIMMING_POOL] = int(
                                     data_value_text == "Yes"
                                 )
                             except Exception as ie:
-                                self.logger.error(
-                                    f"Failed to parse {self.FIELD_SWIMMING_POOL}: {ie}"
-                                )
+                                self._parse_failed(self.FIELD_SWIMMING_POOL, ie)
                         case "Garage":
                             try:
                                 listing_data[self.FIELD_GARAGE] = int(
                                     data_value_text == "Yes"
                                 )
                             except Exception as ie:
-                                self.logger.error(
-                                    f"Failed to parse {self.FIELD_GARAGE}: {ie}"
-                                )
+                                self._parse_failed(self.FIELD_GARAGE, ie)
                         case "Bike storage":
                             try:
                                 listing_data[self.FIELD_BIKE_STORAGE] = int(
                                     data_value_text == "Yes"
                                 )
                             except Exception as ie:
-                                self.logger.error(
-                                    f"Failed to parse {self.FIELD_BIKE_STORAGE}: {ie}"
-                                )
+                                self._parse_failed(self.FIELD_BIKE_STORAGE, ie)
                         case "Balcony":
                             try:
                                 listing_data[self.FIELD_BALCONY] = int(
                                     data_value_text == "Yes"
                                 )
                             except Exception as ie:
-                                self.logger.error(
-                                    f"Failed to parse {self.FIELD_BALCONY}: {ie}"
-                                )
+                                self._parse_failed(self.FIELD_BALCONY, ie)
                         case "Cellar":
                             try:
                                 listing_data[self.FIELD_CELLAR] = int(
                                     data_value_text == "Yes"
                                 )
                             except Exception as ie:
-                                self.logger.error(
-                                    f"Failed to parse {self.FIELD_CELLAR}: {ie}"
-                                )
+                                self._parse_failed(self.FIELD_CELLAR, ie)
                         case "Attic":
                             try:
                                 listing_data[self.FIELD_ATTIC] = int(
                                     data_value_text == "Yes"
                                 )
                             except Exception as ie:
-                                self.logger.error(
-                                    f"Failed to parse {self.FIELD_ATTIC}: {ie}"
-                                )
+                                self._parse_failed(self.FIELD_ATTIC, ie)
                         case "Floor of appartment":
                             try:
                                 listing_data[self.FIELD_FLOOR_NUMBER] = int(
@@ -557,45 +687,35 @@ class ImmovlanListingScraper:
                                     )
                                 )
                             except Exception as ie:
-                                self.logger.error(
-                                    f"Failed to parse {self.FIELD_FLOOR_NUMBER}: {ie}"
-                                )
+                                self._parse_failed(self.FIELD_FLOOR_NUMBER, ie)
                         case "Elevator":
                             try:
                                 listing_data[self.FIELD_ELEVATOR] = int(
                                     data_value_text == "Yes"
                                 )
                             except Exception as ie:
-                                self.logger.error(
-                                    f"Failed to parse {self.FIELD_ELEVATOR}: {ie}"
-                                )
+                                self._parse_failed(self.FIELD_ELEVATOR, ie)
                         case "Air conditioning":
                             try:
                                 listing_data[self.FIELD_AC] = int(
                                     data_value_text == "Yes"
                                 )
                             except Exception as ie:
-                                self.logger.error(
-                                    f"Failed to parse {self.FIELD_AC}: {ie}"
-                                )
+                                self._parse_failed(self.FIELD_AC, ie)
                         case "Alarm":
                             try:
                                 listing_data[self.FIELD_ALARM] = int(
                                     data_value_text == "Yes"
                                 )
                             except Exception as ie:
-                                self.logger.error(
-                                    f"Failed to parse {self.FIELD_ALARM}: {ie}"
-                                )
+                                self._parse_failed(self.FIELD_ALARM, ie)
                         case "Access for disabled":
                             try:
                                 listing_data[self.FIELD_ACCESS_DISABLED] = int(
                                     data_value_text == "Yes"
                                 )
                             except Exception as ie:
-                                self.logger.error(
-                                    f"Failed to parse {self.FIELD_ACCESS_DISABLED}: {ie}"
-                                )
+                                self._parse_failed(self.FIELD_ACCESS_DISABLED, ie)
                         case "Type of heating":
                             listing_data[self.FIELD_HEATING_TYPE] = (
                                 data_value_text
@@ -607,7 +727,7 @@ class ImmovlanListingScraper:
             listing_data[self.FIELD_BATHROOMS] = max(bathrooms, toilets, showers)
 
         except Exception as e:
-            print(f"[ERROR] Failed to parse data rows => {e}")
+            self._parse_failed("data rows", e)
 
         return listing_data
 
@@ -634,9 +754,7 @@ class ImmovlanListingScraper:
             else:
                 return {}
         except Exception as e:
-            self.logger.error(
-                f"Failed to parse {self.FIELD_POSTAL_CODE}, {self.FIELD_LOCALITY}: {e}"
-            )
+            self._parse_failed(self.FIELD_POSTAL_CODE, e)
             return {}
 
     def __parse_pricing(self, soup) -> int | None:
@@ -654,7 +772,7 @@ class ImmovlanListingScraper:
             price_text = self.REGEX_REMOVE_NON_NUMERIC.sub("", price_tag.text)
             return int(price_text)
         except Exception as e:
-            self.logger.error(f"Failed to parse {self.FIELD_PRICE}: {e}")
+            self._parse_failed(self.FIELD_PRICE, e)
             return None
 
     def __get_epb_class(self, epb: int) -> str:
@@ -693,3 +811,45 @@ class ImmovlanListingScraper:
                 return epb_class
 
         return "Unknown"
+
+
+_reparse_scraper: Optional[ImmovlanListingScraper] = None
+
+
+def _reparse_chunk(cache_dir: Path, chunk: list) -> tuple[list[dict], dict, list[float]]:
+    """Parse cached pages in a worker process: kept listings, outcomes and parse times."""
+    global _reparse_scraper
+    if _reparse_scraper is None:
+        _reparse_scraper = ImmovlanListingScraper()
+    scraper = _reparse_scraper
+    scraper.metrics = ScraperMetrics()
+    scraper.summary = scraper.metrics.summary
+
+    rows = []
+    for listing_url, location in chunk:
+        listing_data = scraper._parse_listing(read_blob(cache_dir, location), listing_url)
+        skip_reason = scraper._skip_reason(listing_data)
+        if skip_reason:
+            scraper.summary.count("skipped", skip_reason)
+        else:
+            rows.append(listing_data)
+
+    flush_logs()
+    return rows, scraper.summary.as_dict(), scraper.metrics.timings_ms.get("parse", [])
+
+
+if __name__ == "__main__":
+    # Rebuild a listings file from the page cache, e.g.
+    # python -m scrapers.immovlan_listing_scraper data/raw/html_cache out.parquet --date 2025-09-07
+    parser = argparse.ArgumentParser(description="Reparse cached listing pages into parquet.")
+    parser.add_argument("cache_dir", type=Path)
+    parser.add_argument("output", type=Path)
+    parser.add_argument("--date", default=None, help="Scrape date, latest pages if omitted")
+    parser.add_argument("--urls", type=Path, default=None, help="Links file to restrict to")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    with HtmlCache(args.cache_dir) as cache:
+        ImmovlanListingScraper().reparse_listings(
+            cache, args.output, args.date, args.urls, args.workers
+        )
@@ -1,9 +1,12 @@
 from pathlib import Path
 import requests
+from datetime import datetime, timezone
 import os
 import random
 from xml.etree import ElementTree as ET
 from fake_headers import Headers
+from utils.logging_utils import setup_logger
+from scrapers.run_metrics import METRICS_SUFFIX, ScraperMetrics, write_report
 
 class ImmovlanSitemapScraper:
     """
@@ -15,15 +18,17 @@ class ImmovlanSitemapScraper:
     and saved to separate text files.
     """
 
-    def __init__(self, sitemaps_dir_path: Path):
+    def __init__(self, sitemaps_dir_path: Path, base_url: str = "https://immovlan.be"):
         """Initializes the scraper with file paths and URLs."""
-        self.base_url = "https://immovlan.be"
+        self.base_url = base_url
         self.sitemap_index_url = f"{self.base_url}/sitemap.xml"
         self.sitemap_xmlns = "http://www.sitemaps.org/schemas/sitemap/0.9"
         self.sitemaps_dir_path = sitemaps_dir_path
         self.main_sitemap_path = self.sitemaps_dir_path / "sitemap.xml"
         self.apartments_output_file = self.sitemaps_dir_path / "apartments_links.txt"
         self.houses_output_file = self.sitemaps_dir_path / "houses_links.txt"
+        self.logger = setup_logger(__name__, rate_limit=10)
+        self.metrics = ScraperMetrics()
 
     def _get_headers(self) -> dict:
         """
@@ -51,19 +56,19 @@ class ImmovlanSitemapScraper:
             file_path (str): The local path to save the file.
         """
         try:
-            print(f"Downloading {url}...")
+            self.logger.debug("Downloading %s...", url)
 
-            response = requests.get(url, headers=self._get_headers())
+            response = self.metrics.get(url, headers=self._get_headers())
             response.raise_for_status() 
 
             with open(file_path, 'wb') as f:
                 f.write(response.content)
 
-            print(f"Successfully downloaded to {file_path}")
+            self.logger.debug("Successfully downloaded to %s", file_path)
             return True
         
         except requests.exceptions.RequestException as e:
-            print(f"Error downloading {url}: {e}")
+            self.logger.error("Error downloading %s: %s", url, e)
             return False
 
     def download_main_sitemap(self):
@@ -80,7 +85,7 @@ class ImmovlanSitemapScraper:
             list: A list of URLs for the French property detail sitemaps.
         """
         if not os.path.exists(self.main_sitemap_path):
-            print("Main sitemap not found. Please run download_main_sitemap() first.")
+            self.logger.error("Main sitemap not found. Please run download_main_sitemap() first.")
             return []
 
         sitemap_urls = []
@@ -95,7 +100,7 @@ class ImmovlanSitemapScraper:
                     if loc and "fr_property-detail" in loc:
                         sitemap_urls.append(loc)
         except ET.ParseError as e:
-            print(f"Error parsing main sitemap XML: {e}")
+            self.logger.error("Error parsing main sitemap XML: %s", e)
             return []
         
         return sitemap_urls
@@ -112,6 +117,7 @@ class ImmovlanSitemapScraper:
         total_properties = 0
         total_properties_rent = 0
         total_properties_sale = 0
+        summary = self.metrics.summary
 
         ns = f"{{{self.sitemap_xmlns}}}"
 
@@ -121,13 +127,15 @@ class ImmovlanSitemapScraper:
                 continue
             
             try:
-                tree = ET.parse(temp_sitemap_path)
+                with self.metrics.timed("parse"):
+                    tree = ET.parse(temp_sitemap_path)
                 root = tree.getroot()
                 
                 # Check for a single URL entry for verification
                 url_elements = root.findall(f"{ns}url")
                 if not url_elements:
-                    print(f"No URLs found in {url}. Skipping.")
+                    summary.count("skipped", "sitemap without URLs")
+                    self.logger.warning("No URLs found in %s. Skipping.", url)
                     continue
 
                 for url_element in url_elements:
@@ -146,40 +154,53 @@ class ImmovlanSitemapScraper:
                         elif any(x in loc for x in ("/a-louer/", "/en-colocation/")):
                             total_properties_rent += 1
                         else:
-                            print(f"Unknown listing type in URL: {loc}")
+                            summary.count("skipped", "unknown listing type")
+                            self.logger.debug("Unknown listing type in URL: %s", loc)
 
             except ET.ParseError as e:
-                print(f"Error parsing {url}: {e}")
+                summary.count("errors", "sitemap XML")
+                self.logger.error("Error parsing %s: %s", url, e)
             except Exception as e:
-                print(f"An unexpected error occurred while processing {url}: {e}")
+                summary.count("errors", type(e).__name__)
+                self.logger.error("An unexpected error occurred while processing %s: %s", url, e)
 
         # Store the lists as class attributes to be accessed later
         self.apartments = apartments
         self.houses = houses
-        print(f"Total properties processed: {total_properties} - Total for sale: {total_properties_sale} - Total for rent: {total_properties_rent}")
-        print(f"Found {len(self.apartments)} apartments and {len(self.houses)} houses.")
+        self.logger.info(
+            "Total properties processed: %d - Total for sale: %d - Total for rent: %d",
+            total_properties, total_properties_sale, total_properties_rent,
+        )
+        self.logger.info("Found %d apartments and %d houses.", len(self.apartments), len(self.houses))
+        summary.log(self.logger, "Sitemaps parsed")
 
     def write_output_files(self):
         """
         Writes the collected links for apartments and houses to their respective files.
         """
         if not hasattr(self, 'apartments') or not hasattr(self, 'houses'):
-            print("No links found. Please run parse_property_sitemaps() first.")
+            self.logger.error("No links found. Please run parse_property_sitemaps() first.")
             return
 
         with open(self.apartments_output_file, 'w') as f:
             for link in self.apartments:
                 f.write(f"{link}\n")
-        print(f"Apartment links saved to {self.apartments_output_file}")
+        self.logger.info("Apartment links saved to %s", self.apartments_output_file)
 
         with open(self.houses_output_file, 'w') as f:
             for link in self.houses:
                 f.write(f"{link}\n")
-        print(f"House links saved to {self.houses_output_file}")
+        self.logger.info("House links saved to %s", self.houses_output_file)
     
-    def scrape_sitemaps(self):
-        """Orchestrates the entire scraping and parsing process."""
-        print("Starting ImmoVlan sitemap scraping process.")
+    def scrape_sitemaps(self) -> Path:
+        """
+        Orchestrates the entire scraping and parsing process.
+
+        Returns:
+            Path of the run metrics report, sitemaps_<date>.metrics.json.
+        """
+        self.logger.info("Starting ImmoVlan sitemap scraping process.")
+        self.metrics = ScraperMetrics()
         
         # Step 1: Download the main sitemap
         if self.download_main_sitemap():
@@ -187,7 +208,7 @@ class ImmovlanSitemapScraper:
             # Step 2: Get the list of property sitemaps
             property_sitemaps = self._get_property_sitemaps()
             if property_sitemaps:
-                print(f"Found {len(property_sitemaps)} French property sitemaps to process.")
+                self.logger.info("Found %d French property sitemaps to process.", len(property_sitemaps))
                 
                 # Step 3: Parse the property sitemaps and collect links
                 self.parse_property_sitemaps(property_sitemaps)
@@ -195,9 +216,22 @@ class ImmovlanSitemapScraper:
                 # Step 4: Write the collected links to output files
                 self.write_output_files()
             else:
-                print("No French property sitemaps found. Exiting.")
+                self.logger.warning("No French property sitemaps found. Exiting.")
         else:
-            print("Failed to download the main sitemap. Exiting.")
+            self.logger.error("Failed to download the main sitemap. Exiting.")
+
+        report = self.metrics.report(
+            apartments=len(getattr(self, "apartments", [])), houses=len(getattr(self, "houses", []))
+        )
+        date_str = datetime.now(timezone.utc).date()
+        report_path = write_report(
+            report, self.sitemaps_dir_path / f"sitemaps_{date_str}{METRICS_SUFFIX}"
+        )
+        self.logger.info(
+            "%d requests at %.2f/s, %d bytes, report saved to %s",
+            report["requests"], report["requests_per_s"], report["bytes_downloaded"], report_path,
+        )
+        return report_path
 
 if __name__ == "__main__":
     # Create an instance of the scraper and run the process
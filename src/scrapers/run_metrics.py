@@ -0,0 +1,175 @@
+"""Run metrics of the scrapers: HTTP requests, page parsing and output flushes."""
+
+import json
+import time
+import requests
+import numpy as np
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+from utils.logging_utils import RunSummary
+
+
+METRICS_SUFFIX = ".metrics.json"
+
+# Upper bounds of the request latency histogram buckets
+LATENCY_BUCKETS_MS = (50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+# Responses worth retrying: rate limited or a transient server error
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+def metrics_report_path(output_path: Path) -> Path:
+    """Report of the run that wrote `output_path`, next to it."""
+    return output_path.with_suffix(METRICS_SUFFIX)
+
+
+def _distribution(values_ms: list[float]) -> dict:
+    if not values_ms:
+        return {"count": 0}
+    values = np.asarray(values_ms)
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {
+        "count": len(values),
+        "total": round(float(values.sum()), 3),
+        "mean": round(float(values.mean()), 3),
+        "p50": round(float(p50), 3),
+        "p95": round(float(p95), 3),
+        "p99": round(float(p99), 3),
+        "max": round(float(values.max()), 3),
+    }
+
+
+class ScraperMetrics:
+    """
+    Metrics of one scraper run.
+
+    HTTP requests go through `get`, which records their latency, size and
+    status and retries transient failures. Code sections are timed with
+    `timed`, outcomes (skip and error reasons) are counted in `summary`.
+    """
+
+    def __init__(self):
+        self.started_at = datetime.now(timezone.utc)
+        self._started = time.perf_counter()
+        self.requests = 0
+        self.failed_requests = 0
+        self.retries = 0
+        self.bytes_downloaded = 0
+        self.statuses: Counter = Counter()
+        self.latencies_ms: list[float] = []
+        self.timings_ms: dict[str, list[float]] = {}
+        self.summary = RunSummary()
+
+    def get(
+        self,
+        url: str,
+        headers: Optional[dict] = None,
+        retries: int = 2,
+        backoff: float = 1.0,
+        timeout: float = 30.0,
+    ) -> requests.Response:
+        """
+        GET `url`, retrying connection errors, timeouts and `RETRY_STATUSES`
+        responses up to `retries` times with exponential backoff.
+
+        The last response is returned whatever its status, callers still
+        call `raise_for_status`. The last connection error is raised.
+        """
+        for attempt in range(retries + 1):
+            started = time.perf_counter()
+            try:
+                response = requests.get(url, headers=headers, timeout=timeout)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                self._record(started, type(e).__name__, 0)
+                if attempt == retries:
+                    self.failed_requests += 1
+                    raise
+            else:
+                self._record(started, response.status_code, len(response.content))
+                if response.status_code not in RETRY_STATUSES or attempt == retries:
+                    if response.status_code >= 400:
+                        self.failed_requests += 1
+                    return response
+
+            self.retries += 1
+            time.sleep(backoff * 2**attempt)
+
+    def _record(self, started: float, status, size: int) -> None:
+        self.requests += 1
+        self.latencies_ms.append((time.perf_counter() - started) * 1000)
+        self.statuses[str(status)] += 1
+        self.bytes_downloaded += size
+
+    @contextmanager
+    def timed(self, name: str):
+        """Time the block into the `name` timings."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings_ms.setdefault(name, []).append((time.perf_counter() - started) * 1000)
+
+    def report(self, **extra) -> dict:
+        """The run metrics as a JSON-serializable dict, `extra` fields included."""
+        elapsed = time.perf_counter() - self._started
+        buckets = np.searchsorted(LATENCY_BUCKETS_MS, self.latencies_ms, side="left")
+        counts = np.bincount(buckets, minlength=len(LATENCY_BUCKETS_MS) + 1)
+        histogram = {f"<={bound}": int(n) for bound, n in zip(LATENCY_BUCKETS_MS, counts)}
+        histogram[f">{LATENCY_BUCKETS_MS[-1]}"] = int(counts[-1])
+
+        return {
+            "started_at": self.started_at.isoformat(),
+            "elapsed_s": round(elapsed, 3),
+            "requests": self.requests,
+            "failed_requests": self.failed_requests,
+            "retries": self.retries,
+            "requests_per_s": round(self.requests / elapsed, 3) if elapsed else 0.0,
+            "bytes_downloaded": self.bytes_downloaded,
+            "http_status": dict(sorted(self.statuses.items())),
+            "latency_ms": {**_distribution(self.latencies_ms), "histogram": histogram},
+            "timings_ms": {name: _distribution(values) for name, values in self.timings_ms.items()},
+            "outcomes": self.summary.as_dict(),
+            **extra,
+        }
+
+
+def write_report(report: dict, path: Path) -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(report, indent=2))
+    return path
+
+
+def previous_reports(report_path: Path, limit: int = 7) -> list[dict]:
+    """
+    The reports of the `limit` previous runs, the ones next to `report_path`
+    with the same name prefix (e.g. apartments_) sorting before it.
+    """
+    prefix = report_path.name.split("_")[0]
+    paths = sorted(
+        path
+        for path in report_path.parent.glob(f"{prefix}*{METRICS_SUFFIX}")
+        if path.name < report_path.name
+    )
+    return [json.loads(path.read_text()) for path in paths[-limit:]]
+
+
+def throughput_regression(
+    report: dict, history: list[dict], metric: str = "listings_per_s", tolerance: float = 0.3
+) -> Optional[str]:
+    """
+    Describe the regression if `metric` is more than `tolerance` below the
+    median of the previous runs, None otherwise or without history.
+    """
+    baseline = [run[metric] for run in history if run.get(metric)]
+    if not baseline or metric not in report:
+        return None
+    median = float(np.median(baseline))
+    if report[metric] < median * (1 - tolerance):
+        return (
+            f"{metric} dropped to {report[metric]:.3f} from a median of {median:.3f} "
+            f"over the last {len(baseline)} runs"
+        )
+    return None
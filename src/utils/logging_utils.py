@@ -1,15 +1,167 @@
 """Logging utilities."""
 
+import atexit
+import copy
+import json
 import logging
+import logging.handlers
+import os
+import queue
 import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
 from pathlib import Path
 from typing import Optional
 
 
+# Attributes every LogRecord has, anything else was passed with `extra=`
+_RECORD_ATTRIBUTES = set(logging.LogRecord("", 0, "", 0, "", (), None).__dict__) | {
+    "message",
+    "asctime",
+}
+
+_listeners: list[logging.handlers.QueueListener] = []
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message and the `extra=` fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        entry.update(
+            (key, value) for key, value in record.__dict__.items() if key not in _RECORD_ATTRIBUTES
+        )
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """The default text format, telling how many similar messages were suppressed before."""
+
+    def formatMessage(self, record: logging.LogRecord) -> str:
+        message = super().formatMessage(record)
+        suppressed = getattr(record, "suppressed", 0)
+        if suppressed:
+            message += f" ({suppressed} similar messages suppressed)"
+        return message
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Let through at most `burst` records of a message per `interval` seconds.
+
+    Records are grouped by level and message template (the format string
+    before its arguments are applied), so lazily formatted messages about
+    different URLs count as the same message. The next record let through
+    carries how many were suppressed as its `suppressed` attribute, shown
+    by `TextFormatter` and `JsonFormatter`.
+    """
+
+    def __init__(self, burst: int = 10, interval: float = 60.0):
+        super().__init__()
+        self.burst = burst
+        self.interval = interval
+        self._windows: dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        key = (record.levelno, record.msg)
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= self.interval:
+                suppressed = window[2] if window else 0
+                window = self._windows[key] = [now, 0, 0]
+            else:
+                suppressed = 0
+            if window[1] >= self.burst:
+                window[2] += 1
+                return False
+            window[1] += 1
+
+        if suppressed:
+            record.suppressed = suppressed
+        return True
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    # The message is merged with its arguments now, they may be mutated before
+    # the listener thread gets to the record. The rest of the formatting (time,
+    # level, traceback) still happens there, the queue stays in-process
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+class RunSummary:
+    """
+    Counts of the outcomes of a run (skip and error reasons, ...), logged
+    once at the end of the run instead of one line per occurrence.
+    """
+
+    def __init__(self):
+        self.counts: dict[str, Counter] = {}
+
+    def count(self, outcome: str, reason: str, n: int = 1) -> None:
+        self.counts.setdefault(outcome, Counter())[reason] += n
+
+    def total(self, outcome: str) -> int:
+        return sum(self.counts.get(outcome, Counter()).values())
+
+    def as_dict(self) -> dict:
+        return {
+            outcome: dict(reasons.most_common()) for outcome, reasons in self.counts.items()
+        }
+
+    def log(self, logger: logging.Logger, message: str = "Run summary") -> None:
+        summary = self.as_dict()
+        logger.info(
+            "%s: %s",
+            message,
+            "; ".join(
+                f"{outcome} {self.total(outcome)} ("
+                + ", ".join(f"{reason}: {n}" for reason, n in reasons.items())
+                + ")"
+                for outcome, reasons in summary.items()
+            )
+            or "nothing to report",
+            extra={"summary": summary},
+        )
+
+
 def setup_logger(
-    name: str, log_file: Optional[Path] = None, level: int = logging.INFO
+    name: str,
+    log_file: Optional[Path] = None,
+    level: int = logging.INFO,
+    json_format: Optional[bool] = None,
+    use_queue: bool = False,
+    rate_limit: Optional[int] = None,
 ) -> logging.Logger:
-    """Set up logger with console and optional file output."""
+    """
+    Set up logger with console and optional file output.
+
+    Args:
+        name: Logger name.
+        log_file: Also log to this file.
+        level: Logging level.
+        json_format: One JSON object per line instead of text, defaults to
+            the LOG_FORMAT environment variable being "json".
+        use_queue: Hand the records to a background thread that formats and
+            writes them, so a hot loop never waits on I/O. Call `flush_logs`
+            before a process exits without running atexit handlers.
+        rate_limit: Let through at most this many records of a same message
+            per minute, see `RateLimitFilter`.
+    """
     logger = logging.getLogger(name)
     logger.setLevel(level)
 
@@ -17,19 +169,54 @@ def setup_logger(
     if logger.handlers:
         return logger
 
+    if json_format is None:
+        json_format = os.getenv("LOG_FORMAT", "").lower() == "json"
+    formatter = (
+        JsonFormatter()
+        if json_format
+        else TextFormatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    )
+
     # Console handler
     console_handler = logging.StreamHandler(sys.stdout)
-    console_format = logging.Formatter(
-        "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-    )
-    console_handler.setFormatter(console_format)
-    logger.addHandler(console_handler)
+    console_handler.setFormatter(formatter)
+    handlers: list[logging.Handler] = [console_handler]
 
     # File handler (optional)
     if log_file:
         log_file.parent.mkdir(parents=True, exist_ok=True)
         file_handler = logging.FileHandler(log_file)
-        file_handler.setFormatter(console_format)
-        logger.addHandler(file_handler)
+        file_handler.setFormatter(formatter)
+        handlers.append(file_handler)
+
+    if use_queue:
+        records: queue.SimpleQueue = queue.SimpleQueue()
+        listener = logging.handlers.QueueListener(
+            records, *handlers, respect_handler_level=True
+        )
+        listener.start()
+        _listeners.append(listener)
+        logger.addHandler(_QueueHandler(records))
+    else:
+        for handler in handlers:
+            logger.addHandler(handler)
+
+    # Filtered before the record is queued or formatted
+    if rate_limit:
+        logger.addFilter(RateLimitFilter(burst=rate_limit, interval=60.0))
 
     return logger
+
+
+def flush_logs() -> None:
+    """Write out every queued record of the loggers set up with `use_queue`."""
+    for listener in _listeners:
+        # Stopping drains the queue, the listener can be started again
+        listener.stop()
+        listener.start()
+
+
+@atexit.register
+def _stop_listeners() -> None:
+    for listener in _listeners:
+        listener.stop()